@@ -0,0 +1,234 @@
+"""
+Annotator Class
+=================
+"""
+import json
+import multiprocessing
+import os
+from collections import deque
+
+import numpy as np
+
+from .Cache import LRUCache
+
+# The state of the worker processes, set by `_init_worker`.
+_hownet_dict = None
+_expanded_layer = -1
+_memo = None
+
+
+def _init_worker(hownet_dict, expanded_layer, cache_size):
+    global _hownet_dict, _expanded_layer, _memo
+    _hownet_dict = hownet_dict
+    _expanded_layer = expanded_layer
+    _memo = LRUCache(cache_size)
+
+
+def _annotate_chunk(sentences):
+    """Annotate a chunk of tokenized sentences, each distinct token is looked up once.
+
+    Returns:
+        (`list[list[tuple]]`) the sorted sememe IDs of each token of each sentence.
+    """
+    vocab = dict.fromkeys(token for tokens in sentences for token in tokens)
+    for token in vocab:
+        ids = _memo.get(token)
+        if ids is None:
+            sememes = _hownet_dict.get_sememes_by_word(
+                token, display='list', merge=True, expanded_layer=_expanded_layer)
+            ids = tuple(sorted(s.id for s in sememes))
+            _memo.put(token, ids)
+        vocab[token] = ids
+    return [[vocab[token] for token in tokens] for tokens in sentences]
+
+
+class Annotator(object):
+    """Streaming annotation of tokenized corpora with the merged sememes of each token,
+    i.e. `get_sememes_by_word(token, display='list', merge=True)` as sememe IDs.
+
+    The sentences are read lazily in chunks. The distinct tokens of a chunk are looked up
+    once, and the sememes of each token are memoized by the process annotating it. The chunks
+    are annotated by a pool of processes, a bounded num of them at a time, and the results
+    come back in the input order, so a corpus of any size streams in constant memory.
+
+    Pass a `SharedHowNetDict` for a pool: the workers map its snapshot files instead of
+    receiving a copy. A `HowNetDict` is copied to the workers of a spawned pool, see `HowNetDict.__getstate__`.
+
+    Example::
+
+        >>> annotator = Annotator(OpenHowNet.SharedHowNetDict(), processes=8)
+        >>> with JSONLSink('corpus.jsonl', annotator.sememe_names) as sink:
+        ...     annotator.write(sentences, sink)
+    """
+
+    def __init__(self, hownet_dict, expanded_layer=-1, processes=None, chunk_size=1000, cache_size=1000000):
+        """Initialize the annotator.
+
+        Args:
+            hownet_dict (`HowNetDict` or `SharedHowNetDict`): the dictionary to look the tokens up.
+            expanded_layer (`int`): the num of the layers of the sememe trees to expand, -1 for all.
+            processes (`int`): the num of the processes, default: the num of the CPUs. 1 annotates in this process.
+            chunk_size (`int`): the num of the sentences in a chunk.
+            cache_size (`int`): the max num of the tokens each process memoizes.
+        """
+        self.hownet_dict = hownet_dict
+        self.expanded_layer = expanded_layer
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.sememe_names = [s.en_zh for s in hownet_dict.get_all_sememes()]
+
+    def __chunks(self, sentences):
+        chunk = []
+        for tokens in sentences:
+            chunk.append(tokens.split() if isinstance(tokens, str) else list(tokens))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def annotate(self, sentences):
+        """Annotate the sentences.
+
+        Args:
+            sentences (`iterable`): the sentences, each a list of tokens or a string of tokens separated by spaces.
+
+        Yields:
+            (`tuple`) the tokens of each sentence and the sorted sememe IDs of each token, in the input order.
+            The IDs index `sememe_names`, the tokens not in HowNet have none.
+        """
+        initargs = (self.hownet_dict, self.expanded_layer, self.cache_size)
+        if self.processes == 1:
+            _init_worker(*initargs)
+            for chunk in self.__chunks(sentences):
+                for item in zip(chunk, _annotate_chunk(chunk)):
+                    yield item
+            return
+        with multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=initargs) as pool:
+            # Keep a few chunks per process in flight, so that the input is not read ahead without bound.
+            max_pending = 2 * (self.processes or os.cpu_count() or 1)
+            pending = deque()
+            for chunk in self.__chunks(sentences):
+                pending.append((chunk, pool.apply_async(_annotate_chunk, (chunk,))))
+                if len(pending) >= max_pending:
+                    chunk, result = pending.popleft()
+                    for item in zip(chunk, result.get()):
+                        yield item
+            while pending:
+                chunk, result = pending.popleft()
+                for item in zip(chunk, result.get()):
+                    yield item
+
+    def write(self, sentences, sink):
+        """Annotate the sentences into a sink, see `JSONLSink` and `IDArraySink`.
+
+        Returns:
+            (`int`) the num of the sentences.
+        """
+        n = 0
+        for tokens, annotation in self.annotate(sentences):
+            sink.write(tokens, annotation)
+            n += 1
+        return n
+
+
+class JSONLSink(object):
+    """Write each annotated sentence as a line of JSON,
+    {"tokens": [...], "sememes": [[the en_zh names of the sememes of the token], ...]}.
+    """
+
+    def __init__(self, path, sememe_names):
+        """Open the file.
+
+        Args:
+            path (`str`): the path of the JSONL file.
+            sememe_names (`list[str]`): the names of the sememe IDs, see `Annotator.sememe_names`.
+        """
+        self.sememe_names = sememe_names
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, tokens, annotation):
+        self.file.write(json.dumps({'tokens': tokens, 'sememes': [
+            [self.sememe_names[i] for i in ids] for ids in annotation]}, ensure_ascii=False))
+        self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class IDArraySink(object):
+    """Write the annotated sentences as flat integer arrays in a directory, read by `load_id_arrays`:
+    the num of the tokens of each sentence, the num of the sememes of each token and the sememe IDs.
+    The arrays are appended to raw binary files in batches.
+    """
+    # The files of the arrays and their data types.
+    FILES = {'token_num': np.int32, 'sememe_num': np.int32, 'sememe': np.uint16}
+
+    def __init__(self, path, flush_size=1000000):
+        """Create the directory, the files in it are overwritten.
+
+        Args:
+            path (`str`): the path of the directory.
+            flush_size (`int`): the num of the sememe IDs buffered before they are written.
+        """
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.path = path
+        self.flush_size = flush_size
+        self.__buffers = {name: [] for name in self.FILES}
+        self.__files = {name: open(os.path.join(path, name + '.bin'), 'wb') for name in self.FILES}
+
+    def write(self, tokens, annotation):
+        self.__buffers['token_num'].append(len(annotation))
+        for ids in annotation:
+            self.__buffers['sememe_num'].append(len(ids))
+            self.__buffers['sememe'].extend(ids)
+        if len(self.__buffers['sememe']) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        for name, dtype in self.FILES.items():
+            np.array(self.__buffers[name], dtype=dtype).tofile(self.__files[name])
+            self.__buffers[name] = []
+            self.__files[name].flush()
+
+    def close(self):
+        self.flush()
+        for f in self.__files.values():
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load_id_arrays(path):
+    """Load the arrays written by `IDArraySink`, memory-mapped.
+
+    Returns:
+        (`tuple`) sentence_indptr, token_indptr and sememes: the tokens of sentence i are
+        [sentence_indptr[i], sentence_indptr[i + 1]), the sememe IDs of token j are
+        sememes[token_indptr[j]:token_indptr[j + 1]].
+    """
+    arrays = dict()
+    for name, dtype in IDArraySink.FILES.items():
+        file_path = os.path.join(path, name + '.bin')
+        if os.path.getsize(file_path) == 0:
+            arrays[name] = np.zeros(0, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(file_path, dtype=dtype, mode='r')
+    indptrs = []
+    for name in ['token_num', 'sememe_num']:
+        indptr = np.zeros(len(arrays[name]) + 1, dtype=np.int64)
+        np.cumsum(arrays[name], out=indptr[1:])
+        indptrs.append(indptr)
+    return indptrs[0], indptrs[1], arrays['sememe']
@@ -20,6 +20,8 @@ class BabelNetSynset(object):
         sememes (list):
             The sememes labeled to the BabelSynset.
     """
+    __slots__ = ('id', 'pos', 'en_synonyms', 'zh_synonyms', 'en_glosses',
+                 'zh_glosses', 'sememes', 'image_urls', 'related_synsets')
 
     def __init__(self, babelnet_synset):
         """Initialize an BabelNetSynset instance.
@@ -34,6 +36,16 @@ class BabelNetSynset(object):
         self.image_urls = babelnet_synset['image_urls']
         self.related_synsets = {}
 
+    def __getstate__(self):
+        """Pickle the synset as the dict of its attributes, like before it had slots.
+        """
+        return {k: getattr(self, k) for k in BabelNetSynset.__slots__ if hasattr(self, k)}
+
+    def __setstate__(self, state):
+        # The pickles from before the slots hold the same attributes in the instance dict.
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __repr__(self):
         """Define how to print the BabelNet synset.
         """
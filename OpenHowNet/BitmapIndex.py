@@ -0,0 +1,202 @@
+"""
+BitmapIndex Class
+===================
+"""
+import numpy as np
+
+
+class Bitmap(object):
+    """A set of integers in [0, size), stored as a sorted array when sparse and as a bitset when dense.
+
+    Like a roaring bitmap with a single container, the form is chosen by the density:
+    a set with more than one member per `DENSE_BITS` integers takes less space as a bitset.
+    The set operations pick the cheapest algorithm for the forms of the operands, e.g.
+    a sparse set is intersected with a dense one by testing its members' bits.
+
+    Example::
+
+        >>> a = Bitmap.from_ids([1, 5, 9], 100)
+        >>> b = Bitmap.from_ids(range(0, 100, 3), 100)
+        >>> (a & b).ids()
+        array([9], dtype=int32)
+        >>> len(a | b), len(b - a), len(~a)
+        (36, 33, 97)
+    """
+    # A set with more members than size / DENSE_BITS is stored as a bitset.
+    DENSE_BITS = 32
+
+    __slots__ = ('size', 'array', 'words')
+
+    def __init__(self, size, array=None, words=None):
+        """Wrap one of the forms, see `from_ids` and `from_mask` to build a bitmap.
+
+        Args:
+            size (`int`): the size of the universe.
+            array (`numpy.ndarray`): the sorted distinct int32 members of a sparse set.
+            words (`numpy.ndarray`): the uint64 bitset of a dense set, bit i & 63 of words[i >> 6] for i.
+        """
+        self.size = size
+        self.array = array
+        self.words = words
+
+    @classmethod
+    def from_ids(cls, ids, size, assume_sorted=False):
+        """Build a bitmap from integers, assume_sorted=True if they are sorted and distinct already.
+        """
+        ids = np.asarray(list(ids) if isinstance(ids, range) else ids, dtype=np.int32)
+        if not assume_sorted:
+            ids = np.unique(ids)
+        if len(ids) * cls.DENSE_BITS > size:
+            mask = np.zeros(size, dtype=bool)
+            mask[ids] = True
+            return cls.from_mask(mask)
+        return cls(size, array=ids)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Build a dense bitmap from a boolean array.
+        """
+        size = len(mask)
+        packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+        words = np.zeros((size + 63) // 64 * 8, dtype=np.uint8)
+        words[:len(packed)] = packed
+        return cls(size, words=words.view(np.uint64))
+
+    @classmethod
+    def full(cls, size):
+        """Build the bitmap of all the integers in [0, size).
+        """
+        return cls.from_mask(np.ones(size, dtype=bool))
+
+    def __len__(self):
+        if self.array is not None:
+            return len(self.array)
+        return int(np.unpackbits(self.words.view(np.uint8)).sum())
+
+    def __contains__(self, i):
+        if not 0 <= i < self.size:
+            return False
+        if self.array is not None:
+            j = int(np.searchsorted(self.array, i))
+            return j < len(self.array) and int(self.array[j]) == i
+        return bool((int(self.words[i >> 6]) >> (i & 63)) & 1)
+
+    def ids(self):
+        """Get the members in ascending order.
+
+        Returns:
+            (`numpy.ndarray`) the int32 members.
+        """
+        if self.array is not None:
+            return self.array
+        mask = np.unpackbits(self.words.view(np.uint8), bitorder='little')[:self.size]
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def __test(self, ids):
+        """Test which of the integers are in this dense bitmap.
+        """
+        return ((self.words[ids >> 6] >> (ids & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)
+
+    def __dense_words(self):
+        if self.words is not None:
+            return self.words
+        return Bitmap.from_mask(self.__mask()).words
+
+    def __mask(self):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.array] = True
+        return mask
+
+    def __and__(self, other):
+        if self.array is not None and other.array is not None:
+            return Bitmap(self.size, array=np.intersect1d(self.array, other.array, assume_unique=True))
+        if self.array is not None:
+            return Bitmap(self.size, array=self.array[other.__test(self.array)])
+        if other.array is not None:
+            return Bitmap(self.size, array=other.array[self.__test(other.array)])
+        return Bitmap(self.size, words=self.words & other.words)
+
+    def __or__(self, other):
+        if self.array is not None and other.array is not None and \
+                (len(self.array) + len(other.array)) * self.DENSE_BITS <= self.size:
+            return Bitmap(self.size, array=np.union1d(self.array, other.array).astype(np.int32))
+        return Bitmap(self.size, words=self.__dense_words() | other.__dense_words())
+
+    def __sub__(self, other):
+        if self.array is not None:
+            if other.array is not None:
+                return Bitmap(self.size, array=np.setdiff1d(self.array, other.array, assume_unique=True))
+            return Bitmap(self.size, array=self.array[~other.__test(self.array)])
+        return Bitmap(self.size, words=self.words & ~other.__dense_words())
+
+    def __invert__(self):
+        return Bitmap.full(self.size) - self
+
+
+class BitmapIndex(object):
+    """Inverted index from the columns to the rows of a binary matrix as `Bitmap`s,
+    e.g. from the sememes to the senses annotated with them, for boolean queries.
+
+    Example::
+
+        >>> matrix = hownet_dict.sense_sememe_matrix
+        >>> index = BitmapIndex(matrix.col_indptr, matrix.col_indices, matrix.shape[0])
+        >>> index.query(all_of=[human.id, occupation.id], none_of=[female.id]).ids()
+    """
+
+    def __init__(self, col_indptr, col_indices, n_rows):
+        """Build the index from the matrix in CSC form.
+
+        Args:
+            col_indptr (`array_like`), col_indices (`array_like`):
+                the rows of the j-th column are col_indices[col_indptr[j]:col_indptr[j + 1]], sorted and distinct.
+            n_rows (`int`): the num of the rows.
+        """
+        col_indptr = np.asarray(col_indptr, dtype=np.int64)
+        col_indices = np.asarray(col_indices, dtype=np.int32)
+        self.n_rows = n_rows
+        self.postings = [Bitmap.from_ids(col_indices[col_indptr[j]:col_indptr[j + 1]], n_rows, assume_sorted=True)
+                         for j in range(len(col_indptr) - 1)]
+
+    def __len__(self):
+        return len(self.postings)
+
+    def __getitem__(self, j):
+        return self.postings[j]
+
+    def union(self, cols):
+        """Get the rows in any of the columns.
+        """
+        res = Bitmap(self.n_rows, array=np.zeros(0, dtype=np.int32))
+        for k, j in enumerate(cols):
+            res = self.postings[j] if k == 0 else res | self.postings[j]
+        return res
+
+    def query(self, all_of=(), any_of=(), none_of=(), mask=None):
+        """Get the rows in all the columns of all_of AND in any column of each group of any_of
+        AND in none of the columns of none_of.
+
+        Args:
+            all_of (`list[int]`): the required columns.
+            any_of (`list[list[int]]`): the groups of alternative columns, each needs one.
+            none_of (`list[int]`): the excluded columns.
+            mask (`Bitmap`): keep the rows in it only, e.g. a filter by the attributes of the rows.
+
+        Returns:
+            (`Bitmap`) the matched rows, all the rows if nothing but none_of is given.
+        """
+        parts = [self.postings[j] for j in all_of] + [self.union(group) for group in any_of]
+        if mask is not None:
+            parts.append(mask)
+        if not parts:
+            parts.append(Bitmap.full(self.n_rows))
+        # Start from the smallest, the intersections only shrink it. The dense ones are the largest.
+        parts.sort(key=lambda b: len(b.array) if b.array is not None else b.size)
+        res = parts[0]
+        for part in parts[1:]:
+            if res.array is not None and len(res.array) == 0:
+                break
+            res = res & part
+        for j in none_of:
+            res = res - self.postings[j]
+        return res
@@ -0,0 +1,259 @@
+"""
+Cache
+=======
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """A thread-safe least-recently-used cache with hit and miss counters.
+
+    Example::
+
+        >>> cache = LRUCache(maxsize=1024)
+        >>> value = cache.get(key)
+        >>> if value is None:
+        ...     value = compute(key)
+        ...     cache.put(key, value)
+        >>> cache.cache_info()
+        CacheInfo(hits=0, misses=1, maxsize=1024, currsize=1)
+    """
+
+    def __init__(self, maxsize=1024):
+        """Initialize the cache.
+
+        Args:
+            maxsize (`int`): the max num of the cached items, None means unbounded.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key):
+        return key in self.__data
+
+    def get(self, key, default=None):
+        """Get the cached value of the key and mark it as recently used.
+
+        Returns:
+            the cached value, or `default` if the key is not cached.
+        """
+        with self.__lock:
+            try:
+                value = self.__data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.__data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache the value of the key, the least recently used item is dropped if the cache is full.
+        """
+        with self.__lock:
+            self.__data[key] = value
+            self.__data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self.__data) > self.maxsize:
+                    self.__data.popitem(last=False)
+
+    def resize(self, maxsize):
+        """Change the max num of the cached items.
+        """
+        with self.__lock:
+            self.maxsize = maxsize
+            if maxsize is not None:
+                while len(self.__data) > maxsize:
+                    self.__data.popitem(last=False)
+
+    def clear(self):
+        """Drop all the cached items and reset the counters.
+        """
+        with self.__lock:
+            self.__data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self):
+        """Get the statistics of the cache.
+
+        Returns:
+            (`CacheInfo`) the hits, misses, maxsize and currsize of the cache.
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__data))
+
+
+class SQLiteCache(object):
+    """A persistent cache of float values keyed by integers, stored in a SQLite file.
+
+    The file is opened in WAL mode, so that many processes read it at once while one of
+    them writes. Each process connects on its own, also after a fork. The values are
+    kept apart by the version they are computed with, e.g. the fingerprint of the resources,
+    so that a stale value is never returned. The new values are written in batches, by `close`
+    and at exit if the cache is still alive, and the least recently used values of all the versions
+    are evicted when the file holds more than `maxsize` values.
+
+    Example::
+
+        >>> cache = SQLiteCache('similarity.db', version=fingerprint, maxsize=10 ** 7)
+        >>> value = cache.get(key)
+        >>> if value is None:
+        ...     value = compute(key)
+        ...     cache.put(key, value)
+    """
+
+    def __init__(self, path, version, maxsize=10000000, flush_size=1024):
+        """Open or create the cache file.
+
+        Args:
+            path (`str`): the path of the SQLite file.
+            version (`str`): the version of the values, the values of other versions are ignored.
+            maxsize (`int`): the max num of the values kept in the file, None means unbounded.
+            flush_size (`int`): the num of the new values written at a time.
+        """
+        self.path = path
+        self.version = version
+        self.maxsize = maxsize
+        self.flush_size = flush_size
+        self.hits = 0
+        self.misses = 0
+        self.__pending = dict()  # key -> value not written yet
+        self.__used = set()  # the keys read since the last flush
+        self.__lock = threading.RLock()
+        self.__conn = None
+        self.__pid = None
+        self.__version_id = None
+        self.__connect()
+        # Flush at exit while the cache is alive, without keeping it alive.
+        self.__finalizer = weakref.finalize(self, SQLiteCache.__flush_alive, weakref.WeakMethod(self.flush))
+
+    @staticmethod
+    def __flush_alive(flush):
+        """Flush a cache given by a weak reference to its `flush`, if it is still alive.
+        """
+        flush = flush()
+        if flush is not None:
+            flush()
+
+    def __connect(self):
+        """Get the connection of this process, connecting at the first use.
+        """
+        if self.__conn is None or self.__pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS versions (id INTEGER PRIMARY KEY, version TEXT UNIQUE)')
+                conn.execute('CREATE TABLE IF NOT EXISTS cache (version INTEGER, key INTEGER, value REAL, '
+                             'used INTEGER, PRIMARY KEY (version, key)) WITHOUT ROWID')
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_used ON cache (used)')
+                conn.execute('INSERT OR IGNORE INTO versions (version) VALUES (?)', (self.version,))
+            self.__version_id = conn.execute(
+                'SELECT id FROM versions WHERE version = ?', (self.version,)).fetchone()[0]
+            # A connection inherited by a forked process is left to its owner.
+            self.__conn = conn
+            self.__pid = os.getpid()
+            self.__pending = dict()
+            self.__used = set()
+        return self.__conn
+
+    def get(self, key, default=None):
+        """Get the cached value of the key.
+
+        Returns:
+            the cached value, or `default` if the key is not cached.
+        """
+        with self.__lock:
+            conn = self.__connect()
+            value = self.__pending.get(key)
+            if value is None:
+                row = conn.execute('SELECT value FROM cache WHERE version = ? AND key = ?',
+                                   (self.__version_id, key)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return default
+                value = row[0]
+                self.__used.add(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Cache the value of the key, written at the next `flush`.
+        """
+        with self.__lock:
+            self.__connect()
+            self.__pending[key] = value
+            if len(self.__pending) >= self.flush_size:
+                self.flush()
+
+    def flush(self):
+        """Write the new values and evict the least recently used values if the file is full.
+        """
+        with self.__lock:
+            if self.__conn is None or self.__pid != os.getpid():
+                return
+            if not self.__pending and not self.__used:
+                return
+            now = int(time.time() * 1e9)
+            version = self.__version_id
+            try:
+                with self.__conn as conn:
+                    conn.executemany('INSERT OR REPLACE INTO cache (version, key, value, used) VALUES (?, ?, ?, ?)',
+                                     [(version, k, v, now) for k, v in self.__pending.items()])
+                    conn.executemany('UPDATE cache SET used = ? WHERE version = ? AND key = ?',
+                                     [(now, version, k) for k in self.__used])
+                    if self.maxsize is not None:
+                        extra = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - self.maxsize
+                        if extra > 0:
+                            conn.execute('DELETE FROM cache WHERE (version, key) IN '
+                                         '(SELECT version, key FROM cache ORDER BY used LIMIT ?)', (extra,))
+            except sqlite3.OperationalError as e:
+                # The values are only lost for the other processes, e.g. when the file is locked for long.
+                print("Writing the similarity cache failed:", e)
+            self.__pending = dict()
+            self.__used = set()
+
+    def clear(self):
+        """Drop all the cached values of all the versions and reset the counters.
+        """
+        with self.__lock:
+            with self.__connect() as conn:
+                conn.execute('DELETE FROM cache')
+            self.__pending = dict()
+            self.__used = set()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        """Write the new values and close the connection.
+        """
+        with self.__lock:
+            self.flush()
+            if self.__conn is not None and self.__pid == os.getpid():
+                self.__conn.close()
+            self.__conn = None
+            self.__finalizer.detach()
+
+    def cache_info(self):
+        """Get the statistics of the cache.
+
+        Returns:
+            (`CacheInfo`) the hits, misses, maxsize and currsize (the num of the values in the file) of the cache.
+        """
+        with self.__lock:
+            self.flush()
+            currsize = self.__connect().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        return CacheInfo(self.hits, self.misses, self.maxsize, currsize)
@@ -4,11 +4,42 @@ HowNetDict Class
 """
 import pickle
 import os
+import sqlite3
+import threading
+import time
 
-from .Sense import Sense
+import numpy as np
+
+from .Sense import Sense, sememe_tree_cache
+from .SenseStore import SenseSequence, SenseStore, SnapshotSenseDict, SnapshotWordMap
+from .Cache import SQLiteCache
 from .Sememe import Sememe
 from .BabelNetSynset import BabelNetSynset
+from .IncidenceMatrix import IncidenceMatrix
+from .BitmapIndex import Bitmap, BitmapIndex
+from .RetrievalIndex import RetrievalIndex
+from .WordMatcher import WordMatcher
+from .KDML import parse_kdml
+from .SubstringIndex import SubstringIndex
+from .SememeIndex import SememeIndex
+from .Trie import Trie
+from .Similarity import SIMILARITY_RESOURCES, SememeSimilarity, batch_similarity, open_sememe_similarity, open_sense_trees
+from .NearestIndex import NearestIndex, build_nearest_index, nearest_senses
+from .SimilarityMatrix import build_similarity_matrix
+from .MinHashIndex import MinHashIndex
+from .TaxonomyIndex import TAXONOMY_ALPHA, TaxonomyIndex
+from .TripleStore import TripleStore
 from .Download import get_resource
+from .Snapshot import Snapshot, SnapshotError, compile_hownet_dict, get_resource_paths, get_snapshot_path, resource_fingerprint, write_snapshot
+
+# The resource files the core data is built from.
+CORE_RESOURCES = ['sememe_all', 'sememe_triples_taxonomy.txt', 'HowNet_dict_complete']
+# The num of the nearest senses searched for each of the K nearest words,
+# the words of the other senses are dropped by the language, the POS and the duplicates.
+NEAREST_SENSE_FACTOR = 4
+# The num of the tokens standing for the root sememe of a sense in the MinHash index,
+# so that the senses sharing the root sememe, which weighs the most in the similarity, share more tokens.
+MINHASH_ROOT_WEIGHT = 3
 
 
 class HowNetDict(object):
@@ -30,59 +61,74 @@ class HowNetDict(object):
 
     """
 
-    def __init__(self, init_sim=False, init_babel=False):
+    # Attributes loaded on first access in the lazy mode, and the subsystems providing them.
+    __LAZY_ATTRIBUTES = {
+        'sememe_dic': 'sememe', 'sememe_list': 'sememe', 'sememe_index': 'sememe', 'taxonomy_index': 'relation',
+        'triple_store': 'relation',
+        'sense_dic': 'sense', 'sense_list': 'sense', 'en_map': 'sense', 'zh_map': 'sense', 'sense_sememe_matrix': 'sense',
+        'sememe_sim_table': 'similarity', 'sense_trees': 'similarity', 'sense_syn_dic': 'similarity',
+        'sense_tree_dic': 'sense_tree',
+        'synset_dic': 'babel', 'en_synset_dic': 'babel', 'zh_synset_dic': 'babel',
+    }
+    # Indexes built at their first access in any mode, each loaded as a subsystem named after its attribute:
+    # the subsystems (or indexes) it is built from and the function building it.
+    # An index is dropped and rebuilt at its next access once one of its subsystems is loaded again.
+    __INDEXES = {
+        'en_word_index': (['sense'], lambda self: SubstringIndex(self.en_map)),
+        'zh_word_index': (['sense'], lambda self: SubstringIndex(self.zh_map)),
+        'sense_no_index': (['sense'], lambda self: SubstringIndex(self.sense_dic)),
+        'synset_bn_index': (['babel'], lambda self: SubstringIndex(self.synset_dic)),
+        'synset_en_word_index': (['babel'], lambda self: SubstringIndex(self.en_synset_dic)),
+        'synset_zh_word_index': (['babel'], lambda self: SubstringIndex(self.zh_synset_dic)),
+        'en_word_trie': (['sense'], lambda self: Trie(self.en_map.keys(), [len(v) for v in self.en_map.values()])),
+        'zh_word_trie': (['sense'], lambda self: Trie(self.zh_map.keys(), [len(v) for v in self.zh_map.values()])),
+        'sememe_en_trie': (['sememe'], lambda self: HowNetDict.__sememe_trie(self.sememe_index.en)),
+        'sememe_zh_trie': (['sememe'], lambda self: HowNetDict.__sememe_trie(self.sememe_index.zh)),
+        'en_word_matcher': (['sense'], lambda self: WordMatcher(self.en_map.keys())),
+        'zh_word_matcher': (['sense'], lambda self: WordMatcher(self.zh_map.keys())),
+        'word_matcher': (['sense'], lambda self: WordMatcher(list(self.zh_map.keys()) + list(self.en_map.keys()))),
+        'sense_bitmap_index': (['sense'], lambda self: BitmapIndex(
+            self.sense_sememe_matrix.col_indptr, self.sense_sememe_matrix.col_indices, len(self.sense_list))),
+        'sense_filter': (['sense'], lambda self: self.__build_sense_filter()),
+        'sense_retrieval_index': (['sense'], lambda self: RetrievalIndex(
+            self.sense_sememe_matrix.col_indptr, self.sense_sememe_matrix.col_indices, len(self.sense_list))),
+        'sense_retrieval_freq_index': (['sense'], lambda self: RetrievalIndex(
+            self.sense_sememe_matrix.col_indptr, self.sense_sememe_matrix.col_indices, len(self.sense_list),
+            [s.freq for s in self.sememe_list])),
+        'nearest_candidates': (['similarity'], lambda self: np.array(
+            [i for i, No in enumerate(self.sense_dic) if int(No) >= 3378 and self.sense_trees.sense_class[i] != -1],
+            dtype=np.int32)),
+        'sense_minhash_index': (['nearest_candidates'], lambda self: self.__build_minhash_index()),
+    }
+    __LAZY_ATTRIBUTES.update((name, name) for name in __INDEXES)
+
+    def __init__(self, init_sim=False, init_babel=False, use_snapshot=False, lazy=False):
         '''Initialize HowNetDict
 
         Args:
             init_sim (`bool`) : whether to initialize the similarity calculation module.
             init_babel (`bool`) : whether to initialize the BabelNet synest search module.
+            use_snapshot (`bool`) :
+                whether to load the core data from the compiled snapshot under `~/.openhownet`.
+                The snapshot is built at the first time and rebuilt automatically when the resources change,
+                see `build_snapshot`. In the lazy mode, it is opened or built at the first access of the data.
+                The senses and the word maps are then read from the mapped snapshot, and a Sense object is
+                only created when it is looked up, so they take almost no memory. `sense_dic`, `sense_list`,
+                `en_map`, `zh_map` and the senses of the sememes become read-only views of the snapshot.
+            lazy (`bool`) :
+                whether to load each part of the data on its first use instead of at initialization.
+                The word maps are loaded by the first sense search, the sememe relations by the first relation search,
+                the similarity module by the first similarity calculation and the BabelNet synsets by the first synset search.
+                `init_sim` and `init_babel` are ignored in the lazy mode.
         '''
+        self.__init_state(use_snapshot, lazy)
         try:
-            sememe_dir, sememe_triples_dir, data_dir = [os.path.join("resources", i) for i in [
-                'sememe_all', 'sememe_triples_taxonomy.txt', 'HowNet_dict_complete']]
-
-            # Initialize sememe list from sememe_all.
-            self.sememe_dic = dict()
-            with get_resource(sememe_dir, 'rb') as sememe_dict:
-                sememe_all = pickle.load(sememe_dict)
-            sememe_dict.close()
-            for k, v in sememe_all.items():
-                self.sememe_dic[k] = Sememe(k, v)
-
-            # Initialize the relations between sememes
-            sememe_triples = get_resource(sememe_triples_dir, "r")
-            for line in sememe_triples.readlines():
-                line = line.strip().split(" ")
-                if line[1] not in self.sememe_dic[line[0]].related_sememes.keys():
-                    self.sememe_dic[line[0]].related_sememes[line[1]] = []
-                self.sememe_dic[line[0]].related_sememes[line[1]].append(
-                    self.sememe_dic[line[2]])
-            sememe_triples.close()
-
-            # Initialize sense list from HowNet_dict
-            self.sense_dic = dict()
-            with get_resource(data_dir, 'rb') as origin_dict:
-                hownet_dict = pickle.load(origin_dict)
-            origin_dict.close()
-            for k, v in hownet_dict.items():
-                self.sense_dic[k] = Sense(v)
-                self.sense_dic[k].sememes = self.__gen_sememe_list(
-                    self.sense_dic[k])
-                for s in self.sense_dic[k].sememes:
-                    s.senses.append(self.sense_dic[k])
-
-            # Initialize the sense dic to retrieve by word.
-            self.en_map = dict()
-            self.zh_map = dict()
-            for k in self.sense_dic.keys():
-                en_word = self.sense_dic[k].en_word.strip()
-                zh_word = self.sense_dic[k].zh_word.strip()
-                if en_word not in self.en_map:
-                    self.en_map[en_word] = list()
-                self.en_map[en_word].append(self.sense_dic[k])
-                if zh_word not in self.zh_map:
-                    self.zh_map[zh_word] = list()
-                self.zh_map[zh_word].append(self.sense_dic[k])
+            if lazy:
+                print('Initializing OpenHowNet succeeded! (lazy mode)')
+                return
+            self.__load('sememe')
+            self.__load('relation')
+            self.__load('sense')
             print('Initializing OpenHowNet succeeded!')
 
             # Initialize the similarity calculation
@@ -96,6 +142,289 @@ class HowNetDict(object):
         except FileNotFoundError as e:
             print(e)
 
+    def __init_state(self, use_snapshot, lazy):
+        """Initialize the loading state with nothing loaded.
+        """
+        self.__lazy = lazy
+        self.__use_snapshot = use_snapshot
+        self.__lock = threading.RLock()
+        self.__loaded = set()
+        self.__snapshot = None
+        self.__nearest_index = None
+        self.__persistent_cache = None
+        self.__persistent_cache_config = None
+        self.__sememe_similarity = 'table'
+        self.load_times = dict()
+
+    def __getstate__(self):
+        """Pickle the dict by the way it is loaded instead of by its data, a graph of linked senses and
+        sememes too deep to pickle: the unpickled copy, e.g. in a worker of a spawned pool, loads the same
+        subsystems by itself, which the snapshot makes fast. The changes made to the data are not kept.
+        """
+        with self.__lock:
+            return {'use_snapshot': self.__use_snapshot, 'lazy': self.__lazy,
+                    'loaded': [s for s in self.__loaded if s not in HowNetDict.__INDEXES],
+                    'sememe_similarity': self.__sememe_similarity,
+                    'persistent_cache_config': self.__persistent_cache_config}
+
+    def __setstate__(self, state):
+        self.__init_state(state['use_snapshot'], state['lazy'])
+        self.__sememe_similarity = state['sememe_similarity']
+        self.__persistent_cache_config = state['persistent_cache_config']
+        try:
+            for subsystem in state['loaded']:
+                self.__load(subsystem)
+        except FileNotFoundError as e:
+            print(e)
+
+    def __getattr__(self, name):
+        """Load the subsystem providing the attribute at its first access in the lazy mode.
+        """
+        subsystem = HowNetDict.__LAZY_ATTRIBUTES.get(name)
+        # The anytree sense trees are only kept for compatibility, they are loaded on first access
+        # once the similarity calculation is initialized. The indexes are always built on first access.
+        on_demand = (subsystem == 'sense_tree' and 'sense_trees' in self.__dict__) or subsystem in HowNetDict.__INDEXES
+        if subsystem is None or not (on_demand or self.__dict__.get('_HowNetDict__lazy')):
+            raise AttributeError("'HowNetDict' object has no attribute '{}'".format(name))
+        self.__load(subsystem)
+        if name not in self.__dict__:
+            raise AttributeError("'HowNetDict' object has no attribute '{}'".format(name))
+        return self.__dict__[name]
+
+    def __load(self, subsystem):
+        """Load a subsystem and its dependencies only once, safe to be called by several threads.
+        The time the loading takes is recorded in `load_times`.
+
+        Args:
+            subsystem (`str`) :
+                one of snapshot/sememe/relation/sense/similarity/sense_tree/babel or an index of `__INDEXES`.
+        """
+        if subsystem in self.__loaded:
+            return
+        with self.__lock:
+            if subsystem in self.__loaded:
+                return
+            if subsystem in HowNetDict.__INDEXES:
+                dependencies, build = HowNetDict.__INDEXES[subsystem]
+
+                def loader():
+                    setattr(self, subsystem, build(self))
+            else:
+                dependencies, loader = {
+                    'snapshot': ([], self.__open_snapshot),
+                    'sememe': (['snapshot'], self.__load_sememes),
+                    'relation': (['sememe'], self.__load_relations),
+                    'sense': (['sememe'], self.__load_senses),
+                    'similarity': (['sememe', 'sense'], lambda: self.initialize_similarity_calculation(
+                        self.__sememe_similarity)),
+                    'sense_tree': (['similarity'], self.__load_sense_tree_dic),
+                    'babel': (['sememe'], self.initialize_babelnet_dict),
+                }[subsystem]
+            for d in dependencies:
+                self.__load(d)
+            start = time.time()
+            loader()
+            self.load_times[subsystem] = time.time() - start
+            self.__loaded.add(subsystem)
+            if self.__lazy:
+                print("Loading {} took {:.3f}s.".format(
+                    subsystem, self.load_times[subsystem]))
+
+    def __reloaded(self, subsystem):
+        """Mark a subsystem loaded by its public initializer, dropping the indexes built from its former data.
+        """
+        with self.__lock:
+            self.__loaded.add(subsystem)
+            self.__drop_indexes(subsystem)
+
+    def __drop_indexes(self, subsystem):
+        """Drop the indexes built from a subsystem or index, and the ones built from them.
+        """
+        for name, (dependencies, _) in HowNetDict.__INDEXES.items():
+            if subsystem in dependencies and name in self.__loaded:
+                self.__loaded.discard(name)
+                self.__dict__.pop(name, None)
+                self.__drop_indexes(name)
+
+    @staticmethod
+    def build_snapshot():
+        """Open the compiled snapshot of the core data under `~/.openhownet/snapshot`.
+        The snapshot is (re)built from the resource files if it is missing, corrupted,
+        of an old format or older than the resource files.
+        The core data is loaded from the resources by a separate HowNetDict to build it,
+        which is released once the snapshot is written.
+
+        Returns:
+            (`Snapshot`) the opened snapshot.
+
+        Raises:
+            FileNotFoundError: the resource files are missing.
+            OSError: writing the snapshot failed.
+        """
+        fingerprint = resource_fingerprint(get_resource_paths(CORE_RESOURCES))
+        snapshot_path = get_snapshot_path("hownet.snap")
+        try:
+            return Snapshot(snapshot_path, fingerprint)
+        except SnapshotError:
+            pass
+        source = HowNetDict.__new__(HowNetDict)
+        source.__init_state(False, False)
+        source.__load('relation')
+        source.__load('sense')
+        write_snapshot(snapshot_path, compile_hownet_dict(source), fingerprint)
+        return Snapshot(snapshot_path, fingerprint)
+
+    def __open_snapshot(self):
+        """Open the snapshot of the core data if `use_snapshot` is set, see `build_snapshot`.
+        The data is loaded from the resource files if the snapshot cannot be written.
+        """
+        if not self.__use_snapshot:
+            return
+        try:
+            self.__snapshot = HowNetDict.build_snapshot()
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            print("Writing the OpenHowNet snapshot failed:", e)
+
+    def __load_sememes(self):
+        """Initialize the sememes from the snapshot or from sememe_all.
+        """
+        sememe_dic = dict()
+        if self.__snapshot is not None:
+            for k, v in zip(self.__snapshot.strings('sememe'), self.__snapshot['sememe_freq'].tolist()):
+                sememe_dic[k] = Sememe(k, v)
+        else:
+            with get_resource(os.path.join("resources", "sememe_all"), 'rb') as sememe_dict:
+                sememe_all = pickle.load(sememe_dict)
+            for k, v in sememe_all.items():
+                sememe_dic[k] = Sememe(k, v)
+        # Sememes are numbered by their order in sememe_dic.
+        for i, s in enumerate(sememe_dic.values()):
+            s.id = i
+        self.sememe_list = list(sememe_dic.values())
+        self.sememe_index = SememeIndex(self.sememe_list)
+        self.sememe_dic = sememe_dic
+
+    def __load_relations(self):
+        """Initialize the relations between sememes from the snapshot or from sememe_triples_taxonomy.txt.
+        """
+        if self.__snapshot is not None:
+            sememes = self.sememe_list
+            relations = self.__snapshot.strings('relation')
+            columns = [self.__snapshot['relation_head'], self.__snapshot['relation_type'],
+                       self.__snapshot['relation_tail']]
+            triples = [(sememes[h], relations[r], sememes[t]) for h, r, t in zip(*[c.tolist() for c in columns])]
+        else:
+            triples = []
+            with get_resource(os.path.join("resources", "sememe_triples_taxonomy.txt"), "r") as sememe_triples:
+                for line in sememe_triples.readlines():
+                    line = line.strip().split(" ")
+                    triples.append(
+                        (self.sememe_dic[line[0]], line[1], self.sememe_dic[line[2]]))
+            relations = list(dict.fromkeys(r for h, r, t in triples))
+            relation_index = {r: i for i, r in enumerate(relations)}
+            columns = [[h.id for h, r, t in triples], [relation_index[r] for h, r, t in triples],
+                       [t.id for h, r, t in triples]]
+        self.triple_store = TripleStore(*columns, relations, len(self.sememe_list))
+        parents = [-1] * len(self.sememe_list)
+        for h, r, t in triples:
+            if r not in h.related_sememes.keys():
+                h.related_sememes[r] = []
+            h.related_sememes[r].append(t)
+            if r == 'hypernym' and parents[h.id] == -1:
+                parents[h.id] = t.id
+        self.taxonomy_index = TaxonomyIndex(parents)
+
+    def __load_senses(self):
+        """Initialize the senses and the sense dic to retrieve by word from the snapshot or from HowNet_dict_complete.
+        With the snapshot, the senses stay in the mapped sections and are created on demand, see `SenseStore`.
+        """
+        if self.__snapshot is not None:
+            snapshot = self.__snapshot
+            store = SenseStore(snapshot, self.sememe_list)
+            matrix = IncidenceMatrix(snapshot['sense_sememe_indptr'], snapshot['sense_sememe_indices'],
+                                     len(self.sememe_list))
+            # The senses of each sememe in the order of the senses, repeated as often as in their sememes,
+            # i.e. the raw rows in CSC order, which the matrix deduplicates.
+            indptr, indices = snapshot['sense_sememe_indptr'], snapshot['sense_sememe_indices']
+            rows = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))[
+                np.argsort(indices, kind='stable')]
+            col_indptr = np.zeros(len(self.sememe_list) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(indices, minlength=len(self.sememe_list)), out=col_indptr[1:])
+            for s in self.sememe_list:
+                s.senses = SenseSequence(store, rows[col_indptr[s.id]:col_indptr[s.id + 1]])
+            self.sense_list = SenseSequence(store, range(len(store)))
+            self.sense_sememe_matrix = matrix
+            self.sense_dic = SnapshotSenseDict(store)
+            self.en_map = SnapshotWordMap(store, 'en')
+            self.zh_map = SnapshotWordMap(store, 'zh')
+            return
+
+        sense_dic = dict()
+        en_map = dict()
+        zh_map = dict()
+        with get_resource(os.path.join("resources", "HowNet_dict_complete"), 'rb') as origin_dict:
+            hownet_dict = pickle.load(origin_dict)
+        for k, v in hownet_dict.items():
+            sense_dic[k] = Sense(v)
+            sense_dic[k].sememes = self.__gen_sememe_list(sense_dic[k])
+            for s in sense_dic[k].sememes:
+                s.senses.append(sense_dic[k])
+
+        # Initialize the sense dic to retrieve by word.
+        for k in sense_dic.keys():
+            en_word = sense_dic[k].en_word.strip()
+            zh_word = sense_dic[k].zh_word.strip()
+            if en_word not in en_map:
+                en_map[en_word] = list()
+            en_map[en_word].append(sense_dic[k])
+            if zh_word not in zh_map:
+                zh_map[zh_word] = list()
+            zh_map[zh_word].append(sense_dic[k])
+
+        indptr = [0]
+        indices = []
+        for sense in sense_dic.values():
+            indices.extend(s.id for s in sense.sememes)
+            indptr.append(len(indices))
+        matrix = IncidenceMatrix(indptr, indices, len(self.sememe_list))
+
+        # Senses are numbered by their order in sense_dic.
+        for i, sense in enumerate(sense_dic.values()):
+            sense.id = i
+        self.sense_list = list(sense_dic.values())
+        self.sense_sememe_matrix = matrix
+        self.sense_dic = sense_dic
+        self.en_map = en_map
+        self.zh_map = zh_map
+
+    def __fuzzy_search(self, word, dics, accept, limit=None, offset=0):
+        """Collect the values of the keys containing the word by the substring indexes.
+
+        Args:
+            word (`str`) : the substring to search for.
+            dics (`list[tuple]`) : (index attribute, dict) pairs, whose values are items or lists of items.
+            accept (`function`) : the filter of the items.
+            limit (`int`) : the max num of the returned items.
+            offset (`int`) : the num of the leading items to skip.
+
+        Returns:
+            (`list`) the items without duplicates, in the order of the dicts and their keys.
+        """
+        res = dict()
+        end = None if limit is None else offset + limit
+        for name, dic in dics:
+            index = getattr(self, name)
+            for i in index.search(word):
+                items = dic[index.keys[i]]
+                for item in (items if isinstance(items, list) else [items]):
+                    if item not in res and accept(item):
+                        res[item] = None
+                if end is not None and len(res) >= end:
+                    return list(res)[offset:end]
+        return list(res)[offset:end]
+
     def __getitem__(self, item):
         """Shortcut for get_sense().
 
@@ -125,7 +454,7 @@ class HowNetDict(object):
     def __str__(self):
         return str(type(self))
 
-    def get_sense(self, word, language=None, pos=None, strict=True):
+    def get_sense(self, word, language=None, pos=None, strict=True, limit=None, offset=0):
         """Common sense search API, you can specify the language of the target word to boost the search performance.
         Besides if you are not sure about the word, you can set `strict` to False to fuzzy match the sense.
 
@@ -136,15 +465,26 @@ class HowNetDict(object):
                 you can set to `en` or `zh`, which means search in English or Chinese.
             pos (`str`) : limit the part of speech of the result.
             strict (`bool`) :  whether to search the sense strictly.
+            limit (`int`) : the max num of the returned senses, default: None (no limit).
+            offset (`int`) : the num of the leading senses to skip, used with `limit` to page the results.
 
         Returns:
             (`list[Sense]`) candidates HowNet senses, if the target word does not exist, return an empty list.
+            The fuzzy matched senses are ordered by the English words, the Chinese words and then the sense IDs.
         """
         res = set()
         if language:
             if language != 'en' and language != 'zh':
                 print("Language error, please set the correct language.")
                 return
+        if pos:
+            if pos not in self.get_all_sense_pos():
+                print("POS error, please set the correct POS.")
+                return
+
+        def accept(i):
+            return pos is None or (i.en_grammar if language == 'en' else i.zh_grammar) == pos
+
         if strict:
             if language == "en":
                 if (word in self.en_map):
@@ -154,35 +494,16 @@ class HowNetDict(object):
                     res |= set(self.zh_map[word])
             else:
                 res = self[word]
-        else:
-            if language == "en":
-                for k in self.en_map.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.en_map[k])
-            elif language == "zh":
-                for k in self.zh_map.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.zh_map[k])
-            else:
-                for k in self.en_map.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.en_map[k])
-                for k in self.zh_map.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.zh_map[k])
-                for k in self.sense_dic.keys():
-                    if k.find(word) != -1:
-                        res.add(self.sense_dic[k])
-        if pos:
-            if pos not in self.get_all_sense_pos():
-                print("POS error, please set the correct POS.")
-                return
-            temp = res.copy()
-            for i in temp:
-                grammar = i.en_grammar if language == 'en' else i.zh_grammar
-                if grammar != pos:
-                    res.remove(i)
-        return list(res)
+            res = [i for i in res if accept(i)]
+            return res[offset:] if limit is None else res[offset:offset + limit]
+        dics = []
+        if language != 'zh':
+            dics.append(('en_word_index', self.en_map))
+        if language != 'en':
+            dics.append(('zh_word_index', self.zh_map))
+        if language is None:
+            dics.append(('sense_no_index', self.sense_dic))
+        return self.__fuzzy_search(word, dics, accept, limit, offset)
 
     def get_sememe(self, word, language=None, strict=True):
         """The commen sememe search API. you can specify the language of the target word to boost the search performance.
@@ -192,7 +513,7 @@ class HowNetDict(object):
             word (`str`): 
                 target word.
             language (`str`): 
-                target language, default: None. (The func will search both in English and Chinese, which will consume a lot of time.)
+                target language, default: None. (The func will search both in English and Chinese.)
                 you can set to `en` or `zh`, which means search in English or Chinese
             strict (`bool`): 
                 whether to search the sense strictly.
@@ -200,38 +521,11 @@ class HowNetDict(object):
         Returns:
             (`list[Sememe]`) candidates HowNet sememes, if the target word does not exist, return an empty list.
         """
-        res = []
         if language:
             if language != 'en' and language != 'zh':
                 print("Language error, please set the correct language.")
                 return
-        if strict:
-            if language == 'en':
-                for v in self.sememe_dic.values():
-                    if v.en == word and v not in res:
-                        res.append(v)
-            elif language == 'zh':
-                for v in self.sememe_dic.values():
-                    if v.zh == word and v not in res:
-                        res.append(v)
-            else:
-                for v in self.sememe_dic.values():
-                    if (v.en == word or v.zh == word or v.en_zh == word) and v not in res:
-                        res.append(v)
-        else:
-            if language == 'en':
-                for v in self.sememe_dic.values():
-                    if v.en.find(word) != -1 and v not in res:
-                        res.append(v)
-            elif language == 'zh':
-                for v in self.sememe_dic.values():
-                    if v.zh.find(word) != -1 and v not in res:
-                        res.append(v)
-            else:
-                for v in self.sememe_dic.values():
-                    if v.en_zh.find(word) != -1 and v not in res:
-                        res.append(v)
-        return res
+        return self.sememe_index.search(word, language, strict)
 
     def get_zh_words(self):
         """Get all Chinese words annotated in HowNet
@@ -249,6 +543,129 @@ class HowNetDict(object):
         """
         return list(set(self.en_map.keys()))
 
+    def __word_matcher(self, language):
+        """Get the Aho-Corasick automaton over the words of the language (None for both), built at the first use.
+
+        Returns:
+            (`tuple`) the `WordMatcher` and the function getting the senses of a word ID.
+        """
+        self.__load('sense')
+        if language == 'en':
+            dics = [self.en_map]
+        elif language == 'zh':
+            dics = [self.zh_map]
+        else:
+            dics = [self.zh_map, self.en_map]
+        matcher = getattr(self, 'word_matcher' if language is None else language + '_word_matcher')
+
+        def senses(i):
+            if i == -1:
+                return []
+            word = matcher.words[i]
+            if len(dics) == 1:
+                return list(dics[0][word])
+            return list(dict.fromkeys(s for d in dics for s in d.get(word, [])))
+        return matcher, senses
+
+    def find_words(self, text, language='zh'):
+        """Find all the occurrences of the HowNet words in an unsegmented text in one pass, overlapping ones included.
+        The English words only match as whole words.
+
+        Args:
+            text (`str`): the text.
+            language (`str`): the language of the words, `en` or `zh`, None for both.
+
+        Returns:
+            (`list[tuple]`) (word, start, end) of the occurrences, text[start:end] == word,
+            in ascending order of the end and then of the start.
+        """
+        if language not in ['en', 'zh', None]:
+            print("Language error, please set the correct language.")
+            return
+        matcher, _ = self.__word_matcher(language)
+        return [(matcher.words[i], start, end) for start, end, i in matcher.find_all(text)]
+
+    def segment_text(self, text, mode='bidirectional', language='zh'):
+        """Segment an unsegmented text into HowNet words by maximum matching, see `WordMatcher.segment`.
+
+        Args:
+            text (`str`): the text.
+            mode (`str`): 'forward', 'backward' or 'bidirectional' maximum matching.
+            language (`str`): the language of the words, `en` or `zh`, None for both.
+
+        Returns:
+            (`list[tuple]`) (word, start, end, senses) of the spans in the order of the text,
+            the characters not in HowNet stand alone with no senses.
+        """
+        if language not in ['en', 'zh', None]:
+            print("Language error, please set the correct language.")
+            return
+        if mode not in ['forward', 'backward', 'bidirectional']:
+            print("Mode error, please choose from 'forward', 'backward' and 'bidirectional'.")
+            return
+        matcher, senses = self.__word_matcher(language)
+        return [(text[start:end], start, end, senses(i)) for start, end, i in matcher.segment(text, mode)]
+
+    def __trie(self, language, sememe):
+        """Get the trie over the words (scored by the num of senses) or the sememe names
+        (scored by the sememe frequency) of the language.
+        """
+        if sememe:
+            return getattr(self, 'sememe_{}_trie'.format(language))
+        return getattr(self, '{}_word_trie'.format(language))
+
+    @staticmethod
+    def __sememe_trie(names):
+        """Build the trie over the sememe names of a language, scored by the sememe frequency.
+        """
+        return Trie(names.keys(), [max(s.freq for s in v) for v in names.values()])
+
+    def __trie_results(self, pairs, language, sememe):
+        if not sememe:
+            return [k for k, _ in pairs]
+        res = dict()
+        for k, _ in pairs:
+            for s in getattr(self.sememe_index, language)[k]:
+                res[s] = None
+        return list(res)
+
+    def complete(self, prefix, language='zh', K=10, sememe=False):
+        """Autocomplete a prefix into the words or the sememes of HowNet.
+        The words are ranked by their num of senses and the sememes by their frequency.
+
+        Args:
+            prefix (`str`): the prefix typed so far.
+            language (`str`): en or zh, the language of the prefix.
+            K (`int`): the num of the results.
+            sememe (`bool`): whether to complete into sememe names instead of words.
+
+        Returns:
+            (`list[str]`) the completed words, or (`list[Sememe]`) the sememes if `sememe` is True.
+        """
+        if language != 'en' and language != 'zh':
+            print("Language error, please set the correct language.")
+            return
+        return self.__trie_results(self.__trie(language, sememe).complete(prefix, K), language, sememe)
+
+    def fuzzy_search(self, word, language='zh', max_distance=1, K=10, sememe=False):
+        """Search the words or the sememes of HowNet within an edit distance of a (possibly misspelled) word.
+        The results are ranked by the edit distance, and then by the num of senses or the sememe frequency.
+
+        Args:
+            word (`str`): target word.
+            language (`str`): en or zh, the language of the word.
+            max_distance (`int`): the max num of inserted, deleted or substituted characters.
+            K (`int`): the max num of the results.
+            sememe (`bool`): whether to search the sememe names instead of the words.
+
+        Returns:
+            (`list[str]`) the words, or (`list[Sememe]`) the sememes if `sememe` is True.
+        """
+        if language != 'en' and language != 'zh':
+            print("Language error, please set the correct language.")
+            return
+        return self.__trie_results(self.__trie(language, sememe).fuzzy_search(word, max_distance, K), language, sememe)
+
     def __gen_sememe_list(self, sense):
         """Get sememe list for the sense by the Def.
 
@@ -259,21 +676,9 @@ class HowNetDict(object):
         Returns:
             (`list[Sememe]`) the sememe list of the sense.
         """
-        kdml = sense.Def
-        res = list()
-        for i in range(len(kdml)):
-            if kdml[i] == '|':
-                start_idx = i
-                end_idx = i
-                while kdml[start_idx] not in ['{', '"']:
-                    start_idx = start_idx - 1
-                while kdml[end_idx] not in ['}', ':', '"']:
-                    end_idx = end_idx + 1
-                res.append(
-                    self.sememe_dic[kdml[start_idx + 1:end_idx].replace(' ', '_')])
-        return res
+        return [self.sememe_dic[i] for i in parse_kdml(sense.Def).sememes]
 
-    def get_sememes_by_word(self, word, display='list', merge=False, expanded_layer=-1, K=None):
+    def get_sememes_by_word(self, word, display='list', merge=False, expanded_layer=-1, K=None, copy=True):
         """Commen sememe search API.
         Given specific word, you can get corresponding HowNet annotations.
         The result can be display in various forms.
@@ -290,6 +695,9 @@ class HowNetDict(object):
             K (`int`):
                 Only works when display == 'visual'.The maximum number of visualized words, ordered by id (ascending).
                 Illegal number will be automatically ignored and the function will display all retrieved results.
+            copy (`bool`):
+                Only works when display == 'tree' or 'dict'. Set to False to get the cached sememe trees
+                instead of fresh copies, which is faster but the trees are read-only, see `Sense.get_sememe_tree`.
 
         Examples:
 
@@ -319,7 +727,7 @@ class HowNetDict(object):
             for item in queryResult:
                 try:
                     result.append({'sense': item, 'sememes': item.get_sememe_tree(
-                        return_node=display == 'tree')})
+                        return_node=display == 'tree', copy=copy)})
                 except Exception as e:
                     print("Generate Sememe Tree Failed for", item.No)
                     print("Exception:", e)
@@ -350,6 +758,34 @@ class HowNetDict(object):
             print("Wrong display mode: ", display)
         return list(result)
 
+    def set_sememe_tree_cache(self, maxsize=65536, preload=False):
+        """Configure the cache of the parsed sememe trees shared by all the senses.
+
+        Args:
+            maxsize (`int`):
+                the max num of the cached sememe trees, None means keeping the trees of all the senses.
+            preload (`bool`):
+                whether to parse the sememe trees of all the senses now, which implies maxsize=None.
+        """
+        if preload:
+            maxsize = None
+        sememe_tree_cache.resize(maxsize)
+        if preload:
+            for sense in self.sense_dic.values():
+                try:
+                    sense.get_sememe_list()
+                except Exception as e:
+                    print("Generate Sememe Tree Failed for", sense.No)
+                    print("Exception:", e)
+
+    def get_sememe_tree_cache_info(self):
+        """Get the statistics of the sememe tree cache.
+
+        Returns:
+            (`CacheInfo`) the hits, misses, maxsize and currsize of the cache.
+        """
+        return sememe_tree_cache.cache_info()
+
     def has(self, item, language=None):
         """Check that whether certain word(English Word/Chinese Word/ID) exist in HowNet
         Only perform exact match because HowNet is case-sensitive
@@ -424,13 +860,16 @@ class HowNetDict(object):
             (`list`) a list contains sememe triples or a list contains relations. 
             Note that x is the head sememe and y is the tail sememe in the triples.
         """
+        self.__load('relation')
         res = []
         sememe_x = self.get_sememe(x, strict=strict)
         sememe_y = self.get_sememe(y, strict=strict)
         for s_x in sememe_x:
+            relations = [set(self.triple_store.relations_between(s_x.id, s_y.id)) for s_y in sememe_y]
+            # In the order of the relations of s_x, then of the sememes of y.
             for k in s_x.related_sememes.keys():
-                for s_y in sememe_y:
-                    if s_y in s_x.related_sememes[k]:
+                for s_y, r in zip(sememe_y, relations):
+                    if k in r:
                         if return_triples:
                             res.append(
                                 (s_x, k, s_y))
@@ -458,18 +897,102 @@ class HowNetDict(object):
             if relation not in self.get_all_sememe_relations():
                 print("Relation not exist.")
                 return
-        res = set()
+        self.__load('relation')
+        res = dict()
         sememe_x = self.get_sememe(x, strict=strict)
-        if relation:
-            for s_x in sememe_x:
-                res |= set(s_x.get_related_sememes(
-                    relation=relation, return_triples=return_triples))
-        else:
-            for s_x in sememe_x:
-                res |= set(s_x.get_related_sememes(
-                    return_triples=return_triples))
+        for s_x in sememe_x:
+            _, relations, tails = self.triple_store.match(head=s_x.id, relation=relation)
+            for r, t in zip(relations.tolist(), tails.tolist()):
+                if return_triples:
+                    res[(s_x, self.triple_store.relation_names[r], self.sememe_list[t])] = None
+                else:
+                    res[self.sememe_list[t]] = None
+        return list(res)
+
+    def get_sememe_relation_edges(self, relation=None):
+        """Export the relations between sememes as edge arrays by `Sememe.id`,
+        e.g. to build a sparse adjacency matrix for graph algorithms.
+
+        Args:
+            relation (`str`): keep the edges of the relation only, default: all the edges.
+
+        Returns:
+            (`tuple`) the head, relation and tail arrays, the relations are indexes of
+            `triple_store.relation_names`. The arrays are read-only views of `triple_store`, see `TripleStore`.
+        """
+        self.__load('relation')
+        return self.triple_store.edges(relation)
+
+    def __sememes_of(self, x, strict):
+        """Get the sememes of x, which is a sememe or a word to search the sememes.
+        """
+        if isinstance(x, Sememe):
+            return [x]
+        return self.get_sememe(x, strict=strict)
+
+    def get_sememe_ancestors(self, x, strict=True):
+        """Get the hypernyms of the sememe x up to the root of the taxonomy.
+
+        Args:
+            x (`str` or `Sememe`): the sememe or the word to search the sememe.
+            strict (`bool`):
+                you can choose to search the sememe strictly by the word.
+
+        Returns:
+            (`list[Sememe]`) the hypernyms from the nearest one to the root.
+            If the word matches several sememes, the hypernyms of all of them without duplicates.
+        """
+        self.__load('relation')
+        res = dict()
+        for s in self.__sememes_of(x, strict):
+            for i in self.taxonomy_index.ancestors(s.id):
+                res[self.sememe_list[i]] = None
+        return list(res)
+
+    def get_sememe_lca(self, x, y, strict=True):
+        """Get the lowest common ancestor of two sememes in the taxonomy,
+        i.e. the most specific sememe which is x or y or a hypernym of both.
+
+        Args:
+            x (`str` or `Sememe`): the sememe or the word #0 to search the sememe.
+            y (`str` or `Sememe`): the sememe or the word #1 to search the sememe.
+            strict (`bool`):
+                you can choose to search the sememes strictly by the words.
+
+        Returns:
+            (`list[Sememe]`) the lowest common ancestors of the matched sememe pairs without duplicates,
+            the pairs in different trees of the taxonomy have none.
+        """
+        self.__load('relation')
+        res = dict()
+        for s_x in self.__sememes_of(x, strict):
+            for s_y in self.__sememes_of(y, strict):
+                i = self.taxonomy_index.lca(s_x.id, s_y.id)
+                if i != -1:
+                    res[self.sememe_list[i]] = None
         return list(res)
 
+    def calculate_sememe_similarity(self, x, y, strict=True, alpha=TAXONOMY_ALPHA):
+        """Calculate the similarity between two sememes by their distance d in the taxonomy,
+        alpha / (alpha + d), 0 for the sememes in different trees of the taxonomy.
+
+        Args:
+            x (`str` or `Sememe`): the sememe or the word #0 to search the sememe.
+            y (`str` or `Sememe`): the sememe or the word #1 to search the sememe.
+            strict (`bool`):
+                you can choose to search the sememes strictly by the words.
+            alpha (`float`): the distance at which the similarity is 0.5.
+
+        Returns:
+            (`float`) the greatest similarity among the matched sememe pairs, -1 if any of the sememes does not exist.
+        """
+        self.__load('relation')
+        res = -1
+        for s_x in self.__sememes_of(x, strict):
+            for s_y in self.__sememes_of(y, strict):
+                res = max(res, self.taxonomy_index.similarity(s_x.id, s_y.id, alpha))
+        return res
+
     def get_senses_by_sememe(self, x, strict=True):
         """Get the senses labeled by sememe x.
 
@@ -478,26 +1001,132 @@ class HowNetDict(object):
         Returns:
             (`list[Sense]`) The list of senses which contains the sememe x.
         """
-        res = set()
+        self.__load('sense')
         sememe_x = self.get_sememe(x, strict=strict)
-        for s_x in sememe_x:
-            res |= s_x.get_senses()
-        return list(res)
+        res = self.sense_bitmap_index.union([s_x.id for s_x in sememe_x])
+        return [self.sense_list[i] for i in res.ids().tolist()]
+
+    def get_senses_by_sememes(self, all_of=None, any_of=None, none_of=None, language=None, pos=None, strict=True):
+        """Boolean search of the senses by their sememes, e.g. the senses labeled by human|人 AND occupation|职位
+        but NOT female|女 are `get_senses_by_sememes(all_of=['human', 'occupation'], none_of=['female'])`.
+        A word matching several sememes stands for any of them.
+
+        Args:
+            all_of (`list[str]`): the words to search the sememes the senses must have all of.
+            any_of (`list[str]`): the words to search the sememes the senses must have at least one of.
+            none_of (`list[str]`): the words to search the sememes the senses must have none of.
+            language (`str`): keep the senses having a word in the language only, `en` or `zh`.
+            pos (`str`): keep the senses of the part of speech only, in the language (default: `zh`) as `get_sense`.
+            strict (`bool`): whether to search the sememes strictly by the words.
+
+        Returns:
+            (`list[Sense]`) the matched senses in the order of their IDs, all the senses but the excluded ones
+            if neither all_of nor any_of is given.
+        """
+        if language:
+            if language != 'en' and language != 'zh':
+                print("Language error, please set the correct language.")
+                return
+        if pos:
+            if pos not in self.get_all_sense_pos():
+                print("POS error, please set the correct POS.")
+                return
+        self.__load('sense')
+        groups = [[s.id for s in self.__sememes_of(x, strict)] for x in (all_of or [])]
+        if any_of:
+            groups.append([s.id for x in any_of for s in self.__sememes_of(x, strict)])
+        excluded = [s.id for x in (none_of or []) for s in self.__sememes_of(x, strict)]
+        res = self.sense_bitmap_index.query(any_of=groups, none_of=excluded,
+                                                 mask=self.__sense_filter(language, pos))
+        return [self.sense_list[i] for i in res.ids().tolist()]
+
+    def get_senses_by_meaning(self, x, K=10, strict=True, weighting='df'):
+        """Ranked search of the senses by meaning, i.e. by the weighted overlap of their sememes with a bag of sememes.
+        The weight of a sememe is its IDF among the senses times its count in the bag, see `RetrievalIndex`.
+
+        Args:
+            x (`str` or `list`): a word, whose senses give the bag of their sememes,
+                or the bag of sememes as `Sememe` objects or words to search the sememes.
+            K (`int`): the num of the results, None for all the senses sharing a sememe with the bag.
+            strict (`bool`): whether to search the sememes strictly by the words in the bag.
+            weighting (`str`): the document frequency of the IDF, 'df' for the num of the senses
+                labeled by the sememe, or 'freq' for `Sememe.freq`.
+
+        Returns:
+            (`list[tuple]`) (Sense, score) pairs in descending order of the score, ties in the order of the sense IDs.
+        """
+        if weighting not in ['df', 'freq']:
+            print("Weighting error, please choose from 'df' and 'freq'.")
+            return
+        self.__load('sense')
+        matrix = self.sense_sememe_matrix
+        if isinstance(x, str):
+            cols = [int(j) for sense in self[x] for j in matrix.row(sense.id)]
+        else:
+            cols = [s.id for item in x for s in self.__sememes_of(item, strict)]
+        index = self.sense_retrieval_index if weighting == 'df' else self.sense_retrieval_freq_index
+        ids, scores = index.search(cols, K)
+        return [(self.sense_list[i], score) for i, score in zip(ids.tolist(), scores.tolist())]
+
+    def __sense_filter(self, language, pos):
+        """Get the bitmap of the senses having a word in the language and of the part of speech,
+        None if neither is given. The bitmaps are built at the first use.
+        """
+        if language is None and pos is None:
+            return None
+        res = self.sense_filter.get((language, pos))
+        return res if res is not None else Bitmap(len(self.sense_list), array=np.zeros(0, dtype=np.int32))
+
+    def __build_sense_filter(self):
+        """Build the bitmaps of `__sense_filter`, keyed by (language, pos).
+        """
+        filters = dict()
+        for lang in ['en', 'zh']:
+            words = np.array([bool((s.en_word if lang == 'en' else s.zh_word).strip()) for s in self.sense_list], dtype=bool)
+            grammars = np.array([s.en_grammar if lang == 'en' else s.zh_grammar for s in self.sense_list], dtype=object)
+            filters[(lang, None)] = Bitmap.from_mask(words)
+            for p in set(grammars.tolist()):
+                is_pos = grammars == p
+                filters[(lang, p)] = Bitmap.from_mask(words & is_pos)
+                if lang == 'zh':
+                    # The part of speech is checked in Chinese by default, as `get_sense`.
+                    filters[(None, p)] = Bitmap.from_mask(is_pos)
+        return filters
 
     # Similarity calculation
-    def initialize_similarity_calculation(self):
+    def initialize_similarity_calculation(self, sememe_similarity='table'):
         """Initialize the similarity calculation via sememes.
         Implementation is contributed by Jun Yan, which is based on the paper :
         "Jiangming Liu, Jinan Xu, Yujie Zhang. An Approach of Hybrid Hierarchical Structure for Word Similarity Computing by HowNet. In Proceedings of IJCNLP"
+
+        Args:
+            sememe_similarity (`str`): where the similarity between sememes comes from, 'table' for the
+                sememe_sim_table resource, or 'taxonomy' to calculate it from the sememe taxonomy on the fly,
+                see `calculate_sememe_similarity`, which does not need the sememe_sim_table resource.
         """
-        sememe_sim_table_pickle_path, sense_tree_path, sense_syn_path = [os.path.join("resources", i) for i in [
-            'sememe_sim_table', 'sense_tree', 'synonym']]
+        sense_syn_path = os.path.join("resources", 'synonym')
+        if sememe_similarity not in ['table', 'taxonomy']:
+            print("Invalid sememe similarity, please choose from 'table' and 'taxonomy'.")
+            return
 
         try:
-            self.sememe_sim_table = pickle.load(
-                get_resource(sememe_sim_table_pickle_path, "rb"))
-            self.sense_tree_dic = pickle.load(
-                get_resource(sense_tree_path, 'rb'))
+            if sememe_similarity == 'taxonomy':
+                self.__load('relation')
+                self.sememe_sim_table = SememeSimilarity(
+                    list(self.sememe_dic.keys()), self.taxonomy_index.similarity_matrix(),
+                    resource_fingerprint(get_resource_paths(['sememe_all', 'sememe_triples_taxonomy.txt']),
+                                         'taxonomy', str(TAXONOMY_ALPHA)))
+                snapshot_name = "similarity_taxonomy.snap"
+            else:
+                # The sememe similarity is read from a memory-mapped matrix, see `SememeSimilarity`.
+                self.sememe_sim_table = open_sememe_similarity(list(self.sememe_dic.keys()))
+                snapshot_name = "similarity.snap"
+            # The sense trees are read from flat arrays converted from the sense_tree resource, see `FlatSenseTrees`.
+            self.sense_trees = open_sense_trees(self.sememe_sim_table, list(self.sense_dic),
+                                                resource_fingerprint(get_resource_paths(CORE_RESOURCES)),
+                                                snapshot_name)
+            self.__sememe_similarity = sememe_similarity
+            self.__attach_persistent_cache()
             self.sense_syn_dic = pickle.load(
                 get_resource(sense_syn_path, 'rb'))
         except FileNotFoundError as e:
@@ -505,42 +1134,112 @@ class HowNetDict(object):
                 "Enabling Word Similarity Calculation requires specific data files, please check the completeness of your download package.")
             print(e)
             return
+        try:
+            self.__nearest_index = NearestIndex(*self.__nearest_index_path())
+        except (SnapshotError, FileNotFoundError):
+            self.__nearest_index = None
+        self.__reloaded('similarity')
         print("Initializing similarity calculation succeeded!")
         return
 
-    def __sense_similarity(self, node1, node2, sememe_sim_table):
-        """Calculate the similarity between two senses.
+    def __load_sense_tree_dic(self):
+        """Load the sense trees as anytree nodes from the sense_tree resource, only kept for compatibility
+        as the similarity calculation runs over `sense_trees`.
         """
-        delta = 0.1
-        beta_relation = 0.3
-        beta_sememe = 0.7
+        with get_resource(os.path.join("resources", "sense_tree"), 'rb') as f:
+            self.sense_tree_dic = pickle.load(f)
 
-        relation_sim = 0
-        if node1.is_leaf and node2.is_leaf:
-            beta_relation = 0
-            beta_sememe = 1
-        else:
-            role_match = 0
-            N = len(node1.children) + len(node2.children)
-            flag1 = [1] * len(node1.children)
-            flag2 = [1] * len(node2.children)
-            for i in range(len(node1.children)):
-                for j in range(len(node2.children)):
-                    if node1.children[i].role == node2.children[j].role and flag1[i] == 1 and flag2[j] == 1:
-                        flag1[i] = 0
-                        flag2[j] = 0
-                        role_match = role_match + 1
-                        relation_sim = relation_sim + \
-                            self.__sense_similarity(
-                                node1.children[i], node2.children[j], sememe_sim_table)
-            relation_sim = relation_sim + (sum(flag1) + sum(flag2)) * delta
-            relation_sim = relation_sim / (N - role_match)
-
-        if (node1.name, node2.name) in sememe_sim_table:
-            sememe_sim = sememe_sim_table[(node1.name, node2.name)]
-        else:
-            sememe_sim = sememe_sim_table[(node2.name, node1.name)]
-        return beta_relation * relation_sim + beta_sememe * sememe_sim
+    def set_similarity_cache(self, path=None, maxsize=10000000, enable=True):
+        """Configure the persistent cache of the similarity between sense trees, see `SQLiteCache`.
+        Once set, `calculate_word_similarity` and `get_nearest_words` read the similarity calculated
+        by former runs and other processes, and save the newly calculated one.
+        The cached values of other versions of the resources are never used.
+
+        Args:
+            path (`str`): the path of the SQLite file, default: `~/.openhownet/snapshot/similarity_cache.db`.
+            maxsize (`int`): the max num of the cached values, the least recently used ones are evicted.
+            enable (`bool`): whether to use the cache, False closes the cache.
+        """
+        if self.__persistent_cache is not None:
+            self.__persistent_cache.close()
+            self.__persistent_cache = None
+        self.__persistent_cache_config = None
+        if enable:
+            if path is None:
+                path = get_snapshot_path("similarity_cache.db")
+            self.__persistent_cache_config = (path, maxsize)
+        if 'sense_trees' in self.__dict__ and self.sense_trees is not None:
+            self.__attach_persistent_cache()
+
+    def __attach_persistent_cache(self):
+        """Open the persistent cache configured by `set_similarity_cache` for the current sense trees,
+        the version of the cached values depends on the sememe similarity the trees are compiled with.
+        """
+        if self.__persistent_cache is not None:
+            self.__persistent_cache.close()
+            self.__persistent_cache = None
+        if self.__persistent_cache_config is not None:
+            path, maxsize = self.__persistent_cache_config
+            try:
+                self.__persistent_cache = SQLiteCache(path, self.__similarity_fingerprint(), maxsize=maxsize)
+            except sqlite3.Error as e:
+                print("Opening the similarity cache failed:", e)
+        self.sense_trees.persistent_cache = self.__persistent_cache
+
+    def get_similarity_cache_info(self):
+        """Get the statistics of the persistent similarity cache.
+
+        Returns:
+            (`CacheInfo`) the hits, misses, maxsize and currsize of the cache, None if the cache is not set.
+        """
+        if self.__persistent_cache is None:
+            return None
+        return self.__persistent_cache.cache_info()
+
+    def __similarity_fingerprint(self):
+        """Get the fingerprint of the resources the similarity calculation is built from.
+        """
+        return resource_fingerprint(get_resource_paths(CORE_RESOURCES + SIMILARITY_RESOURCES),
+                                    self.sememe_sim_table.fingerprint)
+
+    def __nearest_index_path(self):
+        """Get the path and the expected fingerprint of the nearest sense index.
+        """
+        name = "nearest.snap" if self.__sememe_similarity == 'table' else "nearest_{}.snap".format(self.__sememe_similarity)
+        return get_snapshot_path(name), self.__similarity_fingerprint()
+
+    def build_nearest_index(self, K=100, processes=None, chunk_size=256):
+        """Precompute the K nearest senses of every sense into `~/.openhownet/snapshot/nearest.snap`,
+        which `get_nearest_words` answers from afterwards. The index is loaded automatically by
+        `initialize_similarity_calculation` once built, and ignored when the resources change.
+
+        The build runs in parallel and can be interrupted, the next call resumes from the finished chunks.
+
+        Args:
+            K (`int`): the num of the nearest senses to keep for each sense.
+                Queries needing more candidates than kept fall back to the full search.
+            processes (`int`): the num of the processes, default: the num of the CPUs.
+            chunk_size (`int`): the num of the senses computed and saved at a time.
+        """
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
+            print("Please initialize the similarity calculation firstly!")
+            return
+        path, fingerprint = self.__nearest_index_path()
+        try:
+            index = NearestIndex(path, fingerprint)
+            if index.K == K:
+                self.__nearest_index = index
+                return
+        except SnapshotError:
+            pass
+        trees = self.sense_trees
+        try:
+            build_nearest_index(path, fingerprint, trees.sections, trees.matrix, self.nearest_candidates, len(self.sense_list),
+                                K=K, processes=processes, chunk_size=chunk_size)
+        except OSError as e:
+            print("Writing the nearest sense index failed:", e)
+            return
+        self.__nearest_index = NearestIndex(path, fingerprint)
 
     def calculate_word_similarity(self, word0, word1, strict=True):
         """Calculate the word similarity between two words via sememes
@@ -555,23 +1254,112 @@ class HowNetDict(object):
             If the initialization method of word similarity calculation has not been called yet, it will also return 0.0 and print corresponding error message.
         """
         res = -1
-        if not hasattr(self, "sense_tree_dic") or not hasattr(self, "sememe_sim_table"):
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
             print("Please initialize the similarity calculation firstly!")
             return res
-        if self.sense_tree_dic is None or self.sememe_sim_table is None:
+        if self.sense_trees is None or self.sememe_sim_table is None:
             print("Please initialize the similarity calculation firstly!")
             return res
 
+        trees = self.sense_trees
         senses1 = self.get_sense(word0, strict=strict)
         senses2 = self.get_sense(word1, strict=strict)
         for id1 in senses1:
             for id2 in senses2:
-                sim = self.__sense_similarity(
-                    self.sense_tree_dic[id1.No], self.sense_tree_dic[id2.No],  self.sememe_sim_table)
-                if sim > res:
+                sim = trees.sense_similarity(id1.id, id2.id)
+                if sim is not None and sim > res:
                     res = sim
         return res
 
+    def calculate_word_similarity_batch(self, pairs, strict=True, processes=1, chunk_size=10000):
+        """Calculate the word similarity of many word pairs via sememes, see `calculate_word_similarity`.
+        Each distinct word is searched once and each distinct pair of sense tree classes is calculated once.
+
+        Args:
+            pairs (`iterable[tuple]`): the (word0, word1) pairs.
+            strict (`bool`):
+                you can choose to search the sense strictly or not.
+            processes (`int`):
+                the num of the processes to calculate the similarity, 1 calculates in this process, None uses all the CPUs.
+            chunk_size (`int`):
+                the num of the sense pairs sent to a process at a time.
+
+        Returns:
+            (`numpy.ndarray`) the word similarity of each pair, -1 for the pairs with a word not in HowNet.
+        """
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
+            print("Please initialize the similarity calculation firstly!")
+            return
+        if self.sense_trees is None or self.sememe_sim_table is None:
+            print("Please initialize the similarity calculation firstly!")
+            return
+        trees = self.sense_trees
+        classes = dict()  # word -> the tree classes of its senses
+        unique = dict()  # (class, class) -> position in the calculated pairs
+        pair_index = []
+        unique_index = []
+        n = 0
+        for n, (word0, word1) in enumerate(pairs, 1):
+            for w in (word0, word1):
+                if w not in classes:
+                    classes[w] = set(int(trees.sense_class[s.id]) for s in self.get_sense(w, strict=strict)) - {-1}
+            for c0 in classes[word0]:
+                for c1 in classes[word1]:
+                    pair_index.append(n - 1)
+                    unique_index.append(unique.setdefault((c0, c1), len(unique)))
+        roots = trees.class_root.tolist()
+        sims = batch_similarity(trees, [(roots[c0], roots[c1]) for c0, c1 in unique], processes, chunk_size)
+        res = np.full(n, -1, dtype=np.float64)
+        if pair_index:
+            np.maximum.at(res, np.array(pair_index), sims[np.array(unique_index)])
+        return res
+
+    def build_word_similarity_matrix(self, words, path, strict=True, dtype='float32', tile_size=1024, processes=None):
+        """Calculate the word similarity between every pair of the words into a memory-mapped .npy file,
+        see `calculate_word_similarity`. The matrix is calculated in tiles by a pool of processes,
+        the similarity of each pair of sense tree classes in a tile is calculated once.
+
+        The build can be interrupted, the next call with the same words and parameters resumes
+        from the finished tiles, and returns the finished matrix directly.
+
+        Args:
+            words (`list[str]`): the vocabulary, in the order of the rows and the columns.
+            path (`str`): the path of the .npy file, `path + '.snap'` keeps the words.
+            strict (`bool`):
+                you can choose to search the sense strictly or not.
+            dtype (`str`): the data type of the matrix, float16 or float32.
+            tile_size (`int`): the num of the rows and the columns calculated at a time.
+            processes (`int`): the num of the processes, default: the num of the CPUs. 1 builds in this process.
+
+        Returns:
+            (`numpy.memmap`) the read-only matrix, -1 for the pairs with a word not in HowNet.
+        """
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
+            print("Please initialize the similarity calculation firstly!")
+            return
+        if self.sense_trees is None or self.sememe_sim_table is None:
+            print("Please initialize the similarity calculation firstly!")
+            return
+        if np.dtype(dtype) not in (np.float16, np.float32):
+            print("Data type error, please choose float16 or float32.")
+            return
+        trees = self.sense_trees
+        words = list(words)
+        word_indptr = [0]
+        word_classes = []
+        for w in words:
+            word_classes.extend(sorted(set(
+                int(trees.sense_class[s.id]) for s in self.get_sense(w, strict=strict)) - {-1}))
+            word_indptr.append(len(word_classes))
+        fingerprint = resource_fingerprint([], self.__similarity_fingerprint(), '\0'.join(words),
+                                           str(strict), np.dtype(dtype).name, str(tile_size))
+        try:
+            return build_similarity_matrix(path, fingerprint, words, trees.sections, trees.matrix,
+                                           word_indptr, word_classes, dtype=dtype, tile_size=tile_size,
+                                           processes=processes)
+        except OSError as e:
+            print("Writing the word similarity matrix failed:", e)
+
     def get_sense_synonyms(self, sense):
         """Get the senses that have the same sememe annotation with the sense
 
@@ -581,10 +1369,10 @@ class HowNetDict(object):
         Returns:
             (`list[Sense]`) the list of senses that have the same sememe annotation with the sense.
         """
-        if not hasattr(self, "sense_tree_dic") or not hasattr(self, "sememe_sim_table"):
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
             print("Please initialize the similarity calculation firstly!")
             return
-        if self.sense_tree_dic is None or self.sememe_sim_table is None:
+        if self.sense_trees is None or self.sememe_sim_table is None:
             print("Please initialize the similarity calculation firstly!")
             return
         ss = sense.get_sememe_list()
@@ -634,7 +1422,8 @@ class HowNetDict(object):
                         continue
         return res
 
-    def get_nearest_words(self, word, language=None, score=False, pos=None, merge=False, K=10, strict=True):
+    def get_nearest_words(self, word, language=None, score=False, pos=None, merge=False, K=10, strict=True,
+                          approximate=False, candidate_num=1000):
         """
         Get the topK nearest words of the given word, the word similarity is calculated based on HowNet annotation.
         If the given word does not exist in HowNet annotations, this function will return an empty list.
@@ -653,15 +1442,20 @@ class HowNetDict(object):
                 specify the number of the nearest words you want to retrieve.
             strict (`bool`):
                 you can choose to search the word strictly or not.
+            approximate (`bool`):
+                whether to only score the senses sharing many sememes with the sense of the word,
+                found by a MinHash index, which is much faster but may miss some of the nearest words.
+            candidate_num (`int`):
+                the num of the senses to score in the approximate mode, more for a higher recall.
         Returns: 
             (`list`) a list of the nearest K words.
             if merge==False, returns a list of senses retrieved by the word and their synonym seperately.
             If the given word does not exist in HowNet annotations, this function will return an empty list.
         """
-        if not hasattr(self, "sense_tree_dic") or not hasattr(self, "sememe_sim_table"):
+        if not hasattr(self, "sense_trees") or not hasattr(self, "sememe_sim_table"):
             print("Please initialize the similarity calculation firstly!")
             return
-        if self.sense_tree_dic is None or self.sememe_sim_table is None:
+        if self.sense_trees is None or self.sememe_sim_table is None:
             print("Please initialize the similarity calculation firstly!")
             return
         if language == None:
@@ -676,34 +1470,98 @@ class HowNetDict(object):
         senses = self.get_sense(word, pos=pos, strict=strict)
         res_temp = list()
         for i in senses:
-            tree1 = self.sense_tree_dic[i.No]
-            scores = {}
-            for j in self.sense_dic.keys():
-                if j != i.No and int(j) >= 3378:
-                    tree2 = self.sense_tree_dic[j]
-                    sim = self.__sense_similarity(
-                        tree1, tree2, self.sememe_sim_table)
-                    scores[self.sense_dic[j]] = sim
-            result = sorted(scores.items(), key=lambda x: x[1], reverse=True)
             res_item = dict()
             res_item['sense'] = i
-            res_item['synonym'] = result
+            res_item['synonym'], res_item['cut'] = self.__nearest_senses(
+                i, K=NEAREST_SENSE_FACTOR * K, approximate=candidate_num if approximate else None)
             res_temp.append(res_item)
+        # The cut lists are only used as far as they agree with the full search.
         if merge:
-            res = list()
-            for i in res_temp:
-                res.extend(i['synonym'])
-            res = sorted(res, key=lambda x: x[1], reverse=True)
-            res = self.__get_words_list_by_rule(
-                res, language=language, score=score, grammar=pos, K=K)
-            return res
+            while True:
+                res = list()
+                for i in res_temp:
+                    res.extend(i['synonym'])
+                res = sorted(res, key=lambda x: x[1], reverse=True)
+                cut = [i for i in res_temp if i['cut']]
+                if cut:
+                    bound = max(i['synonym'][-1][1] if i['synonym'] else float('inf') for i in cut)
+                    res = [i for i in res if i[1] > bound]
+                res = self.__get_words_list_by_rule(
+                    res, language=language, score=score, grammar=pos, K=K)
+                if len(res) == K or not cut:
+                    return res
+                for i in cut:
+                    i['synonym'], i['cut'] = self.__nearest_senses(i['sense'], full=True)
         else:
             res = dict()
             for i in res_temp:
                 res[i['sense']] = self.__get_words_list_by_rule(
                     i['synonym'], language=language, score=score, grammar=pos, K=K)
+                if len(res[i['sense']]) < K and i['cut']:
+                    res[i['sense']] = self.__get_words_list_by_rule(
+                        self.__nearest_senses(i['sense'], full=True)[0], language=language, score=score, grammar=pos, K=K)
             return res
 
+    def __nearest_senses(self, sense, full=False, K=None, approximate=None):
+        """Get the senses most similar to a sense, from the nearest sense index if it is built.
+
+        Args:
+            sense (`Sense`): the target sense.
+            full (`bool`): whether to score all the senses instead of reading the index.
+            K (`int`): the num of the senses to search for when the index is not built, None for all.
+                Only the senses which may reach the top K are scored, see `FlatSenseTrees.nearest`.
+            approximate (`int`): the num of the senses to score among those found by the MinHash index,
+                None for the exact search.
+
+        Returns:
+            (`tuple`) the (sense, similarity) pairs in descending order of the similarity,
+            and whether the list is cut, i.e. there are more senses than the returned ones.
+        """
+        if approximate is not None:
+            index, indptr, tokens = self.sense_minhash_index
+            candidates = self.nearest_candidates
+            found = index.query(tokens[indptr[sense.id]:indptr[sense.id + 1]], K=approximate)
+            ids, scores, total = nearest_senses(self.sense_trees, candidates[found], sense.id, None)
+            ids, scores, cut = ids.tolist(), scores.tolist(), False
+        elif self.__nearest_index is not None and not full:
+            ids, scores, cut = self.__nearest_index.neighbors(sense.id)
+        else:
+            ids, scores, total = nearest_senses(self.sense_trees, self.nearest_candidates, sense.id,
+                                                None if full else K)
+            ids, scores, cut = ids.tolist(), scores.tolist(), len(ids) < total
+        return [(self.sense_list[j], s) for j, s in zip(ids, scores)], cut
+
+    def __build_minhash_index(self):
+        """Build the MinHash index of the senses which may be returned by `get_nearest_words`.
+        Each sense is indexed by the set of its sememes and its root sememe, which takes a token of its own,
+        as it weighs the most in the similarity.
+
+        Returns:
+            (`tuple`) the `MinHashIndex` of the candidates in the order of `nearest_candidates`,
+            and the tokens of the i-th sense, which are tokens[indptr[i]:indptr[i + 1]].
+        """
+        candidates = self.nearest_candidates
+        trees = self.sense_trees
+        matrix = self.sense_sememe_matrix
+        n, sememe_num = matrix.shape
+        roots = np.minimum(trees.indptr[:-1], max(len(trees.name) - 1, 0))
+        root_names = np.where(trees.indptr[:-1] < trees.indptr[1:], trees.name[roots], -1)
+        has_root = (root_names >= 0) & (root_names < sememe_num)
+        root_rows = np.flatnonzero(has_root)
+        rows = np.concatenate([np.repeat(np.arange(n), np.diff(matrix.indptr))] + [root_rows] * MINHASH_ROOT_WEIGHT)
+        tokens = np.concatenate([matrix.indices] + [
+            (k + 1) * sememe_num + root_names[has_root] for k in range(MINHASH_ROOT_WEIGHT)])
+        tokens = tokens[np.argsort(rows, kind='stable')]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+
+        lengths = indptr[candidates + 1] - indptr[candidates]
+        sub_indptr = np.zeros(len(candidates) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=sub_indptr[1:])
+        positions = np.repeat(indptr[candidates] - sub_indptr[:-1], lengths) + np.arange(sub_indptr[-1])
+        index = MinHashIndex(sub_indptr, tokens[positions], (MINHASH_ROOT_WEIGHT + 1) * sememe_num)
+        return index, indptr, tokens
+
     # BabelNet synset dict
     def initialize_babelnet_dict(self):
         """Initialize the BabelNet Synset dict.
@@ -739,10 +1597,11 @@ class HowNetDict(object):
                 "Enabling BabelNet Synset Dict requires specific data files, please check the completeness of your download package.")
             print(e)
             return
+        self.__reloaded('babel')
         print("Initializing BabelNet Synset Dict succeeded!")
         return
 
-    def get_synset(self, word, language=None, pos=None, strict=True):
+    def get_synset(self, word, language=None, pos=None, strict=True, limit=None, offset=0):
         """Get the synset by the word.
         You can choose to set the limit of the language of the word.
 
@@ -751,9 +1610,12 @@ class HowNetDict(object):
             language(`str`): the language of the retrieved word.
             strict(`bool`): whether to search for the synset by word strictly.
             pos(`str`): limitation on the result. Can be set to a/v/n/r.
+            limit(`int`): the max num of the returned synsets, default: None (no limit).
+            offset(`int`): the num of the leading synsets to skip, used with `limit` to page the results.
 
         Returns:
             (`list[BabelNetSynset]`) the list of retrieved synsets.
+            The fuzzy matched synsets are ordered by the BabelNet IDs, the English words and then the Chinese words.
         """
         if not hasattr(self, "synset_dic"):
             print("Please initialize BabelNet synest dict firstly!")
@@ -781,31 +1643,16 @@ class HowNetDict(object):
                     res |= set(self.en_synset_dic[word])
                 if (word in self.zh_synset_dic.keys()):
                     res |= set(self.zh_synset_dic[word])
-        else:
-            if language == 'en':
-                for k in self.en_synset_dic.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.en_synset_dic[k])
-            elif language == 'zh':
-                for k in self.zh_synset_dic.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.zh_synset_dic[k])
-            else:
-                for k in self.synset_dic.keys():
-                    if k.find(word) != -1:
-                        res |= set([self.synset_dic[k]])
-                for k in self.en_synset_dic.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.en_synset_dic[k])
-                for k in self.zh_synset_dic.keys():
-                    if k.find(word) != -1:
-                        res |= set(self.zh_synset_dic[k])
-        if pos:
-            temp = res.copy()
-            for i in temp:
-                if i.pos != pos:
-                    res.remove(i)
-        return list(res)
+            res = [i for i in res if pos is None or i.pos == pos]
+            return res[offset:] if limit is None else res[offset:offset + limit]
+        dics = []
+        if language is None:
+            dics.append(('synset_bn_index', self.synset_dic))
+        if language != 'zh':
+            dics.append(('synset_en_word_index', self.en_synset_dic))
+        if language != 'en':
+            dics.append(('synset_zh_word_index', self.zh_synset_dic))
+        return self.__fuzzy_search(word, dics, lambda i: pos is None or i.pos == pos, limit, offset)
 
     def get_all_babel_synsets(self):
         """Get the complete BabelNet synsets.
@@ -0,0 +1,94 @@
+"""
+IncidenceMatrix Class
+=======================
+"""
+import numpy as np
+
+
+class IncidenceMatrix(object):
+    """The binary incidence matrix between senses (rows) and sememes (columns),
+    stored in both CSR and CSC forms, so that the sememes of a sense and the
+    senses of a sememe are both slices of an array.
+
+    Attributes:
+        shape (`tuple`): (the num of senses, the num of sememes).
+        indptr (`numpy.ndarray`): CSR row pointers, the sememes of sense i are indices[indptr[i]:indptr[i + 1]].
+        indices (`numpy.ndarray`): CSR column indices, sorted within each row.
+        col_indptr (`numpy.ndarray`): CSC column pointers, the senses of sememe j are col_indices[col_indptr[j]:col_indptr[j + 1]].
+        col_indices (`numpy.ndarray`): CSC row indices, sorted within each column.
+
+    Example::
+
+        >>> matrix = hownet_dict.sense_sememe_matrix
+        >>> matrix.row(sense.id)    # the sememe IDs of the sense
+        >>> matrix.col(sememe.id)   # the sense IDs of the sememe
+    """
+
+    def __init__(self, indptr, indices, n_cols):
+        """Initialize the matrix from (possibly duplicated and unsorted) rows in CSR form.
+
+        Args:
+            indptr (`array_like`): row pointers.
+            indices (`array_like`): the column indices of the rows.
+            n_cols (`int`): the num of columns.
+        """
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int32)
+        n_rows = len(indptr) - 1
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), np.diff(indptr))
+
+        # Sort the entries by (row, col) and drop the duplicates.
+        order = np.lexsort((indices, rows))
+        rows, cols = rows[order], indices[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[keep], cols[keep]
+
+        self.shape = (n_rows, n_cols)
+        self.indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=self.indptr[1:])
+        self.indices = cols
+
+        order = np.lexsort((rows, cols))
+        self.col_indptr = np.zeros(n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=n_cols), out=self.col_indptr[1:])
+        self.col_indices = rows[order]
+
+    @property
+    def nnz(self):
+        """The num of the nonzero entries.
+        """
+        return len(self.indices)
+
+    def row(self, i):
+        """Get the column indices of row i, i.e. the sememe IDs of sense i.
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def col(self, j):
+        """Get the row indices of column j, i.e. the sense IDs of sememe j.
+        """
+        return self.col_indices[self.col_indptr[j]:self.col_indptr[j + 1]]
+
+    def row_lengths(self):
+        """Get the num of sememes of every sense.
+        """
+        return np.diff(self.indptr)
+
+    def col_lengths(self):
+        """Get the num of senses of every sememe.
+        """
+        return np.diff(self.col_indptr)
+
+    def to_scipy(self, format='csr'):
+        """Convert the matrix to a scipy sparse matrix. Requires scipy.
+
+        Args:
+            format (`str`): csr or csc.
+        """
+        from scipy import sparse
+        if format == 'csc':
+            return sparse.csc_matrix((np.ones(self.nnz, dtype=np.int8), self.col_indices, self.col_indptr),
+                                     shape=self.shape)
+        return sparse.csr_matrix((np.ones(self.nnz, dtype=np.int8), self.indices, self.indptr),
+                                 shape=self.shape)
@@ -0,0 +1,264 @@
+"""
+KDML Parser
+=============
+"""
+from bisect import bisect_left
+
+# Markers which take the place of a sememe in the Def.
+# '~' points to the sense itself, '$' and '?' stand for unknown or questioned sememes.
+KDML_MARKERS = ('~', '?', '$')
+
+
+class KDMLError(ValueError):
+    """Raised when a Def is malformed.
+
+    Attributes:
+        Def (str): the malformed Def.
+        position (int): the position in the Def where the error is found.
+    """
+
+    def __init__(self, message, Def, position):
+        super(KDMLError, self).__init__(
+            "{} at position {} of Def \"{}\"".format(message, position, Def))
+        self.Def = Def
+        self.position = position
+
+
+class KDMLNode(object):
+    """A node of the sememe tree parsed from a Def.
+
+    Attributes:
+        name (str): the sememe (in the form of en_zh) or the marker ('$' or '?').
+        role (str): the role of the node to its parent, 'None' if there is no role.
+        parent (int): the index of the parent node, -1 for the root.
+        position (int): the start position of the node in the Def.
+    """
+    __slots__ = ('name', 'role', 'parent', 'position')
+
+    def __init__(self, name, role, parent, position):
+        self.name = name
+        self.role = role
+        self.parent = parent
+        self.position = position
+
+    def __repr__(self):
+        return "KDMLNode({!r}, role={!r}, parent={})".format(self.name, self.role, self.parent)
+
+
+class KDMLParse(object):
+    """The result of parsing a Def.
+
+    The sememe list is collected while scanning, the sememe trees are resolved
+    on first access, so that a malformed segment only fails the tree using it.
+
+    Attributes:
+        Def (`str`): the parsed Def.
+        sememes (`list[str]`): the sememes (in the form of en_zh) in the whole Def, in order of appearance.
+    """
+
+    def __init__(self, Def, sememes, segments):
+        self.Def = Def
+        self.sememes = sememes
+        self.__segments = segments
+        self.__trees = [None] * len(segments)
+
+    def __len__(self):
+        """Get the num of the ';' separated segments before 'RMK='.
+        """
+        return len(self.__segments)
+
+    def tree(self, i=0):
+        """Get the sememe tree of the i-th ';' separated segment.
+
+        Returns:
+            (`list[KDMLNode]`) the nodes in order of appearance, the first one is the root and
+            every parent comes before its children.
+
+        Raises:
+            KDMLError: the segment is malformed or has no sememe.
+        """
+        if self.__trees[i] is None:
+            nodes = self.__segments[i].build(self.Def)
+            if not nodes:
+                raise KDMLError("No sememe in the segment", self.Def, self.__segments[i].offset)
+            self.__trees[i] = nodes
+        return self.__trees[i]
+
+    @property
+    def nodes(self):
+        """The nodes of the sememe tree of the first segment, which is the tree of the sense.
+        """
+        return self.tree(0)
+
+
+class _Segment(object):
+    """The scanning state of a ';' separated segment.
+    All the positions are relative to the segment.
+    """
+
+    def __init__(self, offset):
+        self.offset = offset
+        self.chars = []
+        self.depth = []  # '{' minus '}' up to and including each position
+        self.quote = []  # the parity of '"' up to and including each position
+        self.delim = []  # the last ',' or ':' up to each position
+        self.eq = []  # the first '=' after the last ',' or ':' up to each position
+        self.eqs = []  # all the '=' positions
+        self.colons = {}  # (depth, quote parity) -> colon positions
+        self.entities = []  # [start, end, name] of sememes and markers
+        self.pending = []  # sememes waiting for the end of their names
+        self.open = -1  # the last '{' or '"'
+
+    def feed(self, c, Def):
+        k = len(self.chars)
+        self.chars.append(c)
+        depth = self.depth[-1] if k else 0
+        quote = self.quote[-1] if k else 0
+        delim = self.delim[-1] if k else -1
+        eq = self.eq[-1] if k else -1
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif c == '"':
+            quote ^= 1
+        elif c == ',' or c == ':':
+            delim = k
+            eq = -1
+        elif c == '=':
+            self.eqs.append(k)
+            if eq == -1:
+                eq = k
+        self.depth.append(depth)
+        self.quote.append(quote)
+        self.delim.append(delim)
+        self.eq.append(eq)
+
+        if c in KDML_MARKERS:
+            self.entities.append([k, k + 1, c])
+        elif c == '|':
+            if self.open == -1:
+                raise KDMLError("Sememe without an opening '{' or '\"'",
+                                Def, self.offset + k)
+            self.pending.append(len(self.entities))
+            self.entities.append([self.open + 1, -1, None])
+        if c in '}:"':
+            for i in self.pending:
+                self.entities[i][1] = k
+                self.entities[i][2] = ''.join(
+                    self.chars[self.entities[i][0]:k]).replace(' ', '_')
+            self.pending = []
+            if c == ':':
+                self.colons.setdefault((depth, quote), []).append(k)
+        if c == '{' or c == '"':
+            self.open = k
+
+    def last_colon(self, key, start):
+        """Get the last colon of the key before the start position.
+        """
+        positions = self.colons.get(key)
+        if not positions:
+            return -1
+        i = bisect_left(positions, start)
+        return positions[i - 1] if i > 0 else -1
+
+    def build(self, Def):
+        """Resolve the parents and the roles of the entities into the sememe tree.
+        """
+        if self.pending:
+            raise KDMLError("Unterminated sememe", Def,
+                            self.offset + self.entities[self.pending[0]][0])
+        if not self.entities:
+            return []
+        ends = {}
+        parents = []
+        roles = []
+        for i, (start, end, name) in enumerate(self.entities):
+            # The node is attached to the sememe right before the nearest ':' which
+            # is one '{' outside the node, or at the same level but outside the quotes.
+            depth, quote = self.depth[start], self.quote[start]
+            colon = max(self.last_colon((depth - 1, quote), start),
+                        self.last_colon((depth, quote ^ 1), start))
+            parent = -1
+            for j in reversed(ends.get(colon, [])):
+                if j < i:
+                    parent = j
+                    break
+            parents.append(parent)
+            ends.setdefault(end, []).append(i)
+
+            # The role is the text between the last ',' or ':' and the first '=' after it.
+            role = 'None'
+            if i != 0 and start > 0:
+                right_range = self.entities[parent if parent != -1 else i - 1][1] - 1
+                begin = self.delim[start - 1]
+                if begin > right_range:
+                    role_end = self.eq[start - 1]
+                else:
+                    begin = -1
+                    j = bisect_left(self.eqs, right_range + 1)
+                    role_end = self.eqs[j] if j < len(self.eqs) and self.eqs[j] < start else -1
+                if role_end != -1:
+                    role = ''.join(self.chars[begin + 1:role_end])
+            roles.append(role)
+
+        # '~' stands for the sense itself, it passes its role to its parent and leaves the tree.
+        for i, (start, end, name) in enumerate(self.entities):
+            if name == '~':
+                if parents[i] == -1:
+                    raise KDMLError("'~' without a sememe to attach to",
+                                    Def, self.offset + start)
+                roles[parents[i]] = roles[i]
+
+        # Keep the nodes connected to the first one.
+        index = {0: 0}
+        nodes = [KDMLNode(self.entities[0][2], roles[0], -1, self.offset + self.entities[0][0])]
+        for i in range(1, len(self.entities)):
+            start, end, name = self.entities[i]
+            if name != '~' and parents[i] in index:
+                index[i] = len(nodes)
+                nodes.append(KDMLNode(name, roles[i], index[parents[i]], self.offset + start))
+        return nodes
+
+
+def parse_kdml(Def):
+    """Parse a Def in KDML in a single pass.
+
+    Args:
+        Def (`str`): the Def of a sense, e.g. {tree|树:{reproduce|生殖:PatientProduct={fruit|水果},agent={~}}}
+
+    Returns:
+        (`KDMLParse`) the sememe list and the sememe trees of the Def.
+
+    Raises:
+        KDMLError: the Def is malformed, the error carries the position.
+    """
+    rmk_pos = Def.find('RMK=')
+    tree_end = rmk_pos if rmk_pos >= 0 else len(Def)
+
+    sememes = []
+    pending = []
+    name_start = -1
+    segments = [_Segment(0)]
+    for k, c in enumerate(Def):
+        # The sememe list covers the whole Def.
+        if c == '|':
+            if name_start == -1:
+                raise KDMLError(
+                    "Sememe without an opening '{' or '\"'", Def, k)
+            pending.append(name_start)
+        elif c in '}:"' and pending:
+            sememes.extend(Def[i:k].replace(' ', '_') for i in pending)
+            pending = []
+        if c == '{' or c == '"':
+            name_start = k + 1
+
+        # The trees cover the segments before 'RMK='.
+        if k < tree_end:
+            if c == ';':
+                segments.append(_Segment(k + 1))
+            else:
+                segments[-1].feed(c, Def)
+    if pending:
+        raise KDMLError("Unterminated sememe", Def, pending[0])
+    return KDMLParse(Def, sememes, segments)
@@ -0,0 +1,118 @@
+"""
+MinHashIndex Class
+====================
+"""
+import numpy as np
+
+# The Mersenne prime 2 ** 31 - 1, the modulus of the MinHash functions.
+MINHASH_PRIME = (1 << 31) - 1
+
+
+class MinHashIndex(object):
+    """Locality-sensitive hashing index of sets of integer tokens by MinHash signatures.
+
+    The signature of a set keeps the minimum of each of `num_perm` random hash functions
+    over the set, two sets agree on a signature position with the probability of their
+    Jaccard similarity. The signatures are cut into bands of `rows` positions, the sets
+    sharing a whole band with the query are its candidates, ranked by the num of the
+    shared bands. More bands of fewer rows give a higher recall with more candidates.
+
+    Example::
+
+        >>> index = MinHashIndex([0, 2, 4, 6], [1, 2, 3, 1, 2, 4], token_num=5)
+        >>> index.query([1, 2, 3])
+        array([0, 1], dtype=int32)
+    """
+
+    def __init__(self, indptr, indices, token_num, num_perm=64, rows=2, seed=1):
+        """Build the index.
+
+        Args:
+            indptr (`array_like`), indices (`array_like`):
+                the tokens of the i-th set are indices[indptr[i]:indptr[i + 1]], each less than token_num.
+            token_num (`int`): the num of the distinct tokens.
+            num_perm (`int`): the num of the hash functions, a multiple of rows.
+            rows (`int`): the num of the signature positions in a band.
+            seed (`int`): the seed of the hash functions.
+        """
+        if num_perm % rows != 0:
+            raise ValueError("num_perm must be a multiple of rows.")
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        self.num_perm = num_perm
+        self.rows = rows
+        self.bands = num_perm // rows
+        random = np.random.RandomState(seed)
+        a = random.randint(1, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+        b = random.randint(0, MINHASH_PRIME, size=num_perm).astype(np.uint64)
+        # hashes[k, t] is the k-th hash of the token t.
+        self.__hashes = ((a[:, None] * np.arange(token_num, dtype=np.uint64)[None, :] + b[:, None])
+                         % np.uint64(MINHASH_PRIME)).astype(np.uint32)
+        self.__mix = random.randint(1, 1 << 62, size=rows).astype(np.uint64) | np.uint64(1)
+
+        n = len(indptr) - 1
+        self.signatures = np.full((n, num_perm), MINHASH_PRIME, dtype=np.uint32)
+        nonempty = np.flatnonzero(indptr[:-1] < indptr[1:])
+        # Chunked to bound the num_perm x nnz intermediate.
+        chunk = 4096
+        for k in range(0, len(nonempty), chunk):
+            ids = nonempty[k:k + chunk]
+            start, end = indptr[ids[0]], indptr[ids[-1] + 1]
+            hashed = self.__hashes[:, indices[start:end]]
+            self.signatures[ids] = np.minimum.reduceat(hashed, indptr[ids] - start, axis=1).T
+        self.__empty = np.ones(n, dtype=bool)
+        self.__empty[nonempty] = False
+
+        # The sets of each band sorted by the band key, found by binary search.
+        keys = self.__band_keys(self.signatures)
+        self.__orders = np.argsort(keys, axis=0, kind='stable').T.astype(np.int32)
+        self.__keys = np.take_along_axis(keys, self.__orders.T, axis=0).T
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __band_keys(self, signatures):
+        """Mix the positions of each band into a 64-bit key, wrapping around on overflow.
+        """
+        signatures = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (signatures * self.__mix).sum(axis=2, dtype=np.uint64)
+
+    def signature(self, tokens):
+        """Get the MinHash signature of a set of tokens.
+        """
+        tokens = np.asarray(tokens, dtype=np.int64)
+        if len(tokens) == 0:
+            return np.full(self.num_perm, MINHASH_PRIME, dtype=np.uint32)
+        return self.__hashes[:, tokens].min(axis=1)
+
+    def query(self, tokens=None, K=None, set_id=None):
+        """Get the sets sharing a band with the query.
+
+        Args:
+            tokens (`array_like`): the tokens of the query set.
+            K (`int`): the max num of the candidates, those sharing the most bands are kept, default: all.
+            set_id (`int`): query by an indexed set instead of the tokens.
+
+        Returns:
+            (`numpy.ndarray`) the candidate set IDs in ascending order, the empty sets are never candidates.
+        """
+        if set_id is not None:
+            signature = self.signatures[set_id]
+            if self.__empty[set_id]:
+                return np.zeros(0, dtype=np.int32)
+        else:
+            signature = self.signature(tokens)
+            if len(tokens) == 0:
+                return np.zeros(0, dtype=np.int32)
+        keys = self.__band_keys(signature[None, :])[0]
+        found = []
+        for band in range(self.bands):
+            lo = np.searchsorted(self.__keys[band], keys[band], side='left')
+            hi = np.searchsorted(self.__keys[band], keys[band], side='right')
+            found.append(self.__orders[band, lo:hi])
+        found = np.concatenate(found)
+        candidates, counts = np.unique(found, return_counts=True)
+        if K is not None and len(candidates) > K:
+            keep = np.argsort(-counts, kind='stable')[:K]
+            candidates = np.sort(candidates[keep])
+        return candidates.astype(np.int32)
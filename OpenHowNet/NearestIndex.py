@@ -0,0 +1,166 @@
+"""
+NearestIndex
+==============
+"""
+import multiprocessing
+import os
+import shutil
+
+import numpy as np
+from tqdm import tqdm
+
+from .Similarity import FlatSenseTrees
+from .Snapshot import Snapshot, SnapshotError, resource_fingerprint, write_snapshot
+
+# The state of the worker processes, set by `_init_worker`.
+_trees = None
+_candidates = None
+
+
+def _init_worker(sections, matrix, candidates):
+    global _trees, _candidates
+    _trees = FlatSenseTrees(sections, matrix)
+    _candidates = candidates
+
+
+def nearest_senses(trees, candidates, sense_id, K, ranked=None):
+    """Get the K senses most similar to a sense among the candidates.
+
+    Args:
+        trees (`FlatSenseTrees`): the sense trees.
+        candidates (`numpy.ndarray`): the candidate sense IDs in ascending order, all having trees.
+        sense_id (`int`): the ID of the query sense.
+        K (`int`): the num of the neighbours, None for all.
+        ranked (`tuple`): the K + 1 nearest candidates of the sense and their similarity if already
+            calculated, e.g. for another sense of the same tree class.
+
+    Returns:
+        (`tuple`) the neighbour IDs, their similarities and the num of the candidates other than the sense.
+        The neighbours are in descending order of the similarity, ties in ascending order of the ID,
+        the same order as a stable sort of all the candidates.
+    """
+    if trees.root(sense_id) is None:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64), 0
+    j = int(np.searchsorted(candidates, sense_id))
+    total = len(candidates) - int(j < len(candidates) and candidates[j] == sense_id)
+    if ranked is not None:
+        ids, scores = ranked
+    elif K is not None:
+        # One more for the sense itself.
+        ids, scores = trees.nearest(sense_id, candidates, K + 1)
+    else:
+        scores = trees.scores(sense_id, candidates)
+        order = np.argsort(-scores, kind='stable')
+        ids, scores = candidates[order], scores[order]
+    keep = ids != sense_id
+    return ids[keep][:K].astype(np.int32), scores[keep][:K], total
+
+
+def _build_chunk(args):
+    """Compute the neighbours of the senses [start, end) and write them to a part file.
+    """
+    start, end, K, path, fingerprint = args
+    neighbors = np.full((end - start, K), -1, dtype=np.int32)
+    scores = np.zeros((end - start, K), dtype=np.float64)
+    lengths = np.zeros(end - start, dtype=np.int32)
+    totals = np.zeros(end - start, dtype=np.int32)
+    class_ranked = dict()
+    for i in range(start, end):
+        c = int(_trees.sense_class[i])
+        if c != -1 and c not in class_ranked:
+            class_ranked[c] = _trees.nearest(i, _candidates, K + 1)
+        ids, sims, total = nearest_senses(_trees, _candidates, i, K, class_ranked.get(c))
+        neighbors[i - start, :len(ids)] = ids
+        scores[i - start, :len(ids)] = sims
+        lengths[i - start] = len(ids)
+        totals[i - start] = total
+    write_snapshot(path, {'neighbors': neighbors.ravel(), 'scores': scores.ravel(),
+                          'length': lengths, 'total': totals}, fingerprint)
+    return end - start
+
+
+def build_nearest_index(path, fingerprint, sections, matrix, candidates, sense_num, K=100, processes=None, chunk_size=256):
+    """Compute the K nearest senses of every sense and store them in a snapshot file.
+
+    The senses are split into chunks written as separate part files next to the index,
+    so that an interrupted build resumes from the finished chunks. The chunks are
+    computed by a pool of processes.
+
+    Args:
+        path (`str`): the path of the index.
+        fingerprint (`str`): the fingerprint of the similarity data and the build parameters.
+        sections (`dict`): the sections produced by `compile_similarity`.
+        matrix (`numpy.ndarray`): the sememe similarity matrix the sections are compiled with.
+        candidates (`numpy.ndarray`): the IDs of the senses which may be returned as neighbours, all having trees.
+        sense_num (`int`): the num of the senses.
+        K (`int`): the num of the neighbours to keep for each sense.
+        processes (`int`): the num of the processes, default: the num of the CPUs. 1 builds in this process.
+        chunk_size (`int`): the num of the senses in a chunk.
+    """
+    parts_path = path + '.parts'
+    # The parts are only reused by a build with the same K.
+    part_fingerprint = resource_fingerprint([], fingerprint, str(K))
+    if not os.path.exists(parts_path):
+        os.makedirs(parts_path)
+    tasks = []
+    parts = []
+    for start in range(0, sense_num, chunk_size):
+        end = min(start + chunk_size, sense_num)
+        part = os.path.join(parts_path, '{}-{}.snap'.format(start, end))
+        parts.append(part)
+        try:
+            Snapshot(part, part_fingerprint).close()
+        except SnapshotError:
+            tasks.append((start, end, K, part, part_fingerprint))
+
+    candidates = np.asarray(candidates, dtype=np.int32)
+    with tqdm(total=sense_num, initial=sense_num - sum(t[1] - t[0] for t in tasks), unit='sense',
+              desc='Building the nearest sense index') as progress:
+        if processes == 1:
+            _init_worker(sections, matrix, candidates)
+            for task in tasks:
+                progress.update(_build_chunk(task))
+        elif tasks:
+            with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(sections, matrix, candidates)) as pool:
+                for n in pool.imap_unordered(_build_chunk, tasks):
+                    progress.update(n)
+
+    merged = {'neighbors': [], 'scores': [], 'length': [], 'total': []}
+    for part in parts:
+        snapshot = Snapshot(part, part_fingerprint)
+        for name in merged:
+            merged[name].append(np.array(snapshot[name]))
+        snapshot.close()
+    sections = {name: np.concatenate(v) for name, v in merged.items()}
+    sections['K'] = np.array([K], dtype=np.int32)
+    write_snapshot(path, sections, fingerprint)
+    shutil.rmtree(parts_path, ignore_errors=True)
+
+
+class NearestIndex(object):
+    """The K nearest senses of every sense, read from the snapshot written by `build_nearest_index`.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        """Open the index.
+
+        Raises:
+            SnapshotError: the index is missing, corrupted or out of date.
+        """
+        self.snapshot = Snapshot(path, fingerprint)
+        self.K = int(self.snapshot['K'][0])
+        self.__neighbors = self.snapshot['neighbors'].reshape(-1, self.K)
+        self.__scores = self.snapshot['scores'].reshape(-1, self.K)
+        self.__lengths = self.snapshot['length']
+        self.__totals = self.snapshot['total']
+
+    def neighbors(self, sense_id):
+        """Get the nearest senses of a sense.
+
+        Returns:
+            (`tuple`) the neighbour IDs, their similarities and whether the list is cut,
+            i.e. more candidates than the K kept ones were scored.
+        """
+        n = int(self.__lengths[sense_id])
+        return (self.__neighbors[sense_id, :n].tolist(), self.__scores[sense_id, :n].tolist(),
+                n < int(self.__totals[sense_id]))
@@ -0,0 +1,102 @@
+"""
+RetrievalIndex Class
+======================
+"""
+import numpy as np
+
+# The slack of the score bounds against the rounding errors of the sums.
+SCORE_SLACK = 1e-9
+
+
+class RetrievalIndex(object):
+    """Ranked retrieval of the rows of a binary matrix by a weighted bag of columns,
+    e.g. of the senses by the IDF-weighted overlap of their sememes with a query.
+
+    The score of a row is the sum of the weights of the query columns it has, the weight of
+    a column is its IDF, log(1 + n_rows / df), times its count in the query. The postings
+    are read in the MaxScore way: from the heaviest column down, until the columns left weigh
+    less than the K-th best score so far, after which no row outside the postings read can
+    make the top K. The columns left are then only checked for the rows read which can still
+    make it, so the rows of the light, long postings are never scored in full.
+
+    Example::
+
+        >>> index = RetrievalIndex([0, 2, 3, 6], [0, 1, 1, 0, 1, 2], n_rows=3)
+        >>> index.search([0, 1], K=2)
+        (array([1, 0], dtype=int32), array([2.30258509, 0.91629073]))
+    """
+
+    def __init__(self, col_indptr, col_indices, n_rows, doc_freqs=None):
+        """Build the index from the matrix in CSC form.
+
+        Args:
+            col_indptr (`array_like`), col_indices (`array_like`):
+                the rows of the j-th column are col_indices[col_indptr[j]:col_indptr[j + 1]], sorted and distinct.
+            n_rows (`int`): the num of the rows.
+            doc_freqs (`array_like`): the document frequency of each column the IDF is calculated by,
+                default: the num of its rows.
+        """
+        self.col_indptr = np.asarray(col_indptr, dtype=np.int64)
+        self.col_indices = np.asarray(col_indices, dtype=np.int32)
+        self.n_rows = n_rows
+        if doc_freqs is None:
+            doc_freqs = np.diff(self.col_indptr)
+        self.idf = np.log1p(n_rows / np.maximum(np.asarray(doc_freqs, dtype=np.float64), 1))
+
+    def __posting(self, j):
+        return self.col_indices[self.col_indptr[j]:self.col_indptr[j + 1]]
+
+    def search(self, cols, K=10):
+        """Get the K rows with the highest scores.
+
+        Args:
+            cols (`list[int]`): the query columns, a column given n times weighs n times.
+            K (`int`): the num of the results, None for all the rows with a positive score.
+
+        Returns:
+            (`tuple`) the row IDs and their scores, in descending order of the score, ties in ascending order of the ID.
+        """
+        cols, counts = np.unique(np.asarray(cols, dtype=np.int64), return_counts=True)
+        weights = self.idf[cols] * counts
+        keep = (weights > 0) & (self.col_indptr[cols + 1] > self.col_indptr[cols])
+        cols, weights = cols[keep], weights[keep]
+        order = np.argsort(-weights, kind='stable')
+        cols, weights = cols[order], weights[order]
+        # rest[i] is the greatest score the columns from i on can add.
+        rest = np.append(np.cumsum(weights[::-1])[::-1], 0.0)
+
+        # The rows read so far in ascending order and their scores, nothing is allocated for the other rows.
+        candidates = np.zeros(0, dtype=np.int32)
+        scores = np.zeros(0, dtype=np.float64)
+        threshold = -np.inf
+        i = 0
+        # Read the postings until the rows outside them can not make the top K.
+        while i < len(cols) and not (K is not None and rest[i] + SCORE_SLACK < threshold):
+            posting = self.__posting(cols[i])
+            merged = np.union1d(candidates, posting)
+            merged_scores = np.zeros(len(merged), dtype=np.float64)
+            merged_scores[np.searchsorted(merged, candidates)] = scores
+            merged_scores[np.searchsorted(merged, posting)] += weights[i]
+            candidates, scores = merged, merged_scores
+            i += 1
+            threshold = self.__threshold(scores, K)
+
+        # Check the columns left only for the rows which can still make the top K.
+        for j in range(i, len(cols)):
+            keep = scores + rest[j] + SCORE_SLACK >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+            posting = self.__posting(cols[j])
+            pos = np.minimum(np.searchsorted(posting, candidates), max(len(posting) - 1, 0))
+            scores[posting[pos] == candidates] += weights[j]
+            threshold = self.__threshold(scores, K)
+
+        result = np.lexsort((candidates, -scores))[:K]
+        return candidates[result].astype(np.int32), scores[result]
+
+    @staticmethod
+    def __threshold(scores, K):
+        """Get the K-th best of the scores, -inf if there are fewer.
+        """
+        if K is None or len(scores) < K or K == 0:
+            return -np.inf
+        return float(np.partition(scores, len(scores) - K)[len(scores) - K])
@@ -2,6 +2,7 @@
 Sememe Class
 =============
 """
+import sys
 
 
 class Sememe(object):
@@ -9,6 +10,7 @@ class Sememe(object):
     The smallest semantic unit. Described in English and Chinese.
 
     Attributes:
+        id (int): the dense integer ID of the sememe, assigned by HowNetDict.
         en (str): English word to describe the sememe.
         zh (str): Chinese word to describe the sememe.
         freq (int): 
@@ -16,6 +18,8 @@ class Sememe(object):
         related_sememes (dict): 
             the sememes related with the sememe in HowNet.
     """
+    __slots__ = ('id', 'en', 'zh', 'en_zh', 'freq',
+                 'related_sememes', 'senses')
 
     def __init__(self, hownet_sememe, freq):
         """Initialize a sememe by sememe annotations.
@@ -26,12 +30,24 @@ class Sememe(object):
             freq (int): 
                 the sememe occurence frequency in HowNet.
         """
-        self.en, self.zh = hownet_sememe.split('|')
-        self.en_zh = hownet_sememe
+        self.en, self.zh = [sys.intern(i) for i in hownet_sememe.split('|')]
+        self.en_zh = sys.intern(hownet_sememe)
+        self.id = None
         self.freq = freq
         self.related_sememes = {}
         self.senses = []
 
+    def __getstate__(self):
+        """Pickle the sememe as the dict of its attributes, like before it had slots.
+        """
+        return {k: getattr(self, k) for k in Sememe.__slots__ if hasattr(self, k)}
+
+    def __setstate__(self, state):
+        # The pickles from before the slots (e.g. in the resources) hold the same attributes but the id.
+        self.id = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __repr__(self):
         """Define how to print the sememe.
         """
@@ -44,7 +60,7 @@ class Sememe(object):
         Returns:
             (`list[Sense]`) the list of the senses annotated with the sememe.
         """
-        return self.senses
+        return list(self.senses)
 
     def get_related_sememes(self, relation=None, return_triples=False):
         """Get the sememes related with the sememe.
@@ -57,19 +73,10 @@ class Sememe(object):
         Returns:
             (`list`) the list of triples or return the list of related sememes.
         """
-        res = set()
         if relation:
-            if relation in self.related_sememes.keys():
-                if return_triples:
-                    res |= set([(self, relation, i)
-                                for i in self.related_sememes[relation]])
-                else:
-                    res |= set(self.related_sememes[relation])
+            items = [(relation, self.related_sememes.get(relation, []))]
         else:
-            if return_triples:
-                for k, v in self.related_sememes.items():
-                    res |= set([(self, k, i) for i in v])
-            else:
-                for i in self.related_sememes.values():
-                    res |= set(i)
-        return list(res)
+            items = self.related_sememes.items()
+        if return_triples:
+            return list(dict.fromkeys((self, k, i) for k, v in items for i in v))
+        return list(dict.fromkeys(i for k, v in items for i in v))
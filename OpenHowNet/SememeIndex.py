@@ -0,0 +1,68 @@
+"""
+SememeIndex Class
+===================
+"""
+from .SubstringIndex import SubstringIndex
+
+
+class SememeIndex(object):
+    """Hash indexes of the sememes by their English, Chinese and en_zh names.
+
+    Strict lookups are dict lookups, non-strict lookups go through a `SubstringIndex`
+    over the names, which is built at the first non-strict lookup of the language.
+
+    Attributes:
+        en (`dict`): English name -> sememes.
+        zh (`dict`): Chinese name -> sememes.
+        en_zh (`dict`): en_zh name -> sememes.
+    """
+
+    def __init__(self, sememes):
+        """Build the indexes.
+
+        Args:
+            sememes (`list[Sememe]`): the sememes, numbered by their ids.
+        """
+        self.en = dict()
+        self.zh = dict()
+        self.en_zh = dict()
+        for s in sememes:
+            for index, name in [(self.en, s.en), (self.zh, s.zh), (self.en_zh, s.en_zh)]:
+                if name not in index:
+                    index[name] = []
+                index[name].append(s)
+        self.__substring_indexes = dict()
+
+    def __substring_index(self, language):
+        index = self.__substring_indexes.get(language)
+        if index is None:
+            index = SubstringIndex(getattr(self, language).keys())
+            self.__substring_indexes[language] = index
+        return index
+
+    def search(self, word, language=None, strict=True):
+        """Search the sememes by a name or a part of the name.
+
+        Args:
+            word (`str`): target word.
+            language (`str`): en/zh, or None to search the English, Chinese and en_zh names strictly
+                and the en_zh names non-strictly.
+            strict (`bool`): whether to match the whole name.
+
+        Returns:
+            (`list[Sememe]`) the sememes without duplicates, ordered by their ids.
+        """
+        languages = [language] if language else ['en', 'zh', 'en_zh']
+        if not strict:
+            languages = [language or 'en_zh']
+        res = dict()
+        for lang in languages:
+            index = getattr(self, lang)
+            if strict:
+                names = [word] if word in index else []
+            else:
+                names = self.__substring_index(lang).find(word)
+            for name in names:
+                for s in index[name]:
+                    res[s] = None
+        return sorted(res, key=lambda s: s.id)
@@ -3,9 +3,78 @@ Sense Class
 =============
 """
 
+import sys
+from types import MappingProxyType
+
 from anytree import Node, RenderTree
 from anytree.exporter import DictExporter, JsonExporter
 
+from .Cache import LRUCache
+from .KDML import KDML_MARKERS, KDMLError, parse_kdml
+
+# The parsed sememe trees, keyed by the Def and the sememes of the senses, so that the senses
+# created again for the same concept (e.g. by SharedHowNetDict) share the entry.
+# The cached trees have no sense at the root, the entries never keep a sense alive.
+# Set maxsize to None to keep the trees of all the senses.
+sememe_tree_cache = LRUCache(maxsize=65536)
+
+
+def copy_tree(node, parent=None, name=None):
+    """Copy a sememe tree given by its root node.
+    The names of the nodes (senses and sememes) are shared, not copied.
+
+    Args:
+        name: the name of the copied root, default: the name of the root.
+    """
+    res = Node(node.name if name is None else name, parent=parent, role=node.role)
+    for c in node.children:
+        copy_tree(c, res)
+    return res
+
+
+class FrozenNode(Node):
+    """A node of a cached sememe tree, shared by the senses and read-only once frozen by `freeze_tree`.
+    """
+    # Out of the instance dict, which the exporters take the attributes from.
+    __slots__ = ('_frozen',)
+
+    def __check_frozen(self):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("The cached sememe tree is read-only, copy it to modify it.")
+
+    def __setattr__(self, name, value):
+        self.__check_frozen()
+        super(FrozenNode, self).__setattr__(name, value)
+
+    def __delattr__(self, name):
+        self.__check_frozen()
+        super(FrozenNode, self).__delattr__(name)
+
+    def _pre_attach(self, parent):
+        self.__check_frozen()
+
+    def _pre_detach(self, parent):
+        self.__check_frozen()
+
+
+def freeze_tree(node, parent=None):
+    """Copy a sememe tree given by its root node into a read-only tree of `FrozenNode`.
+    """
+    res = FrozenNode(node.name, parent=parent, role=node.role)
+    for c in node.children:
+        freeze_tree(c, res)
+    # No node can be attached to a tuple of children.
+    res.__dict__['_NodeMixin__children'] = tuple(res.children)
+    res._frozen = True
+    return res
+
+
+def freeze_dict(tree):
+    """Copy a sememe tree in the form of dict into read-only mappings with tuples of children.
+    """
+    return MappingProxyType({k: tuple(freeze_dict(c) for c in v) if k == 'children' else v
+                             for k, v in tree.items()})
+
 
 class Sense(object):
     """Contains variables of a sense. Initialized by an item in HowNet.
@@ -15,19 +84,35 @@ class Sense(object):
         hownet_sense (dic):
             Dict contains the annotation of the sense in HowNet.
     """
+    # Hundreds of thousands of senses are alive at the same time, so they have no
+    # per-instance dict and the strings repeated among them are interned.
+    __slots__ = ('id', 'No', 'en_word', 'en_grammar',
+                 'zh_word', 'zh_grammar', 'Def', 'sememes', '__weakref__')
 
     def __init__(self, hownet_sense):
         """Initialize a sense object by a hownet item.
         Initialize the attributes of the sense.
         """
+        self.id = None  # the dense integer ID, assigned by HowNetDict
         self.No = hownet_sense['No']
-        self.en_word = hownet_sense['en_word']
-        self.en_grammar = hownet_sense['en_grammar']
-        self.zh_word = hownet_sense['ch_word']
-        self.zh_grammar = hownet_sense['ch_grammar']
-        self.Def = hownet_sense['Def']
+        self.en_word = sys.intern(hownet_sense['en_word'])
+        self.en_grammar = sys.intern(hownet_sense['en_grammar'])
+        self.zh_word = sys.intern(hownet_sense['ch_word'])
+        self.zh_grammar = sys.intern(hownet_sense['ch_grammar'])
+        self.Def = sys.intern(hownet_sense['Def'])
         self.sememes = []
 
+    def __getstate__(self):
+        """Pickle the sense as the dict of its attributes, like before it had slots.
+        """
+        return {k: getattr(self, k) for k in Sense.__slots__[:-1] if hasattr(self, k)}
+
+    def __setstate__(self, state):
+        # The pickles from before the slots (e.g. in the resources) hold the same attributes but the id.
+        self.id = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __repr__(self):
         """Define how to print the sense.
         """
@@ -48,7 +133,7 @@ class Sense(object):
             return res
         target = tree
 
-        if isinstance(tree, dict):
+        if not isinstance(tree, (list, tuple)):
             target = list()
             target.append(tree)
         for item in target:
@@ -76,96 +161,78 @@ class Sense(object):
         Returns:
             (`list[Sememe]`) the sememe set of the sememe tree.
         """
-        tree = self.get_sememe_tree()
-        return list(self.__expand_tree(tree, layer))
+        entry = self.__cached_tree()
+        if layer not in entry['lists']:
+            entry['lists'][layer] = tuple(self.__expand_tree(
+                self.__cached_dict(entry), layer))
+        return list(entry['lists'][layer])
 
-    def get_sememe_tree(self, return_node=False):
+    def get_sememe_tree(self, return_node=False, copy=True):
         """Generate sememe tree for the sense by the Def.
+        The parsed tree is kept in `sememe_tree_cache`.
 
         Args:
             return_node(`bool`):
                 whether to return as anytree root node.
+            copy(`bool`):
+                whether to return a fresh copy of the tree.
+                Set to False to get the cached tree shared by the senses of the same Def, which is faster
+                but read-only: the dict is a read-only mapping whose children are tuples of read-only mappings,
+                and the anytree nodes cannot be renamed, attached or detached.
+                The root of the shared anytree tree is named None instead of the sense.
 
         Returns:
             (`dict`or`anytree.Node`) the sememe tree of the sense in the form of dict 
             or the root node of the sememe tree.
         """
-        kdml = self.Def
-        rmk_pos = kdml.find('RMK=')
-        if rmk_pos >= 0:
-            kdml = kdml[:rmk_pos]
-        kdml_list = kdml.split(";")
-        root = Node(self, role='sense')
-        for kdml in kdml_list:
-            entity_idx = []  # 义原起止位置集合
-            node = []  # 树的节点集合
-            pointer = []  # idx of '~' cases
-            for i in range(len(kdml)):
-                if kdml[i] in ['~', '?', '$']:
-                    if kdml[i] == '~':
-                        pointer.append(len(node))
-                    entity_idx.append([i, i + 1])
-                    node.append(Node(kdml[i], role='None'))
-                elif kdml[i] == '|':
-                    start_idx = i
-                    end_idx = i
-                    while kdml[start_idx] not in ['{', '"']:
-                        start_idx = start_idx - 1
-                    while kdml[end_idx] not in ['}', ':', '"']:
-                        end_idx = end_idx + 1
-                    entity_idx.append([start_idx + 1, end_idx])
-                    for j in self.sememes:
-                        if j.en_zh == kdml[start_idx + 1: end_idx].replace(' ', '_'):
-                            node.append(Node(j, role='None'))
-                            break
-            for i in range(len(entity_idx)):
-                cursor = entity_idx[i][0]
-                left_brace = 0
-                right_brace = 0
-                quotation = 0
-                while not (kdml[cursor] == ':' and ((quotation % 2 == 0 and left_brace == right_brace + 1) or
-                                                    (quotation % 2 == 1 and left_brace == right_brace))):
-                    if cursor == 0:
-                        break
-                    if kdml[cursor] == '{':
-                        left_brace = left_brace + 1
-                    elif kdml[cursor] == '}':
-                        right_brace = right_brace + 1
-                    elif kdml[cursor] == '"':
-                        quotation = quotation + 1
-                    cursor = cursor - 1
-                parent_idx = -1
-                for j in range(i - 1, -1, -1):  # 从当前位置往前找可以对应上的义原
-                    if entity_idx[j][1] == cursor:
-                        node[i].parent = node[j]
-                        parent_idx = j
-                        break
-                if i != 0:
-                    if parent_idx != -1:
-                        right_range = entity_idx[parent_idx][1] - 1
-                    else:
-                        right_range = entity_idx[i - 1][1] - 1
-                    role_begin_idx = -1
-                    role_end_idx = -1
-                    # 修改：在当前义原和父义原之间找
-                    for j in range(entity_idx[i][0] - 1, right_range, -1):
-                        if kdml[j] == '=':
-                            role_end_idx = j
-                        elif kdml[j] in [',', ':']:
-                            role_begin_idx = j
-                            break
-                    if role_end_idx != -1:
-                        node[i].role = kdml[role_begin_idx + 1: role_end_idx]
-            for i in pointer:
-                node[i].parent.role = node[i].role
-                node[i].parent = None
-            node[0].parent = root
-            if not return_node:
-                # 转化成dict形式
-                # exporter = DictExporter()
-                return DictExporter().export(root)
+        entry = self.__cached_tree()
+        if return_node:
+            return copy_tree(entry['node'], name=self) if copy else entry['node']
+        if copy:
+            res = DictExporter().export(entry['node'])
+            res['name'] = self
+            return res
+        res = dict(self.__cached_dict(entry))
+        res['name'] = self
+        return MappingProxyType(res)
+
+    @staticmethod
+    def __cached_dict(entry):
+        """Get the cached tree of an entry in the form of read-only dict, exported at the first use.
+        """
+        if entry['dict'] is None:
+            entry['dict'] = freeze_dict(DictExporter().export(entry['node']))
+        return entry['dict']
+
+    def __cached_tree(self):
+        """Get the cache entry of the sememe tree, parse the Def if it is not cached.
+        """
+        key = (self.Def, tuple(self.sememes))
+        entry = sememe_tree_cache.get(key)
+        if entry is None:
+            entry = {'node': freeze_tree(self.__parse_sememe_tree()),
+                     'dict': None, 'lists': {}}
+            sememe_tree_cache.put(key, entry)
+        return entry
+
+    def __parse_sememe_tree(self):
+        """Parse the Def into the sememe tree.
+
+        Returns:
+            (`anytree.Node`) the root node of the sememe tree, named None instead of the sense.
+        """
+        nodes = parse_kdml(self.Def).nodes
+        sememes = {s.en_zh: s for s in reversed(self.sememes)}
+        tree = [Node(None, role='sense')]
+        for node in nodes:
+            if node.name in KDML_MARKERS:
+                name = node.name
+            elif node.name in sememes:
+                name = sememes[node.name]
             else:
-                return root
+                raise KDMLError("Unknown sememe", self.Def, node.position)
+            tree.append(Node(name, role=node.role, parent=tree[node.parent + 1]))
+        return tree[0]
 
     def visualize_sememe_tree(self):
         """Visualize the sememe tree by sense Def.
@@ -173,9 +240,9 @@ class Sense(object):
         Returns:
             (`str`) the visualized sememe tree.
         """
-        tree = self.get_sememe_tree(return_node=True)
-        tree = RenderTree(tree)
+        tree = RenderTree(self.__cached_tree()['node'])
         tree_str = ''
         for pre, fill, node in tree:
-            tree_str += "%s[%s]%s\n" % (pre, node.role, node.name)
+            name = self if node.is_root else node.name
+            tree_str += "%s[%s]%s\n" % (pre, node.role, name)
         print(tree_str)
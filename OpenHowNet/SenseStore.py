@@ -0,0 +1,167 @@
+"""
+SenseStore Class
+==================
+"""
+import weakref
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+from .Sense import Sense
+
+
+class SenseStore(object):
+    """The senses of a core snapshot, read from the mapped sections on demand.
+
+    Only the senses in use are Python objects: a Sense is created at its first request and
+    kept while it is referenced, so asking for the same sense again returns the same object.
+
+    Example::
+
+        >>> store = SenseStore(snapshot, sememes)
+        >>> store.sense(store.word_sense_ids('苹果', 'zh')[0])
+    """
+
+    def __init__(self, snapshot, sememes):
+        """Initialize the store.
+
+        Args:
+            snapshot (`Snapshot`): the core snapshot, see `compile_hownet_dict`.
+            sememes (`list[Sememe]`): the sememes in the order of their IDs.
+        """
+        self.snapshot = snapshot
+        self.sememes = sememes
+        self.__senses = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return self.snapshot.string_num('sense_no')
+
+    def sense(self, index):
+        """Get the Sense object of a sense ID.
+        """
+        sense = self.__senses.get(index)
+        if sense is None:
+            core = self.snapshot
+            strings = [core.string('strings', int(core['sense_' + field][index])) for field in [
+                'en_word', 'en_grammar', 'zh_word', 'zh_grammar', 'Def']]
+            sense = Sense({'No': core.string('sense_no', index), 'en_word': strings[0], 'en_grammar': strings[1],
+                           'ch_word': strings[2], 'ch_grammar': strings[3], 'Def': strings[4]})
+            sense.id = index
+            indptr = core['sense_sememe_indptr']
+            sense.sememes = [self.sememes[j] for j in core['sense_sememe_indices']
+                             [indptr[index]:indptr[index + 1]].tolist()]
+            self.__senses[index] = sense
+        return sense
+
+    def senses(self, ids):
+        """Get the Sense objects of some sense IDs.
+        """
+        return [self.sense(i) for i in ids]
+
+    def search_no(self, No):
+        """Get the ID of the sense numbered No, -1 if not found.
+        """
+        return self.snapshot.search('sense_no', No)
+
+    def find_no(self, substring):
+        """Get the IDs of the senses whose numbers contain the substring, in ascending order.
+        """
+        return self.snapshot.find('sense_no', substring)
+
+    def word_sense_ids(self, word, language, strict=True):
+        """Get the sense IDs of a word, or of the words containing it if not strict,
+        in the English or Chinese word index.
+        """
+        core = self.snapshot
+        if strict:
+            words = [core.search(language + '_word', word)]
+            if words[0] == -1:
+                return []
+        else:
+            words = core.find(language + '_word', word)
+        indptr = core[language + '_word_indptr']
+        senses = core[language + '_word_senses']
+        res = []
+        for w in words:
+            res.extend(senses[indptr[w]:indptr[w + 1]].tolist())
+        return res
+
+
+class SenseSequence(Sequence):
+    """A read-only sequence of the senses of some IDs, created on access.
+    """
+
+    def __init__(self, store, ids):
+        self.store = store
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.store.senses(int(j) for j in self.ids[i])
+        return self.store.sense(int(self.ids[i]))
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SnapshotSenseDict(Mapping):
+    """Sense No -> Sense over a `SenseStore`, the read-only counterpart of `HowNetDict.sense_dic`.
+    The numbers are in the order of the sense IDs.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __iter__(self):
+        return iter(self.store.snapshot.strings('sense_no'))
+
+    def __contains__(self, No):
+        return isinstance(No, str) and self.store.search_no(No) != -1
+
+    def __getitem__(self, No):
+        index = self.store.search_no(No) if isinstance(No, str) else -1
+        if index == -1:
+            raise KeyError(No)
+        return self.store.sense(index)
+
+    def values(self):
+        return SenseSequence(self.store, range(len(self.store)))
+
+
+class SnapshotWordMap(Mapping):
+    """Word -> list of senses over a `SenseStore`, the read-only counterpart of `HowNetDict.en_map`
+    and `HowNetDict.zh_map`. `values` gives lazy `SenseSequence`s, so that counting the senses
+    of every word creates none of them.
+    """
+
+    def __init__(self, store, language):
+        self.store = store
+        self.language = language
+
+    def __len__(self):
+        return self.store.snapshot.string_num(self.language + '_word')
+
+    def __iter__(self):
+        return iter(self.store.snapshot.strings(self.language + '_word'))
+
+    def __contains__(self, word):
+        return isinstance(word, str) and self.store.snapshot.search(self.language + '_word', word) != -1
+
+    def __getitem__(self, word):
+        ids = self.store.word_sense_ids(word, self.language) if isinstance(word, str) else []
+        if not ids:
+            raise KeyError(word)
+        return self.store.senses(ids)
+
+    def values(self):
+        indptr = self.store.snapshot[self.language + '_word_indptr']
+        senses = self.store.snapshot[self.language + '_word_senses']
+        return [SenseSequence(self.store, senses[indptr[i]:indptr[i + 1]]) for i in range(len(indptr) - 1)]
@@ -0,0 +1,216 @@
+"""
+SharedHowNetDict Class
+=======================
+"""
+import numpy as np
+
+from .Sememe import Sememe
+from .SenseStore import SenseStore
+from .SememeIndex import SememeIndex
+from .HowNetDict import HowNetDict
+from .Similarity import FlatSenseTrees, open_sememe_similarity, open_sense_trees
+from .Snapshot import Snapshot, SnapshotError
+
+
+class SharedHowNetDict(object):
+    """Read-only HowNet dictionary for multi-process worker pools.
+
+    The senses, the sememes, the word indexes and the similarity data stay in the
+    memory-mapped snapshot files, which the operating system shares between all the
+    processes mapping them. Sense objects are only created for the search results,
+    so the memory of each worker stays close to zero.
+
+    Create it in the master process before forking the workers, or in each worker,
+    both share the same physical pages.
+
+    Example::
+
+        >>> hownet_dict = OpenHowNet.SharedHowNetDict(init_sim=True)
+        >>> with multiprocessing.Pool(8) as pool:
+        ...     pool.map(hownet_dict.get_sense, words)
+
+    """
+
+    def __init__(self, init_sim=False):
+        '''Initialize SharedHowNetDict, the snapshots are built if needed.
+
+        Args:
+            init_sim (`bool`) : whether to initialize the similarity calculation module.
+
+        Raises:
+            SnapshotError: the core snapshot is missing and cannot be written.
+        '''
+        try:
+            try:
+                self.__core = HowNetDict.build_snapshot()
+            except FileNotFoundError:
+                raise
+            except OSError as e:
+                raise SnapshotError("SharedHowNetDict maps the OpenHowNet snapshot, which cannot be written: {}".format(e))
+
+            self.__trees = None
+            self.__init_sememes()
+            print('Initializing OpenHowNet succeeded!')
+
+            if init_sim:
+                self.initialize_similarity_calculation()
+        except FileNotFoundError as e:
+            print(e)
+
+    def __init_sememes(self):
+        """The sememes are few, keep them as objects.
+        """
+        self.sememe_dic = dict()
+        for k, v in zip(self.__core.strings('sememe'), self.__core['sememe_freq'].tolist()):
+            self.sememe_dic[k] = Sememe(k, v)
+            self.sememe_dic[k].id = len(self.sememe_dic) - 1
+        self.__sememes = list(self.sememe_dic.values())
+        self.sememe_index = SememeIndex(self.__sememes)
+        self.__store = SenseStore(self.__core, self.__sememes)
+
+    def __getstate__(self):
+        """Pickle the dict by the paths of the snapshots and of the sememe similarity matrix,
+        so that the workers map the same files instead of receiving a copy of the data.
+        The sense trees and the matrix kept in memory, as their files could not be written, are copied.
+        """
+        similarity = matrix = None
+        if self.__trees is not None:
+            similarity = self.__similarity.path if isinstance(self.__similarity, Snapshot) else self.__similarity
+            matrix = self.__trees.matrix
+            if isinstance(matrix, np.memmap) and matrix.filename is not None:
+                matrix = matrix.filename
+        return {'core': self.__core.path, 'similarity': similarity, 'matrix': matrix}
+
+    def __setstate__(self, state):
+        # The snapshots have been validated by the pickling process.
+        # The trees, their classes and the matrix are mapped from the files, nothing is rebuilt.
+        self.__core = Snapshot(state['core'], verify=False)
+        self.__trees = None
+        if state['similarity'] is not None:
+            if isinstance(state['similarity'], str):
+                self.__similarity = Snapshot(state['similarity'], verify=False)
+            else:
+                self.__similarity = state['similarity']
+            matrix = state['matrix']
+            if isinstance(matrix, str):
+                matrix = np.load(matrix, mmap_mode='r')
+            self.__trees = FlatSenseTrees(self.__similarity, matrix)
+        self.__init_sememes()
+
+    def __sense_ids(self, word, language=None, strict=True):
+        """Get the sense IDs retrieved by a word (en/zh/No), without duplicates.
+        """
+        res = []
+        for lang in ['en', 'zh']:
+            if language is None or language == lang:
+                res.extend(self.__store.word_sense_ids(word, lang, strict))
+        if language is None:
+            if strict:
+                index = self.__store.search_no(word)
+                if index != -1:
+                    res.append(index)
+            else:
+                res.extend(self.__store.find_no(word))
+        return list(dict.fromkeys(res))
+
+    def __getitem__(self, item):
+        """Shortcut for get_sense().
+
+        Args:
+            item (`str`) : target word by which to search for the senses.
+
+        Returns:
+            (`list[Sense]`) candidates HowNet senses, if the target word does not exist, return an empty list.
+        """
+        return [self.__store.sense(i) for i in self.__sense_ids(item)]
+
+    def __len__(self):
+        """Get the num of the concepts in HowNet.
+        """
+        return self.__core.string_num('sense_no')
+
+    def has(self, item, language=None):
+        """Check that whether certain word(English Word/Chinese Word/ID) exist in HowNet.
+        See `HowNetDict.has`.
+        """
+        if language:
+            if language != 'en' and language != 'zh':
+                print("Language error, please set the correct language.")
+                return
+        if language:
+            return self.__core.search(language + '_word', item) != -1
+        return (self.__core.search('en_word', item) != -1 or self.__core.search('zh_word', item) != -1
+                or self.__core.search('sense_no', item) != -1)
+
+    def get_sense(self, word, language=None, pos=None, strict=True, limit=None, offset=0):
+        """Common sense search API. See `HowNetDict.get_sense`.
+
+        Returns:
+            (`list[Sense]`) candidates HowNet senses, if the target word does not exist, return an empty list.
+        """
+        if language:
+            if language != 'en' and language != 'zh':
+                print("Language error, please set the correct language.")
+                return
+        if pos:
+            if pos not in self.get_all_sense_pos():
+                print("POS error, please set the correct POS.")
+                return
+        ids = self.__sense_ids(word, language, strict)
+        end = None if limit is None else offset + limit
+        if not pos:
+            return [self.__store.sense(i) for i in ids[offset:end]]
+        res = [self.__store.sense(i) for i in ids]
+        res = [i for i in res if (
+            i.en_grammar if language == 'en' else i.zh_grammar) == pos]
+        return res[offset:end]
+
+    def get_all_sememes(self):
+        """Get the complete sememes in HowNet.
+
+        Returns:
+            (`list[Sememe]`) a list of all sememes
+        """
+        return list(self.__sememes)
+
+    get_sememe = HowNetDict.get_sememe
+    get_sememes_by_word = HowNetDict.get_sememes_by_word
+    get_all_sense_pos = HowNetDict.get_all_sense_pos
+    get_sememe_tree_cache_info = HowNetDict.get_sememe_tree_cache_info
+
+    # Similarity calculation
+    def initialize_similarity_calculation(self):
+        """Initialize the similarity calculation from the similarity snapshot,
+        which is built from the similarity resources if needed.
+        """
+        try:
+            sememe_sim = open_sememe_similarity(self.__core.strings('sememe'))
+            trees = open_sense_trees(sememe_sim, self.__core.strings('sense_no'), self.__core.fingerprint)
+        except FileNotFoundError as e:
+            print(
+                "Enabling Word Similarity Calculation requires specific data files, please check the completeness of your download package.")
+            print(e)
+            return
+        # The trees are in memory if their snapshot could not be written, they still work but
+        # are copied to the workers.
+        self.__similarity = trees.sections
+        self.__trees = trees
+        print("Initializing similarity calculation succeeded!")
+
+    def calculate_word_similarity(self, word0, word1, strict=True):
+        """Calculate the word similarity between two words via sememes.
+        See `HowNetDict.calculate_word_similarity`.
+
+        Returns:
+            (`float`) the word similarity calculated via sememes, -1 if any of the words does not exist in HowNet.
+        """
+        res = -1
+        if self.__trees is None:
+            print("Please initialize the similarity calculation firstly!")
+            return res
+        for id1 in self.__sense_ids(word0, strict=strict):
+            for id2 in self.__sense_ids(word1, strict=strict):
+                sim = self.__trees.sense_similarity(id1, id2)
+                if sim is not None and sim > res:
+                    res = sim
+        return res
@@ -0,0 +1,616 @@
+"""
+Similarity
+=============
+"""
+import heapq
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from .Sememe import Sememe
+from .Cache import LRUCache
+from .Download import get_resource
+from .Snapshot import Snapshot, SnapshotError, get_resource_paths, get_snapshot_path, resource_fingerprint, write_snapshot
+
+# The weights of the sense similarity, see `HowNetDict.initialize_similarity_calculation`.
+DELTA = 0.1
+BETA_RELATION = 0.3
+BETA_SEMEME = 0.7
+
+# The resource files the sense trees are built from, the sememe similarity has its own fingerprint.
+SIMILARITY_RESOURCES = ['sense_tree']
+# The resource files the sememe similarity matrix is built from.
+SEMEME_SIMILARITY_RESOURCES = ['sememe_all', 'sememe_sim_table']
+# The data type of the compiled sememe similarity matrix.
+SEMEME_SIMILARITY_DTYPE = 'float32'
+
+
+def node_key(name):
+    """Get the string key of a sense tree node name, which may be a sememe or a plain string.
+    """
+    if isinstance(name, Sememe):
+        return name.en_zh
+    return str(name)
+
+
+def compile_sememe_similarity(sememe_sim_table, sememe_names):
+    """Turn the tuple-keyed sememe similarity table into a dense matrix indexed by integer IDs.
+
+    The sememes take the IDs of `Sememe.id`, the other names in the table (e.g. the markers)
+    follow in order of appearance. A pair looked up in both orders gets the same value it
+    gets from the table, the pairs missing from the table in both orders get NaN,
+    which the lookups raise KeyError for like the table.
+
+    Args:
+        sememe_sim_table (`dict`): (name, name) -> similarity.
+        sememe_names (`list[str]`): the en_zh names of the sememes in the order of their IDs.
+
+    Returns:
+        (`tuple`) the names of the IDs and the float32 matrix.
+    """
+    names = {name: i for i, name in enumerate(sememe_names)}
+    pairs = []
+    for (a, b), v in sememe_sim_table.items():
+        ids = []
+        for key in (node_key(a), node_key(b)):
+            if key not in names:
+                names[key] = len(names)
+            ids.append(names[key])
+        pairs.append((ids[0], ids[1], v))
+
+    matrix = np.full((len(names), len(names)), np.nan, dtype=SEMEME_SIMILARITY_DTYPE)
+    exists = np.zeros((len(names), len(names)), dtype=bool)
+    for a, b, v in pairs:
+        matrix[a, b] = v
+        exists[a, b] = True
+    for a, b, v in pairs:
+        if not exists[b, a]:
+            matrix[b, a] = v
+    return list(names.keys()), matrix
+
+
+def open_sememe_similarity(sememe_names):
+    """Open the sememe similarity matrix `~/.openhownet/snapshot/sememe_sim.npy`, memory-mapped.
+    The matrix is compiled from the sememe_sim_table resource if it is missing or out of date,
+    its names are kept in `sememe_sim.snap` together with the fingerprint of the resources.
+
+    Args:
+        sememe_names (`list[str]`): the en_zh names of the sememes in the order of their IDs.
+
+    Returns:
+        (`SememeSimilarity`) the sememe similarity.
+
+    Raises:
+        FileNotFoundError: the resource files are missing.
+    """
+    fingerprint = resource_fingerprint(get_resource_paths(SEMEME_SIMILARITY_RESOURCES), SEMEME_SIMILARITY_DTYPE)
+    names_path = get_snapshot_path("sememe_sim.snap")
+    matrix_path = get_snapshot_path("sememe_sim.npy")
+    try:
+        snapshot = Snapshot(names_path, fingerprint)
+        names = snapshot.strings('name')
+        snapshot.close()
+        matrix = np.load(matrix_path, mmap_mode='r')
+        if matrix.shape != (len(names), len(names)) or matrix.dtype != SEMEME_SIMILARITY_DTYPE:
+            raise SnapshotError("Snapshot \"{}\" is corrupted.".format(matrix_path))
+        return SememeSimilarity(names, matrix, fingerprint)
+    except (SnapshotError, OSError, ValueError):
+        pass
+
+    with get_resource(os.path.join("resources", "sememe_sim_table"), "rb") as f:
+        sememe_sim_table = pickle.load(f)
+    names, matrix = compile_sememe_similarity(sememe_sim_table, sememe_names)
+    del sememe_sim_table
+    tmp_path = '{}.{}.tmp.npy'.format(matrix_path, os.getpid())
+    try:
+        if not os.path.exists(os.path.dirname(matrix_path)):
+            os.makedirs(os.path.dirname(matrix_path))
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, matrix_path)
+        write_snapshot(names_path, {'name': names}, fingerprint)
+        matrix = np.load(matrix_path, mmap_mode='r')
+    except OSError as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        print("Writing the sememe similarity matrix failed:", e)
+    return SememeSimilarity(names, matrix, fingerprint)
+
+
+class SememeSimilarity(object):
+    """The similarity between sememes as a dense matrix indexed by integer IDs.
+
+    It can still be used like the sememe_sim_table dict, i.e. `sememe_sim[(name1, name2)]`.
+
+    Attributes:
+        names (`list[str]`): the name of each ID, the sememes come first in the order of `Sememe.id`.
+        index (`dict`): name -> ID.
+        matrix (`numpy.ndarray`): the similarity between the IDs, NaN for the pairs without one.
+        fingerprint (`str`): the fingerprint of the resources the matrix is compiled from.
+    """
+
+    def __init__(self, names, matrix, fingerprint=None):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.matrix = matrix
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, pair):
+        ids = [self.index.get(node_key(name)) for name in pair]
+        return None not in ids and not np.isnan(self.matrix[ids[0], ids[1]])
+
+    def __getitem__(self, pair):
+        return self.similarity(pair[0], pair[1])
+
+    def similarity(self, name1, name2):
+        """Get the similarity between two names (sememes, en_zh strings or markers).
+
+        Raises:
+            KeyError: one of the names is not in the matrix, or the pair has no similarity.
+        """
+        sim = float(self.matrix[self.index[node_key(name1)], self.index[node_key(name2)]])
+        if sim != sim:
+            raise KeyError((name1, name2))
+        return sim
+
+
+def compile_similarity(sememe_similarity, sense_tree_dic, sense_nos):
+    """Flatten the sense trees into snapshot sections.
+
+    Each sense tree is laid out in breadth-first order, so that the children of a node
+    are stored contiguously and referred to by a [start, end) range. The node names
+    are stored as the IDs of the sememe similarity matrix, -1 for the names out of it.
+    The senses are grouped into the classes of identical trees here, once, see `FlatSenseTrees`.
+
+    Args:
+        sememe_similarity (`SememeSimilarity`): the sememe similarity.
+        sense_tree_dic (`dict`): sense No -> root node of the sense tree.
+        sense_nos (`list[str]`): the sense numbers in the order of the sense IDs.
+
+    Returns:
+        (`dict`) the sections to write by `write_snapshot`.
+    """
+    index = sememe_similarity.index
+    roles = {}
+
+    def role_id(role):
+        key = str(role)
+        if key not in roles:
+            roles[key] = len(roles)
+        return roles[key]
+
+    tree_indptr = [0]
+    tree_name, tree_role, tree_parent, child_start, child_end = [], [], [], [], []
+    for no in sense_nos:
+        root = sense_tree_dic.get(no)
+        if root is not None:
+            base = len(tree_name)
+            order = [root]
+            parents = [-1]
+            k = 0
+            while k < len(order):
+                node = order[k]
+                child_start.append(base + len(order))
+                for c in node.children:
+                    order.append(c)
+                    parents.append(base + k)
+                child_end.append(base + len(order))
+                k += 1
+            tree_name.extend(index.get(node_key(n.name), -1) for n in order)
+            tree_role.extend(role_id(n.role) for n in order)
+            tree_parent.extend(parents)
+        tree_indptr.append(len(tree_name))
+    sense_class, class_root = _classify_trees(tree_indptr, tree_name, tree_role, [
+        e - s for s, e in zip(child_start, child_end)])
+
+    return {
+        'role': list(roles.keys()),
+        'tree_indptr': np.array(tree_indptr, dtype=np.int64),
+        'tree_name': np.array(tree_name, dtype=np.int32),
+        'tree_role': np.array(tree_role, dtype=np.int32),
+        'tree_parent': np.array(tree_parent, dtype=np.int32),
+        'tree_child_start': np.array(child_start, dtype=np.int32),
+        'tree_child_end': np.array(child_end, dtype=np.int32),
+        'sense_class': np.array(sense_class, dtype=np.int32),
+        'class_root': np.array(class_root, dtype=np.int64),
+    }
+
+
+def _classify_trees(indptr, name, role, children):
+    """Group the senses into classes of identical trees.
+    A tree is identified by the names, roles and child nums of its nodes in breadth-first order.
+
+    Returns:
+        (`tuple`) the class of each sense, -1 if the sense has no tree, and the root node of a tree of each class.
+    """
+    classes = dict()
+    sense_class = []
+    class_root = []
+    for i in range(len(indptr) - 1):
+        start, end = indptr[i], indptr[i + 1]
+        if start == end:
+            sense_class.append(-1)
+            continue
+        key = (tuple(name[start:end]), tuple(role[start:end]), tuple(children[start:end]))
+        if key not in classes:
+            classes[key] = len(classes)
+            class_root.append(start)
+        sense_class.append(classes[key])
+    return sense_class, class_root
+
+
+class FlatSenseTrees(object):
+    """Sense trees stored as flat arrays.
+
+    Attributes:
+        indptr (`numpy.ndarray`): the nodes of the i-th sense are indptr[i]:indptr[i + 1], the first one is the root.
+        name (`numpy.ndarray`): the node name ID of each node, which indexes the similarity matrix, -1 if out of it.
+        role (`numpy.ndarray`): the role ID of each node.
+        parent (`numpy.ndarray`): the parent node of each node, -1 for the roots.
+        child_start (`numpy.ndarray`): the first child of each node.
+        child_end (`numpy.ndarray`): the end of the children of each node.
+        matrix (`numpy.ndarray`): the similarity between node names, NaN for the pairs without one.
+        sections (`dict`): the sections the trees are read from.
+        sense_class (`numpy.ndarray`): the tree class of each sense, -1 if the sense has no tree.
+            The senses of a class have identical trees, so they score the same against any tree.
+        class_root (`numpy.ndarray`): the root node of a tree of each class.
+        class_cache (`LRUCache`): the cached similarity between classes.
+        persistent_cache (`SQLiteCache`): the similarity between classes cached on disk, None if not used.
+
+    `sense_similarity`, `nearest` and the batch methods without numba go through the class caches.
+    With numba, `scores` and `class_scores` calculate whole rows and blocks in the compiled kernels
+    and bypass the caches, which looking up pair by pair would only slow down. The results are the same.
+    """
+
+    def __init__(self, sections, matrix):
+        """Initialize the trees by the sections produced by `compile_similarity`
+        and the matrix of the `SememeSimilarity` they are compiled with.
+        """
+        self.sections = sections
+        self.indptr = sections['tree_indptr']
+        self.name = sections['tree_name']
+        self.role = sections['tree_role']
+        self.parent = sections['tree_parent']
+        self.child_start = sections['tree_child_start']
+        self.child_end = sections['tree_child_end']
+        self.sense_class = sections['sense_class']
+        self.class_root = sections['class_root']
+        self.matrix = matrix
+        self.class_cache = LRUCache(maxsize=1 << 20)
+        self.persistent_cache = None
+        self.__kernel_args = None
+        if _kernel_similarity is not None:
+            self.__kernel_args = (np.asarray(self.name), np.asarray(self.role), np.asarray(self.child_start),
+                                  np.asarray(self.child_end), np.asarray(self.matrix))
+        self.__groups = None
+        self.__upper = None
+
+    def root(self, sense_id):
+        """Get the root node of a sense tree.
+
+        Returns:
+            (`int`) the root node, None if the sense has no tree.
+        """
+        start = int(self.indptr[sense_id])
+        if start == int(self.indptr[sense_id + 1]):
+            return None
+        return start
+
+    def class_similarity(self, class1, class2):
+        """Get the similarity between the trees of two classes, cached in `class_cache`
+        and in `persistent_cache` if set.
+        """
+        key = (class1, class2)
+        sim = self.class_cache.get(key)
+        if sim is None:
+            persistent_key = (class1 << 32) | class2
+            if self.persistent_cache is not None:
+                sim = self.persistent_cache.get(persistent_key)
+            if sim is None:
+                sim = self.similarity(int(self.class_root[class1]), int(self.class_root[class2]))
+                if self.persistent_cache is not None:
+                    self.persistent_cache.put(persistent_key, sim)
+            self.class_cache.put(key, sim)
+        return sim
+
+    def sense_similarity(self, sense1, sense2):
+        """Get the similarity between the trees of two senses given by their IDs.
+
+        Returns:
+            (`float`) the similarity, None if any of the senses has no tree.
+        """
+        class1, class2 = int(self.sense_class[sense1]), int(self.sense_class[sense2])
+        if class1 == -1 or class2 == -1:
+            return None
+        return self.class_similarity(class1, class2)
+
+    def scores(self, sense_id, candidates):
+        """Calculate the similarity between a sense and many senses, once for each tree class among them.
+
+        Args:
+            sense_id (`int`): the ID of the sense.
+            candidates (`numpy.ndarray`): the IDs of the senses to score, all having trees.
+
+        Returns:
+            (`numpy.ndarray`) the similarity of each candidate.
+        """
+        classes, inverse, counts = self.__candidate_classes(candidates)
+        if self.__kernel_args is not None:
+            sims = _kernel_scores(self.root(sense_id), self.class_root[classes], *self.__kernel_args)
+        else:
+            sense_class = int(self.sense_class[sense_id])
+            sims = np.array([self.class_similarity(sense_class, c) for c in classes.tolist()], dtype=np.float64)
+        return sims[inverse]
+
+    def class_scores(self, classes1, classes2):
+        """Calculate the similarity between the trees of every pair of classes from two lists.
+
+        Returns:
+            (`numpy.ndarray`) the similarity, in a matrix of len(classes1) rows and len(classes2) columns.
+        """
+        if self.__kernel_args is not None:
+            return _kernel_block(self.class_root[classes1], self.class_root[classes2], *self.__kernel_args)
+        classes2 = [int(c) for c in classes2]
+        return np.array([[self.class_similarity(int(c1), c2) for c2 in classes2] for c1 in classes1],
+                        dtype=np.float64).reshape(len(classes1), len(classes2))
+
+    def __candidate_classes(self, candidates):
+        """Get the classes among the candidates, the class of each candidate and the num of the candidates
+        in each class, kept for the last candidates array.
+        """
+        if self.__groups is None or self.__groups[0] is not candidates:
+            classes, inverse, counts = np.unique(
+                self.sense_class[candidates], return_inverse=True, return_counts=True)
+            self.__groups = (candidates, classes, inverse.ravel(), counts)
+        return self.__groups[1:]
+
+    def bounds(self, sense_id, classes):
+        """Get an upper bound of the similarity between a sense and the trees of some classes.
+
+        The similarity mixes the similarity of the root sememes and the relation similarity,
+        the latter is an average of the similarity of the children and `DELTA`, so it never
+        exceeds the greatest of `DELTA` and the sememe similarity. The bound takes that for the
+        relation similarity and only looks up the root sememes.
+        """
+        if self.__upper is None:
+            self.__upper = max(float(np.nanmax(self.matrix)) if self.matrix.size else 0.0, DELTA)
+        root = self.root(sense_id)
+        roots = self.class_root[classes]
+        names = self.name[roots]
+        name = int(self.name[root])
+        if name >= 0:
+            sememe_sim = np.where(names >= 0, self.matrix[name, names], 0.0)
+            # The pairs without a similarity are never pruned, scoring them raises KeyError.
+            sememe_sim[np.isnan(sememe_sim)] = np.inf
+        else:
+            sememe_sim = np.zeros(len(roots), dtype=np.float64)
+        leaf = (self.child_start[roots] == self.child_end[roots]) & (
+            self.child_start[root] == self.child_end[root])
+        bound = np.where(leaf, sememe_sim, BETA_RELATION * self.__upper + BETA_SEMEME * sememe_sim)
+        # A margin for the rounding of the sums in `similarity`.
+        return bound + 1e-9
+
+    def nearest(self, sense_id, candidates, K):
+        """Get the K candidates most similar to a sense, without scoring all of them.
+
+        The classes of the candidates are scored in descending order of their `bounds`,
+        keeping the K best scores in a heap, until no class left can reach the K-th best score.
+        The result is the same as the first K of a stable sort of all the candidates.
+
+        Args:
+            sense_id (`int`): the ID of the sense, which must have a tree.
+            candidates (`numpy.ndarray`): the IDs of the senses to score in ascending order, all having trees.
+            K (`int`): the num of the results.
+
+        Returns:
+            (`tuple`) the IDs of the K senses and their similarity, in descending order of the similarity,
+            ties in ascending order of the ID.
+        """
+        classes, inverse, counts = self.__candidate_classes(candidates)
+        bound = self.bounds(sense_id, classes)
+        order = np.argsort(-bound, kind='stable').tolist()
+        bound = bound.tolist()
+        counts = counts.tolist()
+        sense_class = int(self.sense_class[sense_id])
+        sims = np.full(len(classes), -np.inf, dtype=np.float64)
+        heap = []  # the K best scores so far
+        for c in order:
+            if len(heap) == K and bound[c] < heap[0]:
+                break
+            sim = self.class_similarity(sense_class, int(classes[c]))
+            sims[c] = sim
+            for _ in range(min(counts[c], K)):
+                if len(heap) < K:
+                    heapq.heappush(heap, sim)
+                elif sim > heap[0]:
+                    heapq.heapreplace(heap, sim)
+                else:
+                    break
+        if not heap:
+            return candidates[:0], sims[:0]
+        scores = sims[inverse]
+        keep = scores >= heap[0]
+        ids, scores = candidates[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')[:K]
+        return ids[order], scores[order]
+
+    def similarity(self, node1, node2):
+        """Calculate the similarity between two (sub)trees given by their root nodes.
+
+        Raises:
+            KeyError: two compared nodes are named by a pair of sememes without a similarity.
+        """
+        if self.__kernel_args is not None:
+            return float(_kernel_similarity(node1, node2, *self.__kernel_args))
+        beta_relation = BETA_RELATION
+        beta_sememe = BETA_SEMEME
+        s1, e1 = int(self.child_start[node1]), int(self.child_end[node1])
+        s2, e2 = int(self.child_start[node2]), int(self.child_end[node2])
+
+        relation_sim = 0
+        if s1 == e1 and s2 == e2:
+            beta_relation = 0
+            beta_sememe = 1
+        else:
+            role_match = 0
+            N = (e1 - s1) + (e2 - s2)
+            flag2 = [1] * (e2 - s2)
+            for i in range(s1, e1):
+                role = self.role[i]
+                for j in range(s2, e2):
+                    if flag2[j - s2] == 1 and self.role[j] == role:
+                        flag2[j - s2] = 0
+                        role_match = role_match + 1
+                        relation_sim = relation_sim + self.similarity(i, j)
+                        break
+            relation_sim = relation_sim + (N - 2 * role_match) * DELTA
+            relation_sim = relation_sim / (N - role_match)
+
+        name1, name2 = self.name[node1], self.name[node2]
+        sememe_sim = float(self.matrix[name1, name2]) if name1 >= 0 and name2 >= 0 else 0.0
+        if sememe_sim != sememe_sim:
+            raise KeyError((int(name1), int(name2)))
+        return beta_relation * relation_sim + beta_sememe * sememe_sim
+
+
+def _tree_similarity(node1, node2, name, role, child_start, child_end, matrix):
+    """`FlatSenseTrees.similarity` over plain arrays for numba, giving the same results.
+    """
+    name1, name2 = name[node1], name[node2]
+    sememe_sim = 0.0
+    if name1 >= 0 and name2 >= 0:
+        sememe_sim = matrix[name1, name2]
+    if np.isnan(sememe_sim):
+        raise KeyError("A pair of sememes without a similarity.")
+    s1, e1 = child_start[node1], child_end[node1]
+    s2, e2 = child_start[node2], child_end[node2]
+    if s1 == e1 and s2 == e2:
+        return sememe_sim
+    role_match = 0
+    N = (e1 - s1) + (e2 - s2)
+    flag2 = np.ones(e2 - s2, dtype=np.bool_)
+    relation_sim = 0.0
+    for i in range(s1, e1):
+        for j in range(s2, e2):
+            if flag2[j - s2] and role[j] == role[i]:
+                flag2[j - s2] = False
+                role_match += 1
+                relation_sim += _tree_similarity(i, j, name, role, child_start, child_end, matrix)
+                break
+    relation_sim += (N - 2 * role_match) * DELTA
+    relation_sim /= N - role_match
+    return BETA_RELATION * relation_sim + BETA_SEMEME * sememe_sim
+
+
+def _tree_scores(root, roots, name, role, child_start, child_end, matrix):
+    """Calculate the similarity between a tree and many trees over plain arrays for numba.
+    """
+    sims = np.empty(len(roots), dtype=np.float64)
+    for k in range(len(roots)):
+        sims[k] = _tree_similarity(root, roots[k], name, role, child_start, child_end, matrix)
+    return sims
+
+
+def _tree_block(roots1, roots2, name, role, child_start, child_end, matrix):
+    """Calculate the similarity between every pair of trees from two lists over plain arrays for numba.
+    """
+    sims = np.empty((len(roots1), len(roots2)), dtype=np.float64)
+    for k in range(len(roots1)):
+        for l in range(len(roots2)):
+            sims[k, l] = _tree_similarity(roots1[k], roots2[l], name, role, child_start, child_end, matrix)
+    return sims
+
+
+# The compiled kernels, None if numba is not installed.
+_kernel_similarity = None
+_kernel_scores = None
+_kernel_block = None
+if numba is not None:
+    # Not cached to disk, as numba fails to load the cache of a recursive function.
+    _tree_similarity = _kernel_similarity = numba.njit(_tree_similarity)
+    _kernel_scores = numba.njit(_tree_scores)
+    _kernel_block = numba.njit(_tree_block)
+
+
+def open_sense_trees(sememe_similarity, sense_nos, core_fingerprint, snapshot_name="similarity.snap"):
+    """Open the flat sense trees `~/.openhownet/snapshot/similarity.snap`, memory-mapped.
+    The trees are converted from the pickled sense_tree resource by `compile_similarity`
+    if the snapshot is missing or out of date.
+
+    Args:
+        sememe_similarity (`SememeSimilarity`): the sememe similarity to compile the trees with.
+        sense_nos (`list[str]`): the sense numbers in the order of the sense IDs.
+        core_fingerprint (`str`): the fingerprint of the core resources the sense IDs come from.
+        snapshot_name (`str`): the file name of the snapshot, one for each kind of sememe similarity.
+
+    Returns:
+        (`FlatSenseTrees`) the sense trees.
+
+    Raises:
+        FileNotFoundError: the resource files are missing.
+    """
+    fingerprint = resource_fingerprint(get_resource_paths(
+        SIMILARITY_RESOURCES), core_fingerprint, sememe_similarity.fingerprint)
+    snapshot_path = get_snapshot_path(snapshot_name)
+    try:
+        snapshot = Snapshot(snapshot_path, fingerprint)
+        # The snapshots written before the classes were compiled are rebuilt.
+        if 'sense_class' in snapshot:
+            return FlatSenseTrees(snapshot, sememe_similarity.matrix)
+        snapshot.close()
+    except SnapshotError:
+        pass
+    with get_resource(os.path.join("resources", "sense_tree"), "rb") as f:
+        sense_tree_dic = pickle.load(f)
+    sections = compile_similarity(sememe_similarity, sense_tree_dic, sense_nos)
+    del sense_tree_dic
+    try:
+        write_snapshot(snapshot_path, sections, fingerprint)
+        sections = Snapshot(snapshot_path, fingerprint)
+    except OSError as e:
+        print("Writing the sense tree snapshot failed:", e)
+    return FlatSenseTrees(sections, sememe_similarity.matrix)
+
+
+# The sense trees of the worker processes, set by `_init_worker`.
+_trees = None
+
+
+def _init_worker(sections, matrix):
+    global _trees
+    _trees = FlatSenseTrees(sections, matrix)
+
+
+def _similarity_chunk(pairs):
+    return [_trees.similarity(a, b) for a, b in pairs]
+
+
+def batch_similarity(trees, pairs, processes=1, chunk_size=10000):
+    """Calculate the similarity of many pairs of (sub)trees.
+
+    Args:
+        trees (`FlatSenseTrees`): the sense trees.
+        pairs (`list[tuple]`): the pairs of root nodes.
+        processes (`int`): the num of the processes, 1 calculates in this process, None uses all the CPUs.
+        chunk_size (`int`): the num of the pairs sent to a process at a time.
+
+    Returns:
+        (`numpy.ndarray`) the similarity of each pair.
+    """
+    if processes == 1 or len(pairs) <= chunk_size:
+        return np.array([trees.similarity(a, b) for a, b in pairs], dtype=np.float64)
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+    res = []
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(trees.sections, trees.matrix)) as pool:
+        for sims in pool.imap(_similarity_chunk, chunks):
+            res.extend(sims)
+    return np.array(res, dtype=np.float64)
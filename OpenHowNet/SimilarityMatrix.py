@@ -0,0 +1,143 @@
+"""
+SimilarityMatrix
+==================
+"""
+import multiprocessing
+import os
+
+import numpy as np
+from tqdm import tqdm
+
+from .Similarity import FlatSenseTrees
+from .Snapshot import Snapshot, SnapshotError, write_snapshot
+
+# The state of the worker processes, set by `_init_worker`.
+_trees = None
+_word_indptr = None
+_word_classes = None
+_path = None
+
+
+def _init_worker(sections, matrix, word_indptr, word_classes, path):
+    global _trees, _word_indptr, _word_classes, _path
+    _trees = FlatSenseTrees(sections, matrix)
+    _word_indptr = word_indptr
+    _word_classes = word_classes
+    _path = path
+
+
+def word_similarity_tile(trees, word_indptr, word_classes, rows, cols):
+    """Calculate the word similarity between two ranges of words.
+
+    The similarity of the distinct tree classes of the words is calculated once, the similarity
+    of two words is the greatest one among the classes of their senses, as `calculate_word_similarity`.
+
+    Args:
+        trees (`FlatSenseTrees`): the sense trees.
+        word_indptr (`numpy.ndarray`), word_classes (`numpy.ndarray`):
+            the tree classes of the i-th word are word_classes[word_indptr[i]:word_indptr[i + 1]].
+        rows (`tuple`), cols (`tuple`): the [start, end) ranges of the words.
+
+    Returns:
+        (`numpy.ndarray`) the similarity of each pair of the words, -1 for the words without a sense tree.
+    """
+    res = np.full((rows[1] - rows[0], cols[1] - cols[0]), -1.0, dtype=np.float64)
+    parts = []
+    for start, end in [rows, cols]:
+        indptr = word_indptr[start:end + 1]
+        classes = word_classes[indptr[0]:indptr[-1]]
+        starts = indptr[:-1] - indptr[0]
+        nonempty = indptr[:-1] < indptr[1:]
+        parts.append((classes, starts[nonempty], nonempty))
+    (row_classes, row_starts, row_nonempty), (col_classes, col_starts, col_nonempty) = parts
+    if len(row_classes) == 0 or len(col_classes) == 0:
+        return res
+    row_unique, row_inverse = np.unique(row_classes, return_inverse=True)
+    col_unique, col_inverse = np.unique(col_classes, return_inverse=True)
+    sims = trees.class_scores(row_unique, col_unique)
+    sims = np.maximum.reduceat(sims[row_inverse.ravel()], row_starts, axis=0)
+    sims = np.maximum.reduceat(sims[:, col_inverse.ravel()], col_starts, axis=1)
+    res[np.ix_(row_nonempty, col_nonempty)] = sims
+    return res
+
+
+def _build_tile(args):
+    """Calculate a tile and write it to the matrix file.
+    """
+    tile, rows, cols = args
+    sims = word_similarity_tile(_trees, _word_indptr, _word_classes, rows, cols)
+    matrix = np.load(_path, mmap_mode='r+')
+    matrix[rows[0]:rows[1], cols[0]:cols[1]] = sims
+    matrix.flush()
+    del matrix
+    return tile
+
+
+def build_similarity_matrix(path, fingerprint, words, sections, matrix, word_indptr, word_classes,
+                            dtype='float32', tile_size=1024, processes=None):
+    """Calculate the similarity between every pair of words into a memory-mapped .npy file.
+
+    The matrix is calculated in square tiles by a pool of processes, each writing its tiles
+    into the file directly. The finished tiles are recorded in `path + '.tiles.npy'`, so that
+    an interrupted build resumes from them. The words and the fingerprint are kept in
+    `path + '.snap'`, a finished matrix with the same ones is returned without calculation.
+
+    Args:
+        path (`str`): the path of the matrix file.
+        fingerprint (`str`): the fingerprint of the similarity data, the words and the build parameters.
+        words (`list[str]`): the words, in the order of the rows and the columns.
+        sections (`dict`): the sections of the sense trees, see `FlatSenseTrees`.
+        matrix (`numpy.ndarray`): the sememe similarity matrix the sections are compiled with.
+        word_indptr (`numpy.ndarray`), word_classes (`numpy.ndarray`):
+            the tree classes of the i-th word are word_classes[word_indptr[i]:word_indptr[i + 1]].
+        dtype (`str`): the data type of the matrix, float16 or float32.
+        tile_size (`int`): the num of the rows and the columns of a tile.
+        processes (`int`): the num of the processes, default: the num of the CPUs. 1 builds in this process.
+
+    Returns:
+        (`numpy.memmap`) the read-only matrix.
+    """
+    n = len(words)
+    meta_path = path + '.snap'
+    tiles_path = path + '.tiles.npy'
+    try:
+        Snapshot(meta_path, fingerprint).close()
+        done = np.load(tiles_path, mmap_mode='r+') if os.path.exists(tiles_path) else None
+    except (SnapshotError, OSError, ValueError):
+        # Start over, the meta data is written last so that a broken start is not resumed.
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        side = (n + tile_size - 1) // tile_size
+        np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n, n)).flush()
+        done = np.lib.format.open_memmap(tiles_path, mode='w+', dtype=np.uint8, shape=(side * side,))
+        done.flush()
+        write_snapshot(meta_path, {'word': list(words)}, fingerprint)
+
+    if done is not None:
+        side = (n + tile_size - 1) // tile_size
+        tasks = []
+        for i in range(side):
+            for j in range(side):
+                if not done[i * side + j]:
+                    tasks.append((i * side + j, (i * tile_size, min((i + 1) * tile_size, n)),
+                                  (j * tile_size, min((j + 1) * tile_size, n))))
+        word_indptr = np.asarray(word_indptr, dtype=np.int64)
+        word_classes = np.asarray(word_classes, dtype=np.int32)
+        initargs = (sections, matrix, word_indptr, word_classes, path)
+        with tqdm(total=len(done), initial=len(done) - len(tasks), unit='tile',
+                  desc='Building the word similarity matrix') as progress:
+            if processes == 1:
+                _init_worker(*initargs)
+                for task in tasks:
+                    done[_build_tile(task)] = 1
+                    done.flush()
+                    progress.update(1)
+            elif tasks:
+                with multiprocessing.Pool(processes, initializer=_init_worker, initargs=initargs) as pool:
+                    for tile in pool.imap_unordered(_build_tile, tasks):
+                        done[tile] = 1
+                        done.flush()
+                        progress.update(1)
+        del done
+        os.remove(tiles_path)
+    return np.load(path, mmap_mode='r')
@@ -0,0 +1,396 @@
+"""
+Snapshot
+===========
+"""
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from .Download import OPENHOWNET_RESOURCE_PATH
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_MAGIC = b'OHNSNAP\x00'
+# magic, format version, section num, payload crc32, source fingerprint
+_HEADER = struct.Struct('<8sIII40s')
+# section name, numpy dtype, byte offset in the payload, item num
+_SECTION = struct.Struct('<32s8sQQ')
+_ALIGN = 8
+# The resource files up to this size are fingerprinted by their contents as well.
+_HASHED_SIZE = 4 << 20
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is missing, corrupted or out of date.
+    """
+    pass
+
+
+def get_resource_paths(names):
+    """Get the absolute paths of the resource files, check that all of them exist.
+
+    Args:
+        names (`list[str]`): the file names under the resources directory.
+
+    Returns:
+        (`list[str]`) the absolute paths of the files.
+    """
+    paths = [os.path.join(OPENHOWNET_RESOURCE_PATH, "resources", i) for i in names]
+    for name, path in zip(names, paths):
+        if not os.path.exists(path):
+            raise FileNotFoundError(str(
+                "Important data file \"{}\" lost, please run `OpenHowNet.download()`."
+            ).format(os.path.join("resources", name)))
+    return paths
+
+
+def get_snapshot_path(name):
+    """Get the path of a snapshot file under `~/.openhownet/snapshot`.
+    """
+    return os.path.join(OPENHOWNET_RESOURCE_PATH, "snapshot", name)
+
+
+def resource_fingerprint(paths, *extra):
+    """Fingerprint a group of resource files by their names, sizes and modification times,
+    and by the contents of the files no larger than 4 MiB, which catches an edit keeping the size
+    and the modification time.
+
+    Args:
+        paths (`list[str]`): the absolute paths of the resource files.
+        extra (`str`): other fingerprints the result depends on.
+
+    Returns:
+        (`str`) the hex digest which changes whenever one of the files is modified.
+    """
+    digest = hashlib.sha1(str(SNAPSHOT_VERSION).encode('utf-8'))
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(struct.pack('<QQ', stat.st_size, stat.st_mtime_ns))
+        if stat.st_size <= _HASHED_SIZE:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    for e in extra:
+        digest.update(e.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def encode_strings(strings):
+    """Encode a list of strings into a '\\0' separated utf-8 blob and its offsets.
+
+    Returns:
+        (`tuple`) the uint8 blob and the int64 offsets, the i-th string is
+        blob[offsets[i]:offsets[i + 1] - 1].
+    """
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(s) + 1 for s in encoded])
+    blob = np.frombuffer(b''.join(s + b'\x00' for s in encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def write_snapshot(path, sections, fingerprint):
+    """Write the sections into a snapshot file.
+    The file is written to a temporary path first and then moved into place,
+    so that readers never see a half-written snapshot.
+
+    Args:
+        path (`str`): the target snapshot path.
+        sections (`dict`):
+            section name -> numpy array, or section name -> list of strings
+            which is stored as a string table.
+        fingerprint (`str`): the fingerprint of the source resources.
+    """
+    arrays = []
+    for name, value in sections.items():
+        if isinstance(value, np.ndarray):
+            arrays.append((name, value))
+        else:
+            blob, offsets = encode_strings(value)
+            arrays.append((name + '.blob', blob))
+            arrays.append((name + '.offsets', offsets))
+
+    table = []
+    payload = []
+    offset = 0
+    for name, array in arrays:
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        table.append(_SECTION.pack(name.encode('utf-8'), array.dtype.str.encode('ascii'),
+                                   offset, array.size))
+        padding = -len(data) % _ALIGN
+        payload.append(data + b'\x00' * padding)
+        offset += len(data) + padding
+
+    crc = 0
+    for data in payload:
+        crc = zlib.crc32(data, crc)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(table),
+                          crc, fingerprint.encode('ascii'))
+
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.writelines(table)
+            f.write(b'\x00' * (-(len(header) + _SECTION.size * len(table)) % _ALIGN))
+            f.writelines(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Snapshot(object):
+    """A read-only snapshot file mapped into memory.
+    Every section is exposed as a numpy array backed by the mapping, so that
+    opening a snapshot costs almost nothing and the pages are shared by all
+    the processes that open the same file.
+
+    Example::
+
+        >>> snapshot = Snapshot(path, fingerprint)
+        >>> snapshot['sememe_freq']
+        >>> snapshot.strings('sememe')
+    """
+
+    def __init__(self, path, fingerprint=None, verify=True):
+        """Open and validate a snapshot file.
+
+        Args:
+            path (`str`): the snapshot path.
+            fingerprint (`str`):
+                the expected fingerprint of the source resources, skip the check if None.
+            verify (`bool`): whether to verify the payload checksum.
+
+        Raises:
+            SnapshotError: the snapshot is missing, corrupted, of another version or out of date.
+        """
+        self.path = path
+        try:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError("Cannot open snapshot \"{}\": {}".format(path, e))
+
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError("Snapshot \"{}\" is truncated.".format(path))
+        magic, version, section_num, crc, source = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("\"{}\" is not an OpenHowNet snapshot.".format(path))
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError("Snapshot \"{}\" has version {}, expected {}.".format(
+                path, version, SNAPSHOT_VERSION))
+        self.fingerprint = source.decode('ascii')
+        if fingerprint is not None and self.fingerprint != fingerprint:
+            raise SnapshotError(
+                "Snapshot \"{}\" is out of date with the resources.".format(path))
+
+        table_end = _HEADER.size + _SECTION.size * section_num
+        payload_start = table_end + (-table_end % _ALIGN)
+        if len(self._mmap) < payload_start:
+            raise SnapshotError("Snapshot \"{}\" is truncated.".format(path))
+        if verify and zlib.crc32(memoryview(self._mmap)[payload_start:]) != crc:
+            raise SnapshotError("Snapshot \"{}\" is corrupted.".format(path))
+
+        self._sections = {}
+        for i in range(section_num):
+            name, dtype, offset, count = _SECTION.unpack_from(
+                self._mmap, _HEADER.size + _SECTION.size * i)
+            self._sections[name.rstrip(b'\x00').decode('utf-8')] = (
+                np.dtype(dtype.rstrip(b'\x00').decode('ascii')), payload_start + offset, count)
+        self._cache = {}
+
+    def __getstate__(self):
+        """Pickle the snapshot by its path, so that a worker process maps the same file.
+        """
+        return {'path': self.path, 'fingerprint': self.fingerprint}
+
+    def __setstate__(self, state):
+        # The snapshot has been validated by the pickling process.
+        self.__init__(state['path'], state['fingerprint'], verify=False)
+
+    def __contains__(self, name):
+        return name in self._sections or name + '.blob' in self._sections
+
+    def __getitem__(self, name):
+        """Get a section as a read-only numpy array backed by the mapping.
+        """
+        if name not in self._cache:
+            if name not in self._sections:
+                raise KeyError(name)
+            dtype, offset, count = self._sections[name]
+            self._cache[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=offset)
+        return self._cache[name]
+
+    def string_num(self, name):
+        """Get the num of the strings in a string table.
+        """
+        return len(self[name + '.offsets']) - 1
+
+    def string(self, name, index):
+        """Decode a single string from a string table without touching the others.
+        """
+        offsets = self[name + '.offsets']
+        start = self._sections[name + '.blob'][1] + int(offsets[index])
+        end = self._sections[name + '.blob'][1] + int(offsets[index + 1]) - 1
+        return self._mmap[start:end].decode('utf-8')
+
+    def find(self, name, substring):
+        """Find the strings of a string table containing the substring.
+        The search runs over the mapped blob directly and decodes nothing but the matches.
+
+        Returns:
+            (`list[int]`) the indices of the matched strings, in ascending order.
+        """
+        if '\x00' in substring:
+            return []
+        offsets = self[name + '.offsets']
+        base = self._sections[name + '.blob'][1]
+        end = base + int(offsets[-1])
+        target = substring.encode('utf-8')
+        res = []
+        pos = self._mmap.find(target, base, end)
+        while pos != -1:
+            index = int(np.searchsorted(offsets, pos - base, side='right')) - 1
+            res.append(index)
+            # Continue from the next string.
+            pos = self._mmap.find(target, base + int(offsets[index + 1]), end)
+        return res
+
+    def search(self, name, string):
+        """Binary search a string in a string table by the permutation section `<name>_order`,
+        which sorts the table.
+
+        Returns:
+            (`int`) the index of the string in the table, -1 if not found.
+        """
+        order = self[name + '_order']
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            s = self.string(name, int(order[mid]))
+            if s < string:
+                lo = mid + 1
+            elif s > string:
+                hi = mid
+            else:
+                return int(order[mid])
+        return -1
+
+    def strings(self, name):
+        """Decode a whole string table.
+
+        Returns:
+            (`list[str]`) the strings in the table.
+        """
+        blob = self[name + '.blob']
+        if len(blob) == 0:
+            return []
+        return blob.tobytes()[:-1].decode('utf-8').split('\x00')
+
+    def close(self):
+        """Release the mapping. Arrays taken from the snapshot must not be used afterwards.
+
+        Raises:
+            BufferError: some arrays taken from the snapshot are still referenced,
+                the mapping stays open then.
+        """
+        self._cache = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            raise BufferError("Snapshot \"{}\" is still referenced by some arrays.".format(self.path))
+
+
+def compile_hownet_dict(hownet_dict):
+    """Flatten the core data of a HowNetDict into snapshot sections.
+    All the strings of the senses go into one deduplicated string table,
+    sememes, relations and senses are referred to by their integer IDs.
+
+    Args:
+        hownet_dict (`HowNetDict`): the initialized HowNetDict.
+
+    Returns:
+        (`dict`) the sections to write by `write_snapshot`.
+    """
+    pool = {}
+
+    def intern(s):
+        if s not in pool:
+            pool[s] = len(pool)
+        return pool[s]
+
+    sememe_names = list(hownet_dict.sememe_dic.keys())
+    sememe_index = {k: i for i, k in enumerate(sememe_names)}
+    relation_names = []
+    relation_index = {}
+    head, rel, tail = [], [], []
+    for k, sememe in hownet_dict.sememe_dic.items():
+        for r, targets in sememe.related_sememes.items():
+            if r not in relation_index:
+                relation_index[r] = len(relation_names)
+                relation_names.append(r)
+            for t in targets:
+                head.append(sememe_index[k])
+                rel.append(relation_index[r])
+                tail.append(sememe_index[t.en_zh])
+
+    sense_index = {}
+    fields = {'en_word': [], 'en_grammar': [],
+              'zh_word': [], 'zh_grammar': [], 'Def': []}
+    sememe_indptr = [0]
+    sememe_indices = []
+    for k, sense in hownet_dict.sense_dic.items():
+        sense_index[k] = len(sense_index)
+        for field, ids in fields.items():
+            ids.append(intern(getattr(sense, field)))
+        sememe_indices.extend(sememe_index[s.en_zh] for s in sense.sememes)
+        sememe_indptr.append(len(sememe_indices))
+
+    sections = {
+        'sememe': sememe_names,
+        'sememe_freq': np.array([s.freq for s in hownet_dict.sememe_dic.values()], dtype=np.int64),
+        'relation': relation_names,
+        'relation_head': np.array(head, dtype=np.int32),
+        'relation_type': np.array(rel, dtype=np.int32),
+        'relation_tail': np.array(tail, dtype=np.int32),
+        'sense_sememe_indptr': np.array(sememe_indptr, dtype=np.int64),
+        'sense_sememe_indices': np.array(sememe_indices, dtype=np.int32),
+    }
+    for field, ids in fields.items():
+        sections['sense_' + field] = np.array(ids, dtype=np.int32)
+
+    # The sense numbers and the words get their own string tables, so that they can be
+    # searched in place. The `_order` permutations sort the tables for binary search.
+    sense_nos = list(hownet_dict.sense_dic.keys())
+    sections['sense_no'] = sense_nos
+    sections['sense_no_order'] = np.array(
+        sorted(range(len(sense_nos)), key=lambda i: sense_nos[i]), dtype=np.int32)
+    for language, word_map in [('en', hownet_dict.en_map), ('zh', hownet_dict.zh_map)]:
+        words = list(word_map.keys())
+        indptr = [0]
+        indices = []
+        for w in words:
+            indices.extend(sense_index[s.No] for s in word_map[w])
+            indptr.append(len(indices))
+        sections[language + '_word'] = words
+        sections[language + '_word_order'] = np.array(
+            sorted(range(len(words)), key=lambda i: words[i]), dtype=np.int32)
+        sections[language + '_word_indptr'] = np.array(indptr, dtype=np.int64)
+        sections[language + '_word_senses'] = np.array(indices, dtype=np.int32)
+
+    strings = [None] * len(pool)
+    for s, i in pool.items():
+        strings[i] = s
+    sections['strings'] = strings
+    return sections
@@ -0,0 +1,92 @@
+"""
+SubstringIndex Class
+======================
+"""
+import numpy as np
+
+
+class SubstringIndex(object):
+    """Character n-gram inverted index for substring search over a vocabulary.
+
+    Every key is indexed by its characters and its character bigrams. A query is
+    answered by the shortest posting list among the grams of the query, whose keys
+    are then checked by `in`, so the cost follows the num of the candidates instead
+    of the size of the vocabulary.
+
+    Example::
+
+        >>> index = SubstringIndex(['apple', 'pineapple', 'pear'])
+        >>> list(index.search('apple'))
+        [0, 1]
+    """
+
+    def __init__(self, keys):
+        """Build the index.
+
+        Args:
+            keys (`iterable[str]`): the vocabulary, the keys are referred to by their positions.
+                A dict is indexed by its keys.
+        """
+        self.keys = list(keys)
+        postings = dict()
+        for i, k in enumerate(self.keys):
+            grams = set(k)
+            grams.update(k[j:j + 2] for j in range(len(k) - 1))
+            for g in grams:
+                if g not in postings:
+                    postings[g] = []
+                postings[g].append(i)
+        self.__postings = {g: np.array(v, dtype=np.int32)
+                           for g, v in postings.items()}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __candidates(self, word):
+        """Get the shortest posting list among the grams of the word, None if the word is empty.
+        """
+        if len(word) == 1:
+            grams = [word]
+        else:
+            grams = [word[j:j + 2] for j in range(len(word) - 1)]
+        candidates = None
+        for g in grams:
+            posting = self.__postings.get(g)
+            if posting is None:
+                return np.zeros(0, dtype=np.int32)
+            if candidates is None or len(posting) < len(candidates):
+                candidates = posting
+        return candidates
+
+    def candidate_num(self, word):
+        """Get the num of the keys to check for the word, an upper bound of the num of the matches.
+        """
+        if not word:
+            return len(self.keys)
+        return len(self.__candidates(word))
+
+    def search(self, word):
+        """Find the keys containing the word.
+
+        Args:
+            word (`str`): the substring to search for.
+
+        Returns:
+            (`iterator[int]`) the positions of the matched keys in ascending order.
+            The keys are checked lazily, so stopping early saves the rest of the work.
+        """
+        if not word:
+            return iter(range(len(self.keys)))
+        candidates = self.__candidates(word).tolist()
+        if len(word) <= 2:
+            return iter(candidates)
+        keys = self.keys
+        return (i for i in candidates if word in keys[i])
+
+    def find(self, word):
+        """Find the keys containing the word.
+
+        Returns:
+            (`list[str]`) the matched keys in the order of the vocabulary.
+        """
+        return [self.keys[i] for i in self.search(word)]
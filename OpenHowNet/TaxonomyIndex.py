@@ -0,0 +1,199 @@
+"""
+TaxonomyIndex Class
+=====================
+"""
+import numpy as np
+
+# The parameter of the sememe similarity alpha / (alpha + distance), see `TaxonomyIndex.similarity`.
+TAXONOMY_ALPHA = 1.6
+
+
+class TaxonomyIndex(object):
+    """Constant-time queries over the hypernym taxonomy of the sememes.
+
+    The taxonomy is a forest, each sememe has at most one hypernym. The roots are joined
+    under a virtual root, and the tree is walked once into an Euler tour: the lowest common
+    ancestor of two nodes is the shallowest node visited between their first visits, found
+    in constant time by a sparse table over the tour. A node is an ancestor of another if its
+    visit interval covers the other's.
+
+    Attributes:
+        parents (`numpy.ndarray`): the hypernym of each sememe, -1 for the roots.
+        depths (`numpy.ndarray`): the depth of each sememe, 0 for the roots.
+
+    Example::
+
+        >>> index = TaxonomyIndex([-1, 0, 0, 1])
+        >>> index.lca(3, 2)
+        0
+        >>> index.distance(3, 2)
+        3
+    """
+
+    def __init__(self, parents):
+        """Build the index.
+
+        Args:
+            parents (`list[int]`): the hypernym of each sememe by `Sememe.id`, -1 for the roots.
+                A hypernym closing a cycle is dropped.
+        """
+        parents = [int(p) for p in parents]
+        n = len(parents)
+        # Drop the hypernyms closing cycles, so that every path leads to a root.
+        state = [0] * n  # 0: unvisited, 1: on the current path, 2: done
+        for i in range(n):
+            path = []
+            j = i
+            while j != -1 and state[j] == 0:
+                state[j] = 1
+                path.append(j)
+                j = parents[j]
+            if j != -1 and state[j] == 1:
+                parents[path[-1]] = -1
+            for j in path:
+                state[j] = 2
+        self.parents = np.array(parents, dtype=np.int32)
+
+        children = [[] for _ in range(n + 1)]
+        for i, p in enumerate(parents):
+            children[p if p != -1 else n].append(i)
+
+        # The Euler tour from the virtual root n, whose depth is -1.
+        depths = [0] * (n + 1)
+        depths[n] = -1
+        euler = []
+        first = [0] * (n + 1)
+        last = [0] * (n + 1)
+        stack = [(n, 0)]
+        while stack:
+            node, k = stack.pop()
+            if k == 0:
+                first[node] = len(euler)
+            euler.append(node)
+            if k < len(children[node]):
+                stack.append((node, k + 1))
+                child = children[node][k]
+                depths[child] = depths[node] + 1
+                stack.append((child, 0))
+            else:
+                last[node] = len(euler) - 1
+        self.depths = np.array(depths[:n], dtype=np.int32)
+        self.__root = n
+        self.__euler = np.array(euler, dtype=np.int32)
+        self.__euler_depths = np.array(depths, dtype=np.int32)[self.__euler]
+        self.__first = np.array(first, dtype=np.int64)
+        self.__last = np.array(last, dtype=np.int64)
+
+        # table[j][i] is the position of the shallowest node in euler[i:i + 2 ** j].
+        self.__table = [np.arange(len(euler), dtype=np.int32)]
+        width = 1
+        while 2 * width <= len(euler):
+            prev = self.__table[-1]
+            left, right = prev[:len(prev) - width], prev[width:]
+            self.__table.append(np.where(
+                self.__euler_depths[right] < self.__euler_depths[left], right, left))
+            width *= 2
+
+    def __len__(self):
+        return len(self.parents)
+
+    def depth(self, a):
+        """Get the depth of a sememe, 0 for the roots.
+        """
+        return int(self.depths[a])
+
+    def ancestors(self, a):
+        """Get the hypernyms of a sememe up to its root.
+
+        Returns:
+            (`list[int]`) the IDs from the hypernym of the sememe to the root.
+        """
+        res = []
+        a = int(self.parents[a])
+        while a != -1:
+            res.append(a)
+            a = int(self.parents[a])
+        return res
+
+    def is_ancestor(self, a, b):
+        """Check whether the sememe a is b or one of the hypernyms of b.
+        """
+        return bool(self.__first[a] <= self.__first[b] and self.__last[b] <= self.__last[a])
+
+    def lca_many(self, a, b):
+        """Get the lowest common ancestors of many pairs of sememes.
+
+        Args:
+            a (`numpy.ndarray`), b (`numpy.ndarray`): the IDs of the pairs.
+
+        Returns:
+            (`numpy.ndarray`) the lowest common ancestor of each pair, -1 if they are in different trees.
+        """
+        i, j = self.__first[a], self.__first[b]
+        start, end = np.minimum(i, j), np.maximum(i, j) + 1
+        # The exponent of the float is the bit length.
+        level = np.frexp((end - start).astype(np.float64))[1].astype(np.int64) - 1
+        res = np.empty(len(start), dtype=np.int32)
+        for k in np.unique(level).tolist():
+            mask = level == k
+            left = self.__table[k][start[mask]]
+            right = self.__table[k][end[mask] - (1 << k)]
+            pos = np.where(self.__euler_depths[right] < self.__euler_depths[left], right, left)
+            res[mask] = self.__euler[pos]
+        res[res == self.__root] = -1
+        return res
+
+    def lca(self, a, b):
+        """Get the lowest common ancestor of two sememes.
+
+        Returns:
+            (`int`) the ID of the lowest common ancestor, -1 if they are in different trees.
+        """
+        i, j = int(self.__first[a]), int(self.__first[b])
+        if i > j:
+            i, j = j, i
+        k = (j + 1 - i).bit_length() - 1
+        left = int(self.__table[k][i])
+        right = int(self.__table[k][j + 1 - (1 << k)])
+        pos = right if self.__euler_depths[right] < self.__euler_depths[left] else left
+        node = int(self.__euler[pos])
+        return -1 if node == self.__root else node
+
+    def distance(self, a, b):
+        """Get the num of the hypernym edges on the path between two sememes.
+
+        Returns:
+            (`int`) the distance, None if they are in different trees.
+        """
+        c = self.lca(a, b)
+        if c == -1:
+            return None
+        return int(self.depths[a] + self.depths[b] - 2 * self.depths[c])
+
+    def similarity(self, a, b, alpha=TAXONOMY_ALPHA):
+        """Calculate the similarity between two sememes by their distance in the taxonomy,
+        alpha / (alpha + distance), 0 if they are in different trees.
+        """
+        d = self.distance(a, b)
+        if d is None:
+            return 0.0
+        return alpha / (alpha + d)
+
+    def similarity_matrix(self, alpha=TAXONOMY_ALPHA, chunk_size=256):
+        """Calculate the similarity between every pair of sememes, see `similarity`.
+
+        Returns:
+            (`numpy.ndarray`) the float64 similarity matrix indexed by `Sememe.id`.
+        """
+        n = len(self.parents)
+        res = np.zeros((n, n), dtype=np.float64)
+        b = np.arange(n)
+        for start in range(0, n, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, n))
+            a = np.repeat(rows, n)
+            bb = np.tile(b, len(rows))
+            c = self.lca_many(a, bb)
+            connected = c != -1
+            d = self.depths[a] + self.depths[bb] - 2 * self.depths[np.maximum(c, 0)]
+            res[rows] = np.where(connected, alpha / (alpha + d), 0.0).reshape(len(rows), n)
+        return res
@@ -0,0 +1,225 @@
+"""
+Trie Class
+============
+"""
+import heapq
+from bisect import bisect_left
+
+import numpy as np
+
+from .SubstringIndex import SubstringIndex
+
+# Sorts after any character of the keys, so that prefix + MAX_CHAR bounds the keys with the prefix.
+MAX_CHAR = '\U0010ffff'
+
+
+class Trie(object):
+    """Prefix trie over a vocabulary with scores, for ranked completion and typo-tolerant search.
+
+    The trie is kept implicitly as the sorted key list: the keys with a prefix form a
+    contiguous range, found by binary search. A sparse table over the scores gives the
+    best key of any range in constant time, so the top-K completions of a prefix cost
+    O(log N + K log K) however many keys share the prefix. The edit-distance search walks
+    the keys in order, sharing the Levenshtein rows of common prefixes and skipping the
+    whole range of a prefix once it is too far from the query. When the query is long enough,
+    the keys sharing a piece of the query are checked instead, as a key within distance d
+    contains at least one of d + 1 disjoint pieces of the query unchanged.
+
+    Example::
+
+        >>> trie = Trie(['apple', 'apply', 'ape'], [3, 5, 1])
+        >>> trie.complete('app')
+        [('apply', 5), ('apple', 3)]
+        >>> trie.fuzzy_search('appel', max_distance=2)
+        [('apply', 2), ('apple', 2), ('ape', 2)]
+    """
+
+    def __init__(self, keys, scores=None):
+        """Build the trie.
+
+        Args:
+            keys (`iterable[str]`): the vocabulary, duplicated keys keep the highest score.
+            scores (`iterable[float]`): the scores of the keys to rank the results, default: all zero.
+        """
+        keys = list(keys)
+        scores = [0] * len(keys) if scores is None else list(scores)
+        best = dict()
+        for k, v in zip(keys, scores):
+            if k not in best or v > best[k]:
+                best[k] = v
+        self.keys = sorted(best)
+        self.scores = np.array([best[k] for k in self.keys])
+        self.__substrings = None
+
+        # table[j][i] is the position of the best key in [i, i + 2 ** j).
+        self.__table = [np.arange(len(self.keys), dtype=np.int32)]
+        width = 1
+        while 2 * width <= len(self.keys):
+            prev = self.__table[-1]
+            left, right = prev[:len(prev) - width], prev[width:]
+            self.__table.append(
+                np.where(self.scores[right] > self.scores[left], right, left))
+            width *= 2
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def prefix_range(self, prefix):
+        """Get the range of the keys with the prefix.
+
+        Returns:
+            (`tuple`) [start, end) of the positions in `keys`.
+        """
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + MAX_CHAR, start)
+        return start, end
+
+    def __best(self, start, end):
+        """Get the position of the best key in [start, end), the first one in case of a tie.
+        """
+        j = (end - start).bit_length() - 1
+        a = int(self.__table[j][start])
+        b = int(self.__table[j][end - (1 << j)])
+        if self.scores[b] > self.scores[a] or (self.scores[b] == self.scores[a] and b < a):
+            return b
+        return a
+
+    def complete(self, prefix, K=10):
+        """Get the K best keys with the prefix.
+
+        Args:
+            prefix (`str`): the prefix typed so far.
+            K (`int`): the num of the results.
+
+        Returns:
+            (`list[tuple]`) (key, score) pairs in descending order of the score, ties in the order of the keys.
+        """
+        start, end = self.prefix_range(prefix)
+        res = []
+        heap = []
+        if start < end:
+            i = self.__best(start, end)
+            heap.append((-self.scores[i], i, start, end))
+        while heap and len(res) < K:
+            score, i, start, end = heapq.heappop(heap)
+            res.append((self.keys[i], self.scores[i].item()))
+            for s, e in [(start, i), (i + 1, end)]:
+                if s < e:
+                    j = self.__best(s, e)
+                    heapq.heappush(heap, (-self.scores[j], j, s, e))
+        return res
+
+    def fuzzy_search(self, word, max_distance=1, K=None):
+        """Get the keys within an edit distance (Levenshtein distance) of the word.
+
+        Args:
+            word (`str`): the (possibly misspelled) word.
+            max_distance (`int`): the max num of inserted, deleted or substituted characters.
+            K (`int`): the max num of the results, default: None (all).
+
+        Returns:
+            (`list[tuple]`) (key, distance) pairs in ascending order of the distance,
+            ties in descending order of the score and then in the order of the keys.
+        """
+        found = None
+        if len(word) > max_distance:
+            found = self.__search_pieces(word, max_distance)
+        if found is None:
+            found = self.__walk(word, max_distance)
+        found.sort()
+        if K is not None:
+            found = found[:K]
+        return [(self.keys[i], distance) for distance, score, i in found]
+
+    def __search_pieces(self, word, max_distance):
+        """Check the keys containing one of the max_distance + 1 pieces of the word.
+
+        Returns:
+            (`list[tuple]`) (distance, -score, position) of the matched keys,
+            None if the pieces are too common for the check to pay off.
+        """
+        if self.__substrings is None:
+            self.__substrings = SubstringIndex(self.keys)
+        n = len(word)
+        bounds = [n * j // (max_distance + 1) for j in range(max_distance + 2)]
+        pieces = [word[bounds[j]:bounds[j + 1]] for j in range(max_distance + 1)]
+        if 2 * sum(self.__substrings.candidate_num(p) for p in pieces) > len(self.keys):
+            return None
+        candidates = set()
+        for p in pieces:
+            candidates.update(self.__substrings.search(p))
+        found = []
+        for i in candidates:
+            distance = edit_distance(word, self.keys[i], max_distance)
+            if distance <= max_distance:
+                found.append((distance, -self.scores[i], i))
+        return found
+
+    def __walk(self, word, max_distance):
+        """Walk the trie in order, pruning the prefixes too far from the word.
+
+        Returns:
+            (`list[tuple]`) (distance, -score, position) of the matched keys.
+        """
+        keys = self.keys
+        n = len(word)
+        rows = [list(range(n + 1))]  # rows[d] is the Levenshtein row of the first d characters
+        prev = ''  # the prefix the rows stand for
+        found = []
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            common = 0
+            limit = min(len(prev), len(key))
+            while common < limit and prev[common] == key[common]:
+                common += 1
+            del rows[common + 1:]
+            pruned = False
+            for d in range(common, len(key)):
+                c = key[d]
+                row = rows[-1]
+                new = [row[0] + 1]
+                for j in range(1, n + 1):
+                    new.append(min(new[j - 1] + 1, row[j] + 1,
+                                   row[j - 1] + (word[j - 1] != c)))
+                rows.append(new)
+                if min(new) > max_distance:
+                    # No key with this prefix can get closer.
+                    prev = key[:d + 1]
+                    i = bisect_left(keys, prev + MAX_CHAR, i)
+                    pruned = True
+                    break
+            if pruned:
+                continue
+            if rows[-1][n] <= max_distance:
+                found.append((rows[-1][n], -self.scores[i], i))
+            prev = key
+            i += 1
+        return found
+
+
+def edit_distance(a, b, max_distance=None):
+    """Calculate the Levenshtein distance between two strings.
+
+    Args:
+        a (`str`), b (`str`): the strings.
+        max_distance (`int`): stop early once the distance exceeds it.
+
+    Returns:
+        (`int`) the distance, or max_distance + 1 if it exceeds max_distance.
+    """
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        new = [i]
+        for j, cb in enumerate(b, 1):
+            new.append(min(new[j - 1] + 1, row[j] + 1, row[j - 1] + (ca != cb)))
+        if max_distance is not None and min(new) > max_distance:
+            return max_distance + 1
+        row = new
+    return row[-1]
@@ -0,0 +1,138 @@
+"""
+TripleStore Class
+===================
+"""
+import numpy as np
+
+# The orderings of the triples, each a permutation of the (head, relation, tail) columns.
+SPO, POS, OSP = (0, 1, 2), (1, 2, 0), (2, 0, 1)
+
+
+class TripleStore(object):
+    """Indexed store of (head, relation, tail) triples over integer IDs.
+
+    The triples are kept sorted in three orderings: SPO (head, relation, tail),
+    POS (relation, tail, head) and OSP (tail, head, relation). Any pattern with some of
+    the three bound is a prefix of one of them, so its triples form a contiguous range,
+    found by a binary search over the ordering's packed 64-bit keys. The columns of each
+    ordering are stored in that order, so the matched triples are views without copying.
+
+    Attributes:
+        relation_names (`list[str]`): the name of each relation ID.
+        relation_index (`dict`): relation name -> ID.
+        heads (`numpy.ndarray`), relations (`numpy.ndarray`), tails (`numpy.ndarray`):
+            the distinct triples in SPO order, read-only.
+
+    Example::
+
+        >>> store = TripleStore([0, 1], [0, 1], [1, 0], ['hypernym', 'hyponym'], node_num=2)
+        >>> store.match(relation='hyponym')
+        (array([1], dtype=int32), array([1], dtype=int32), array([0], dtype=int32))
+    """
+
+    def __init__(self, heads, relations, tails, relation_names, node_num):
+        """Build the store, duplicated triples are kept once.
+
+        Args:
+            heads (`array_like`), relations (`array_like`), tails (`array_like`):
+                the columns of the triples, relations[i] indexes relation_names.
+            relation_names (`list[str]`): the name of each relation ID.
+            node_num (`int`): the num of the nodes, every head and tail is less than it.
+        """
+        self.relation_names = list(relation_names)
+        self.relation_index = {r: i for i, r in enumerate(self.relation_names)}
+        columns = [np.asarray(heads, dtype=np.int64), np.asarray(relations, dtype=np.int64),
+                   np.asarray(tails, dtype=np.int64)]
+        self.__sizes = (max(node_num, 1), max(len(self.relation_names), 1), max(node_num, 1))
+        keys = self.__pack(SPO, columns)
+        keys, first = np.unique(keys, return_index=True)
+        columns = [c[first] for c in columns]
+
+        # ordering -> (keys, the columns permuted in the ordering, all read-only)
+        self.__orderings = dict()
+        for ordering in (SPO, POS, OSP):
+            keys = self.__pack(ordering, columns)
+            order = np.argsort(keys, kind='stable')
+            sorted_columns = tuple(columns[c][order].astype(np.int32) for c in range(3))
+            sorted_keys = keys[order]
+            for a in sorted_columns + (sorted_keys,):
+                a.flags.writeable = False
+            self.__orderings[ordering] = (sorted_keys, sorted_columns)
+        self.heads, self.relations, self.tails = self.__orderings[SPO][1]
+
+    def __len__(self):
+        return len(self.heads)
+
+    def __pack(self, ordering, values):
+        """Pack the values of the columns into the keys of an ordering, the major column first.
+        """
+        a, b, c = ordering
+        return (values[a] * self.__sizes[b] + values[b]) * self.__sizes[c] + values[c]
+
+    def __range(self, ordering, prefix):
+        """Get the [start, end) range of the triples with the prefix in an ordering.
+        """
+        keys = self.__orderings[ordering][0]
+        low = list(prefix) + [0] * (3 - len(prefix))
+        sizes = [self.__sizes[c] for c in ordering]
+        start = (low[0] * sizes[1] + low[1]) * sizes[2] + low[2]
+        width = 1
+        for s in sizes[len(prefix):]:
+            width *= s
+        return (int(np.searchsorted(keys, start, side='left')),
+                int(np.searchsorted(keys, start + width, side='left')))
+
+    def match(self, head=None, relation=None, tail=None):
+        """Get the triples matching a pattern, None matches anything.
+
+        Args:
+            head (`int`): the head ID.
+            relation (`int` or `str`): the relation ID or name.
+            tail (`int`): the tail ID.
+
+        Returns:
+            (`tuple`) the head, relation and tail arrays of the matched triples, read-only views
+            in the order of the ordering serving the pattern.
+        """
+        if isinstance(relation, str):
+            if relation not in self.relation_index:
+                empty = np.zeros(0, dtype=np.int32)
+                return empty, empty, empty
+            relation = self.relation_index[relation]
+        bound = [head, relation, tail]
+        if head is not None:
+            ordering = SPO if relation is not None or tail is None else OSP
+        elif relation is not None:
+            ordering = POS
+        else:
+            ordering = OSP
+        prefix = []
+        for c in ordering:
+            if bound[c] is None:
+                break
+            prefix.append(int(bound[c]))
+        start, end = self.__range(ordering, prefix)
+        columns = self.__orderings[ordering][1]
+        return tuple(columns[c][start:end] for c in range(3))
+
+    def relations_between(self, head, tail):
+        """Get the relations from head to tail.
+
+        Returns:
+            (`list[str]`) the relation names in the order of their IDs.
+        """
+        return [self.relation_names[r] for r in self.match(head=head, tail=tail)[1].tolist()]
+
+    def edges(self, relation=None):
+        """Export the relation graph as edge arrays, e.g. to build a sparse adjacency matrix.
+
+        Args:
+            relation (`int` or `str`): keep the edges of a relation only, default: all the edges.
+
+        Returns:
+            (`tuple`) the head, relation and tail arrays, read-only views of the store.
+            All the edges are in SPO order, the edges of a relation in the order of the tails.
+        """
+        if relation is None:
+            return self.heads, self.relations, self.tails
+        return self.match(relation=relation)
@@ -0,0 +1,171 @@
+"""
+WordMatcher Class
+===================
+"""
+
+# The bits of a character in a transition key, enough for any Unicode code point.
+CHAR_BITS = 21
+
+
+def _is_alnum(c):
+    """Check whether a character is an ASCII letter or digit, which must not be split by a match.
+    """
+    return c < '\x80' and c.isalnum()
+
+
+class WordMatcher(object):
+    """Aho-Corasick automaton over a vocabulary, finding all the words in a text in one pass.
+
+    The trie transitions are kept in one dict keyed by (state << CHAR_BITS) | ord(char), which
+    is much more compact than a dict per state. Each state links to the longest proper suffix
+    which is also in the trie (failure link) and to the longest one which is a word (output link),
+    so the words ending at a position are listed by following the output links.
+
+    A word starting or ending with an ASCII letter or digit only matches as a whole
+    word, e.g. 'cat' is not found in 'concatenate'.
+
+    The maximum matching segmentations are read off the matches: the forward one takes the
+    longest word starting at each position, the backward one the longest word ending at each
+    position, and the bidirectional one the better of the two.
+
+    Example::
+
+        >>> matcher = WordMatcher(['中国', '国人', '中国人', '人民'])
+        >>> [(s, e, matcher.words[i]) for s, e, i in matcher.find_all('中国人民')]
+        [(0, 2, '中国'), (0, 3, '中国人'), (1, 3, '国人'), (2, 4, '人民')]
+        >>> matcher.segment('中国人民', mode='forward')
+        [(0, 3, 2), (3, 4, -1)]
+    """
+
+    def __init__(self, words):
+        """Build the automaton.
+
+        Args:
+            words (`iterable[str]`): the vocabulary, the empty and duplicated words are dropped.
+        """
+        self.words = [w for w in dict.fromkeys(words) if w]
+        goto = dict()
+        depth = [0]
+        word = [-1]
+        children = [[]]
+        for i, w in enumerate(self.words):
+            s = 0
+            for c in w:
+                key = s << CHAR_BITS | ord(c)
+                t = goto.get(key)
+                if t is None:
+                    t = len(depth)
+                    goto[key] = t
+                    depth.append(depth[s] + 1)
+                    word.append(-1)
+                    children.append([])
+                    children[s].append((ord(c), t))
+                s = t
+            word[s] = i
+
+        # The failure and output links in breadth-first order, the links of a state are shallower.
+        fail = [0] * len(depth)
+        output = [0] * len(depth)
+        queue = [t for o, t in children[0]]
+        for s in queue:
+            for o, t in children[s]:
+                f = fail[s]
+                while True:
+                    u = goto.get(f << CHAR_BITS | o)
+                    if u is not None and u != t:
+                        fail[t] = u
+                        break
+                    if f == 0:
+                        break
+                    f = fail[f]
+                output[t] = fail[t] if word[fail[t]] != -1 else output[fail[t]]
+                queue.append(t)
+        self.__goto = goto
+        self.__fail = fail
+        self.__output = output
+        self.__depth = depth
+        self.__word = word
+        self.max_length = max(depth)
+
+    def __len__(self):
+        return len(self.words)
+
+    def find_all(self, text):
+        """Find all the occurrences of the words in the text, overlapping ones included.
+
+        Returns:
+            (`list[tuple]`) (start, end, word ID) of the matches, in ascending order of the end,
+            and of the start for the same end.
+        """
+        goto, fail, output, depth, word = self.__goto, self.__fail, self.__output, self.__depth, self.__word
+        n = len(text)
+        res = []
+        s = 0
+        for i, c in enumerate(text):
+            o = ord(c)
+            while True:
+                t = goto.get(s << CHAR_BITS | o)
+                if t is not None:
+                    s = t
+                    break
+                if s == 0:
+                    break
+                s = fail[s]
+            u = s if word[s] != -1 else output[s]
+            end = i + 1
+            while u:
+                start = end - depth[u]
+                if not ((start > 0 and _is_alnum(text[start]) and _is_alnum(text[start - 1])) or
+                        (end < n and _is_alnum(c) and _is_alnum(text[end]))):
+                    res.append((start, end, word[u]))
+                u = output[u]
+        return res
+
+    def segment(self, text, mode='bidirectional'):
+        """Segment the text by maximum matching, the characters not covered by any word stand alone.
+
+        Args:
+            text (`str`): the text.
+            mode (`str`): 'forward', 'backward' or 'bidirectional' maximum matching. The bidirectional
+                one takes the segmentation with fewer spans, then with fewer single characters,
+                and the backward one in case of a tie.
+
+        Returns:
+            (`list[tuple]`) (start, end, word ID) of the spans in the order of the text, -1 for the single characters not in the vocabulary.
+        """
+        if mode not in ['forward', 'backward', 'bidirectional']:
+            raise ValueError("mode must be one of forward, backward and bidirectional.")
+        n = len(text)
+        # The longest word starting and ending at each position.
+        longest_start = [None] * (n + 1)
+        longest_end = [None] * (n + 1)
+        for start, end, i in self.find_all(text):
+            if longest_start[start] is None or end > longest_start[start][0]:
+                longest_start[start] = (end, i)
+            if longest_end[end] is None:
+                longest_end[end] = (start, i)
+
+        forward = backward = None
+        if mode != 'backward':
+            forward = []
+            i = 0
+            while i < n:
+                end, w = longest_start[i] or (i + 1, -1)
+                forward.append((i, end, w))
+                i = end
+        if mode != 'forward':
+            backward = []
+            j = n
+            while j > 0:
+                start, w = longest_end[j] or (j - 1, -1)
+                backward.append((start, j, w))
+                j = start
+            backward.reverse()
+        if backward is None:
+            return forward
+        if forward is None:
+            return backward
+
+        def cost(spans):
+            return len(spans), sum(1 for s, e, w in spans if e - s == 1)
+        return forward if cost(forward) < cost(backward) else backward
@@ -7,7 +7,11 @@ from __future__ import absolute_import
 
 from .Sense import Sense
 from .Sememe import Sememe
+from .IncidenceMatrix import IncidenceMatrix
 from .HowNetDict import HowNetDict
+from .SharedHowNetDict import SharedHowNetDict
+from .Annotator import Annotator, IDArraySink, JSONLSink, load_id_arrays
 from .Download import download
+from .KDML import KDMLError, parse_kdml
 
 name = "OpenHowNet"
@@ -27,6 +27,10 @@ setuptools.setup(
         'setuptools',
         'tqdm',
         'requests',
+        'numpy',
     ],
+    extras_require={
+        'numba': ['numba'],
+    },
     python_requires=">=3.6"
 )
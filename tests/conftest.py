@@ -0,0 +1,161 @@
+"""
+Test fixtures
+===============
+
+The tests run against a small synthetic resource tree written into a temporary home,
+so that they need neither the download nor the real data. OpenHowNet reads the home
+at import time, so it is set up here before any test module imports OpenHowNet.
+"""
+import atexit
+import os
+import pickle
+import random
+import shutil
+import tempfile
+
+import pytest
+
+from reference import old_sememe_list, old_sememe_tree
+
+HOME = tempfile.mkdtemp(prefix='openhownet-test-')
+atexit.register(shutil.rmtree, HOME, True)
+os.environ['HOME'] = HOME
+RESOURCE_PATH = os.path.join(HOME, '.openhownet', 'resources')
+
+ZH_CHARS = '的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会自着去之过家学对可她里后小么心多天而能好都然没日于起还发成事只作当想看文无开手苹果梨香蕉'
+EN_SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'po', 'se', 'di', 'ga', 'ble', 'tion', 'er', 'ing', 'ap', 'ple']
+ROLES = ['agent', 'patient', 'modifier', 'domain', 'content', 'scope', 'belong', 'PatientProduct', 'CoEvent', 'host']
+
+
+def write_resources(path, seed=7, sememe_num=80, sense_num=600):
+    """Write a random but well-formed set of HowNet resource files.
+
+    The sememe similarity takes multiples of 1/64, which float32 holds exactly, so that the
+    compiled similarity gives the same values as the table. The sense numbers start below 3378,
+    so that some senses are never returned as nearest words.
+    """
+    rng = random.Random(seed)
+
+    def word(syllables, low, high):
+        return ''.join(rng.choice(syllables) for _ in range(rng.randint(low, high)))
+
+    os.makedirs(path, exist_ok=True)
+    sememes = dict()
+    names = []
+    while len(names) < sememe_num:
+        en = word(EN_SYLLABLES, 1, 3)
+        if rng.random() < 0.05:
+            en = en + '_' + word(EN_SYLLABLES, 1, 2)
+        name = en + '|' + word(ZH_CHARS, 1, 2)
+        if name not in sememes:
+            sememes[name] = rng.randint(1, 5000)
+            names.append(name)
+
+    triples = []
+    for i, name in enumerate(names[4:], 4):
+        parent = names[rng.randrange(0, i)]
+        triples.append('%s hypernym %s' % (name, parent))
+        triples.append('%s hyponym %s' % (parent, name))
+    for _ in range(sememe_num // 8):
+        a, b = rng.sample(names, 2)
+        triples.append('%s antonym %s' % (a, b))
+        triples.append('%s converse %s' % (b, a))
+
+    def sememe():
+        return rng.choice(names).replace('_', ' ' if rng.random() < 0.3 else '_')
+
+    def gen(depth):
+        Def = '{' + sememe()
+        if depth < 3 and rng.random() < 0.6:
+            children = []
+            for _ in range(rng.randint(1, 3)):
+                r = rng.random()
+                role = rng.choice(ROLES)
+                if r < 0.1:
+                    children.append(role + '={~}')
+                elif r < 0.17:
+                    children.append(role + '={' + rng.choice('$?') + '}')
+                elif r < 0.3:
+                    children.append(role + '="' + sememe() + '"')
+                elif r < 0.4:
+                    children.append(gen(depth + 1))
+                else:
+                    children.append(role + '=' + gen(depth + 1))
+            Def += ':' + ','.join(children)
+        return Def + '}'
+
+    sense_dic = dict()
+    for i in range(sense_num):
+        No = '%012d' % (3000 + 3 * i)
+        Def = gen(0)
+        if rng.random() < 0.05:
+            Def += ';' + gen(1)
+        if rng.random() < 0.03:
+            Def += 'RMK=note'
+        en = word(EN_SYLLABLES, 1, 3)
+        if rng.random() < 0.2:
+            en += ' ' + word(EN_SYLLABLES, 1, 2)
+        zh = word(ZH_CHARS, 1, 3) if rng.random() > 0.02 else ''
+        sense_dic[No] = {'No': No, 'en_word': en, 'en_grammar': rng.choice(['noun', 'verb', 'adj']),
+                         'ch_word': zh, 'ch_grammar': rng.choice(['noun', 'verb', 'adj']), 'Def': Def}
+
+    sense_tree = dict()
+    synonym = dict()
+    node_names = set(names)
+    for No, sense in sense_dic.items():
+        tree = old_sememe_tree(sense['Def']).children[0]
+        tree.parent = None
+        sense_tree[No] = tree
+        node_names.update(node.name for node in tree.descendants + (tree,))
+        key = '_'.join(sorted(set(old_sememe_list(sense['Def']))))
+        synonym.setdefault(key, []).append(No)
+    node_names = sorted(node_names)
+    sememe_sim_table = dict()
+    for i, a in enumerate(node_names):
+        for b in node_names[i:]:
+            sim = 1.0 if a == b else rng.randint(0, 64) / 64
+            sememe_sim_table[(a, b) if rng.random() < 0.5 else (b, a)] = sim
+
+    babel_data = []
+    for i in range(200):
+        babel_data.append({'bn': 'bn:%08dn' % i, 'pos': rng.choice('avnr'),
+                           'en_synonyms': [word(EN_SYLLABLES, 1, 3) for _ in range(rng.randint(1, 3))],
+                           'zh_synonyms': [word(ZH_CHARS, 1, 3) for _ in range(rng.randint(0, 3))],
+                           'en_glosses': ['gloss'], 'zh_glosses': [], 'image_urls': [],
+                           'sememes': rng.sample(names, rng.randint(1, 3)), 'rel': {}})
+    for synset in babel_data:
+        for _ in range(rng.randint(0, 3)):
+            synset['rel'].setdefault(rng.choice(['hypernym', 'antonym', 'similar']), []).append(
+                rng.choice(babel_data)['bn'])
+
+    for name, obj in [('sememe_all', sememes), ('HowNet_dict_complete', sense_dic), ('sense_tree', sense_tree),
+                      ('sememe_sim_table', sememe_sim_table), ('synonym', synonym), ('babel_data', babel_data)]:
+        with open(os.path.join(path, name), 'wb') as f:
+            pickle.dump(obj, f)
+    with open(os.path.join(path, 'sememe_triples_taxonomy.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(triples) + '\n')
+
+
+write_resources(RESOURCE_PATH)
+
+
+@pytest.fixture(scope='session')
+def resource_path():
+    return RESOURCE_PATH
+
+
+@pytest.fixture(scope='session')
+def hownet_dict():
+    import OpenHowNet
+    return OpenHowNet.HowNetDict(init_sim=True, init_babel=True)
+
+
+@pytest.fixture(scope='session')
+def resources():
+    """The pickled resources the dicts are loaded from, by file name.
+    """
+    res = dict()
+    for name in ['sememe_all', 'HowNet_dict_complete', 'sense_tree', 'sememe_sim_table']:
+        with open(os.path.join(RESOURCE_PATH, name), 'rb') as f:
+            res[name] = pickle.load(f)
+    return res
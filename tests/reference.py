@@ -0,0 +1,182 @@
+"""
+Reference implementations
+===========================
+
+The straightforward implementations the indexes and the compiled structures are checked against,
+most of them the ones OpenHowNet used before.
+"""
+from anytree import Node
+
+
+def old_sememe_list(Def):
+    """Get the sememe names (in the form of en_zh) of a Def by scanning around each '|'.
+    """
+    res = []
+    for i in range(len(Def)):
+        if Def[i] == '|':
+            start = end = i
+            while Def[start] not in ['{', '"']:
+                start -= 1
+            while Def[end] not in ['}', ':', '"']:
+                end += 1
+            res.append(Def[start + 1:end].replace(' ', '_'))
+    return res
+
+
+def old_sememe_tree(Def):
+    """Build the sememe tree of the first segment of a Def by the bracket-counting parser.
+
+    Returns:
+        (`anytree.Node`) the 'sense' root, the sememe nodes are named by their en_zh strings.
+    """
+    rmk_pos = Def.find('RMK=')
+    if rmk_pos >= 0:
+        Def = Def[:rmk_pos]
+    kdml = Def.split(";")[0]
+    root = Node('root', role='sense')
+    entity_idx = []
+    node = []
+    pointer = []
+    for i in range(len(kdml)):
+        if kdml[i] in ['~', '?', '$']:
+            if kdml[i] == '~':
+                pointer.append(len(node))
+            entity_idx.append([i, i + 1])
+            node.append(Node(kdml[i], role='None'))
+        elif kdml[i] == '|':
+            start_idx = end_idx = i
+            while kdml[start_idx] not in ['{', '"']:
+                start_idx -= 1
+            while kdml[end_idx] not in ['}', ':', '"']:
+                end_idx += 1
+            entity_idx.append([start_idx + 1, end_idx])
+            node.append(Node(kdml[start_idx + 1:end_idx].replace(' ', '_'), role='None'))
+    for i in range(len(entity_idx)):
+        cursor = entity_idx[i][0]
+        left_brace = right_brace = quotation = 0
+        while not (kdml[cursor] == ':' and ((quotation % 2 == 0 and left_brace == right_brace + 1) or
+                                            (quotation % 2 == 1 and left_brace == right_brace))):
+            if cursor == 0:
+                break
+            if kdml[cursor] == '{':
+                left_brace += 1
+            elif kdml[cursor] == '}':
+                right_brace += 1
+            elif kdml[cursor] == '"':
+                quotation += 1
+            cursor -= 1
+        parent_idx = -1
+        for j in range(i - 1, -1, -1):
+            if entity_idx[j][1] == cursor:
+                node[i].parent = node[j]
+                parent_idx = j
+                break
+        if i != 0:
+            right_range = entity_idx[parent_idx if parent_idx != -1 else i - 1][1] - 1
+            role_begin = role_end = -1
+            for j in range(entity_idx[i][0] - 1, right_range, -1):
+                if kdml[j] == '=':
+                    role_end = j
+                elif kdml[j] in [',', ':']:
+                    role_begin = j
+                    break
+            if role_end != -1:
+                node[i].role = kdml[role_begin + 1:role_end]
+    for i in pointer:
+        node[i].parent.role = node[i].role
+        node[i].parent = None
+    node[0].parent = root
+    return root
+
+
+def dump_tree(node, depth=0):
+    """List the (depth, name, role) of the nodes of a tree in pre-order.
+    """
+    res = [(depth, str(node.name), node.role)]
+    for child in node.children:
+        res.extend(dump_tree(child, depth + 1))
+    return res
+
+
+def old_sense_similarity(node1, node2, sememe_sim_table):
+    """Calculate the similarity between two anytree sense trees.
+    """
+    delta = 0.1
+    beta_relation = 0.3
+    beta_sememe = 0.7
+
+    relation_sim = 0
+    if node1.is_leaf and node2.is_leaf:
+        beta_relation = 0
+        beta_sememe = 1
+    else:
+        role_match = 0
+        N = len(node1.children) + len(node2.children)
+        flag1 = [1] * len(node1.children)
+        flag2 = [1] * len(node2.children)
+        for i in range(len(node1.children)):
+            for j in range(len(node2.children)):
+                if node1.children[i].role == node2.children[j].role and flag1[i] == 1 and flag2[j] == 1:
+                    flag1[i] = 0
+                    flag2[j] = 0
+                    role_match = role_match + 1
+                    relation_sim = relation_sim + old_sense_similarity(
+                        node1.children[i], node2.children[j], sememe_sim_table)
+        relation_sim = relation_sim + (sum(flag1) + sum(flag2)) * delta
+        relation_sim = relation_sim / (N - role_match)
+
+    if (node1.name, node2.name) in sememe_sim_table:
+        sememe_sim = sememe_sim_table[(node1.name, node2.name)]
+    else:
+        sememe_sim = sememe_sim_table[(node2.name, node1.name)]
+    return beta_relation * relation_sim + beta_sememe * sememe_sim
+
+
+def old_words_by_rule(senses, language, score, grammar, K):
+    """Pick the first K distinct words of the (sense, similarity) pairs.
+    """
+    res = []
+    seen = set()
+    for sense, sim in senses:
+        word = sense.en_word if language == 'en' else sense.zh_word
+        if word == '' or word in seen:
+            continue
+        if grammar is not None and (sense.en_grammar if language == 'en' else sense.zh_grammar) != grammar:
+            continue
+        seen.add(word)
+        res.append((word, sim) if score else word)
+        if len(res) == K:
+            break
+    return res
+
+
+def old_nearest_words(hownet_dict, sense_tree_dic, sememe_sim_table, word, language, K=10, merge=False, pos=None):
+    """Get the nearest words by scoring the senses of the word against all the other senses.
+
+    Returns:
+        (`list`) the (word, similarity) pairs if merge, else (`dict`) the pairs of each sense of the word.
+    """
+    res_temp = []
+    for sense in hownet_dict.get_sense(word, pos=pos):
+        tree = sense_tree_dic[sense.No]
+        scores = []
+        for No, other in hownet_dict.sense_dic.items():
+            if No != sense.No and int(No) >= 3378:
+                scores.append((other, old_sense_similarity(tree, sense_tree_dic[No], sememe_sim_table)))
+        res_temp.append((sense, sorted(scores, key=lambda x: x[1], reverse=True)))
+    if merge:
+        res = sorted([x for _, synonyms in res_temp for x in synonyms], key=lambda x: x[1], reverse=True)
+        return old_words_by_rule(res, language, True, pos, K)
+    return {sense: old_words_by_rule(synonyms, language, True, pos, K) for sense, synonyms in res_temp}
+
+
+def edit_distance(a, b):
+    """Get the Levenshtein distance between two strings.
+    """
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        new_row = [i]
+        for j, cb in enumerate(b, 1):
+            new_row.append(min(new_row[-1] + 1, row[j] + 1, row[j - 1] + (ca != cb)))
+        row = new_row
+    return row[-1]
@@ -0,0 +1,151 @@
+import itertools
+import random
+
+import numpy as np
+
+from OpenHowNet.BitmapIndex import Bitmap, BitmapIndex
+from OpenHowNet.RetrievalIndex import RetrievalIndex
+from OpenHowNet.TaxonomyIndex import TaxonomyIndex
+from OpenHowNet.TripleStore import TripleStore
+
+
+def path_to_root(parents, a):
+    res = [a]
+    while parents[res[-1]] != -1:
+        res.append(parents[res[-1]])
+    return res
+
+
+def test_taxonomy_index():
+    rng = random.Random(0)
+    for n in [1, 2, 10, 200]:
+        parents = [rng.randrange(-1, i) if rng.random() < 0.9 else -1 for i in range(n)]
+        rng.shuffle(parents)
+        index = TaxonomyIndex(parents)
+        parents = index.parents.tolist()
+        pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(500)]
+        for a, b in pairs:
+            path_a, path_b = path_to_root(parents, a), path_to_root(parents, b)
+            common = [c for c in path_a if c in path_b]
+            assert index.lca(a, b) == (common[0] if common else -1)
+            assert index.distance(a, b) == (path_a.index(common[0]) + path_b.index(common[0]) if common else None)
+            assert index.is_ancestor(a, b) == (a in path_b)
+            assert index.ancestors(a) == path_a[1:]
+        a, b = np.array(pairs).T
+        assert index.lca_many(a, b).tolist() == [index.lca(x, y) for x, y in pairs]
+
+
+def test_taxonomy_drops_cycles():
+    index = TaxonomyIndex([1, 2, 0, 2])
+    assert sorted(index.parents.tolist()).count(-1) == 1
+    assert index.lca(3, 0) == index.lca(0, 3) != -1
+
+
+def test_sememe_lca(hownet_dict):
+    sememes = hownet_dict.get_all_sememes()
+
+    def path(s):
+        res = [s]
+        while res[-1].related_sememes.get('hypernym'):
+            res.append(res[-1].related_sememes['hypernym'][0])
+        return res
+
+    for x, y in itertools.islice(itertools.product(sememes, sememes), 0, None, 7):
+        path_x, path_y = path(x), path(y)
+        common = [c for c in path_x if c in path_y]
+        assert hownet_dict.get_sememe_lca(x, y) == common[:1]
+        assert hownet_dict.get_sememe_ancestors(x) == path_x[1:]
+
+
+def test_triple_store():
+    rng = np.random.default_rng(0)
+    n, relation_num = 30, 4
+    heads, relations, tails = (rng.integers(0, k, 300) for k in (n, relation_num, n))
+    store = TripleStore(heads, relations, tails, ['r%d' % i for i in range(relation_num)], node_num=n)
+    triples = sorted(set(zip(heads.tolist(), relations.tolist(), tails.tolist())))
+    assert len(store) == len(triples)
+    for head, relation, tail in itertools.product([None, 0, 7, 29], [None, 0, 'r3', 'missing'], [None, 3, 29]):
+        r = store.relation_index.get(relation, -1) if isinstance(relation, str) else relation
+        expected = [t for t in triples if (head is None or t[0] == head) and (r is None or t[1] == r) and
+                    (tail is None or t[2] == tail)]
+        assert sorted(zip(*(c.tolist() for c in store.match(head, relation, tail)))) == expected
+    assert store.relations_between(7, 3) == ['r%d' % t[1] for t in triples if t[0] == 7 and t[2] == 3]
+
+
+def test_sememe_relations(hownet_dict):
+    sememes = hownet_dict.get_all_sememes()
+    for x in sememes:
+        expected = [(x, r, s) for r, v in x.related_sememes.items() for s in v]
+        assert sorted(map(str, hownet_dict.get_related_sememes(x.en_zh, return_triples=True))) == sorted(
+            map(str, expected))
+        for y in sememes[:10] + [s for v in x.related_sememes.values() for s in v]:
+            assert hownet_dict.get_sememe_relation(x.en_zh, y.en_zh) == [
+                r for r, v in x.related_sememes.items() if y in v]
+
+
+def test_bitmap():
+    rng = np.random.default_rng(0)
+    for size in [1, 64, 1000, 5000]:
+        sets = [set(rng.choice(size, int(rng.integers(0, size)) // d, replace=False).tolist()) for d in (1, 3, 50, 500)]
+        bitmaps = [Bitmap.from_ids(sorted(s), size) for s in sets]
+        for (a, x), (b, y) in itertools.product(zip(sets, bitmaps), repeat=2):
+            assert (x & y).ids().tolist() == sorted(a & b)
+            assert (x | y).ids().tolist() == sorted(a | b)
+            assert (x - y).ids().tolist() == sorted(a - b)
+            assert len(x | y) == len(a | b)
+        for a, x in zip(sets, bitmaps):
+            assert (~x).ids().tolist() == sorted(set(range(size)) - a)
+
+
+def test_bitmap_index_query():
+    rng = np.random.default_rng(1)
+    n_rows, n_cols = 3000, 20
+    matrix = rng.random((n_rows, n_cols)) < np.linspace(0.001, 0.5, n_cols)
+    cols = [np.flatnonzero(matrix[:, j]) for j in range(n_cols)]
+    index = BitmapIndex(np.concatenate([[0], np.cumsum([len(c) for c in cols])]), np.concatenate(cols), n_rows)
+    for _ in range(200):
+        all_of = rng.choice(n_cols, int(rng.integers(0, 3)), replace=False).tolist()
+        any_of = [rng.choice(n_cols, int(rng.integers(1, 4)), replace=False).tolist()
+                  for _ in range(int(rng.integers(0, 2)))]
+        none_of = rng.choice(n_cols, int(rng.integers(0, 3)), replace=False).tolist()
+        expected = np.ones(n_rows, dtype=bool)
+        for j in all_of:
+            expected &= matrix[:, j]
+        for group in any_of:
+            expected &= matrix[:, group].any(axis=1)
+        for j in none_of:
+            expected &= ~matrix[:, j]
+        assert index.query(all_of, any_of, none_of).ids().tolist() == np.flatnonzero(expected).tolist()
+
+
+def test_senses_by_sememes(hownet_dict):
+    sememes = hownet_dict.get_all_sememes()
+    senses = hownet_dict.sense_list
+    rng = random.Random(0)
+    for _ in range(50):
+        all_of = rng.sample(sememes, rng.randint(0, 1))
+        any_of = rng.sample(sememes, rng.randint(0, 4))
+        none_of = rng.sample(sememes, rng.randint(0, 2))
+        expected = [s for s in senses if all(x in s.sememes for x in all_of) and
+                    (not any_of or any(x in s.sememes for x in any_of)) and not any(x in s.sememes for x in none_of)]
+        assert hownet_dict.get_senses_by_sememes(all_of=all_of, any_of=any_of, none_of=none_of) == expected
+
+
+def test_retrieval_index():
+    rng = np.random.default_rng(0)
+    for t in range(300):
+        n_rows, n_cols = int(rng.integers(1, 200)), int(rng.integers(1, 30))
+        matrix = rng.random((n_rows, n_cols)) < rng.random() * 0.3
+        cols = [np.flatnonzero(matrix[:, j]) for j in range(n_cols)]
+        index = RetrievalIndex(np.concatenate([[0], np.cumsum([len(c) for c in cols])]), np.concatenate(cols), n_rows)
+        query = rng.integers(0, n_cols, int(rng.integers(1, 8)))
+        K = [None, 1, 3, 10, 1000][t % 5]
+        ids, scores = index.search(query, K)
+
+        weights = np.zeros(n_cols)
+        np.add.at(weights, query, index.idf[query])
+        full = matrix.astype(np.float64) @ weights
+        rows = np.flatnonzero(full > 0)
+        rows = rows[np.lexsort((rows, -full[rows]))][:K]
+        assert np.allclose(scores, full[rows])
+        assert np.allclose(full[ids], full[rows])
@@ -0,0 +1,53 @@
+import pytest
+from anytree import Node
+
+from OpenHowNet import KDMLError, parse_kdml
+from reference import dump_tree, old_sememe_list, old_sememe_tree
+
+SAMPLE_DEFS = [
+    '{tree|树:{reproduce|生殖:PatientProduct={fruit|水果},agent={~}}}',
+    '{human|人:belong="country|国家",modifier={able|能:scope={speak|说}}}',
+    '{InstitutePlace|场所:domain={economy|经济},{buy|买:location={~},possession={$}}}',
+    '{fruit|水果};{tree|树:{reproduce|生殖:agent={~}}}',
+    '{attribute|属性:host={?}}RMK=something',
+    '{rise|上升:{change|变}}',
+]
+
+
+def kdml_tree(Def):
+    """Build the anytree of a Def from the nodes `parse_kdml` resolves.
+    """
+    nodes = [Node('root', role='sense')]
+    for node in parse_kdml(Def).nodes:
+        nodes.append(Node(node.name, role=node.role, parent=nodes[node.parent + 1]))
+    return nodes[0]
+
+
+def test_parser_matches_old_parser(resources):
+    defs = SAMPLE_DEFS + [sense['Def'] for sense in resources['HowNet_dict_complete'].values()]
+    for Def in defs:
+        assert dump_tree(kdml_tree(Def)) == dump_tree(old_sememe_tree(Def)), Def
+        assert parse_kdml(Def).sememes == old_sememe_list(Def), Def
+
+
+def test_sense_tree_matches_old_parser(hownet_dict):
+    def dump(node, depth=0):
+        res = [(depth, getattr(node.name, 'en_zh', node.name), node.role)]
+        for child in node.children:
+            res.extend(dump(child, depth + 1))
+        return res
+
+    for sense in hownet_dict.get_all_senses()[:200]:
+        old_tree = dump_tree(old_sememe_tree(sense.Def))[1:]
+        assert dump(sense.get_sememe_tree(return_node=True))[1:] == old_tree, sense.Def
+        assert sorted(m.en_zh for m in sense.get_sememe_list()) == sorted(set(
+            name for _, name, _ in old_tree if '|' in name))
+        assert [m.en_zh for m in sense.sememes] == old_sememe_list(sense.Def)
+
+
+def test_malformed_def():
+    with pytest.raises(KDMLError) as e:
+        parse_kdml('fruit|水果}')
+    assert e.value.position == 5
+    with pytest.raises(ValueError):
+        parse_kdml('{fruit|水果};').tree(1)
@@ -0,0 +1,86 @@
+import random
+
+from OpenHowNet.SubstringIndex import SubstringIndex
+from OpenHowNet.Trie import Trie
+from reference import edit_distance
+
+
+def sample_queries(words, seed=0, num=100):
+    rng = random.Random(seed)
+    queries = ['', 'not a word']
+    for word in rng.sample(words, num):
+        start = rng.randrange(len(word))
+        queries.append(word[start:start + rng.randint(1, 3)])
+    return queries
+
+
+def test_substring_index():
+    rng = random.Random(0)
+    keys = [''.join(rng.choice('abcd') for _ in range(rng.randint(0, 6))) for _ in range(2000)]
+    index = SubstringIndex(keys)
+    for word in ['', 'a', 'ab', 'abc', 'dcba', 'e'] + sample_queries([k for k in keys if k]):
+        assert list(index.search(word)) == [i for i, k in enumerate(keys) if word in k]
+        assert index.candidate_num(word) >= len(index.find(word))
+
+
+def test_get_sense_fuzzy_matches_linear_scan(hownet_dict):
+    words = [w for w in hownet_dict.zh_map if w] + list(hownet_dict.en_map) + list(hownet_dict.sense_dic)[:20]
+    for word in sample_queries(words):
+        for language in (None, 'en', 'zh'):
+            maps = {'en': [hownet_dict.en_map], 'zh': [hownet_dict.zh_map],
+                    None: [hownet_dict.en_map, hownet_dict.zh_map]}[language]
+            expected = set(s.No for m in maps for k, v in m.items() if word in k for s in v)
+            if language is None:
+                expected.update(No for No in hownet_dict.sense_dic if word in No)
+            for pos in (None, 'noun'):
+                res = hownet_dict.get_sense(word, language=language, pos=pos, strict=False)
+                assert len(res) == len(set(res))
+                assert set(s.No for s in res) == set(
+                    No for No in expected if pos is None or (
+                        hownet_dict.sense_dic[No].en_grammar if language == 'en'
+                        else hownet_dict.sense_dic[No].zh_grammar) == pos)
+            res = hownet_dict.get_sense(word, language=language, strict=False)
+            assert hownet_dict.get_sense(word, language=language, strict=False, limit=5, offset=3) == res[3:8]
+
+
+def test_get_synset_fuzzy_matches_linear_scan(hownet_dict):
+    words = list(hownet_dict.en_synset_dic) + list(hownet_dict.zh_synset_dic)
+    for word in sample_queries(words):
+        for language in (None, 'en', 'zh'):
+            expected = set()
+            if language != 'zh':
+                expected.update(s.id for k, v in hownet_dict.en_synset_dic.items() if word in k for s in v)
+            if language != 'en':
+                expected.update(s.id for k, v in hownet_dict.zh_synset_dic.items() if word in k for s in v)
+            if language is None:
+                expected.update(k for k in hownet_dict.synset_dic if word in k)
+            assert set(s.id for s in hownet_dict.get_synset(word, language=language, strict=False)) == expected
+
+
+def test_trie_matches_linear_scan():
+    rng = random.Random(0)
+    keys = [''.join(rng.choice('abcde') for _ in range(rng.randint(0, 7))) for _ in range(3000)]
+    scores = [rng.randint(0, 20) for _ in keys]
+    trie = Trie(keys, scores)
+    best = dict()
+    for k, v in zip(keys, scores):
+        best[k] = max(best.get(k, -1), v)
+    for _ in range(200):
+        prefix = ''.join(rng.choice('abcde') for _ in range(rng.randint(0, 3)))
+        expected = sorted([(k, v) for k, v in best.items() if k.startswith(prefix)], key=lambda x: (-x[1], x[0]))
+        assert trie.complete(prefix, 7) == expected[:7]
+        word = ''.join(rng.choice('abcdef') for _ in range(rng.randint(0, 6)))
+        max_distance = rng.randint(0, 2)
+        expected = sorted((edit_distance(word, k), -v, k) for k, v in best.items()
+                          if edit_distance(word, k) <= max_distance)
+        assert trie.fuzzy_search(word, max_distance) == [(k, d) for d, _, k in expected]
+
+
+def test_complete_and_fuzzy_search(hownet_dict):
+    for language, word_map in (('en', hownet_dict.en_map), ('zh', hownet_dict.zh_map)):
+        ranked = sorted(((w, len(v)) for w, v in word_map.items()), key=lambda x: (-x[1], x[0]))
+        for word in random.Random(1).sample(list(word_map), 30):
+            prefix = word[:2]
+            assert hownet_dict.complete(prefix, language, K=5) == [w for w, _ in ranked if w.startswith(prefix)][:5]
+            expected = sorted((edit_distance(word, w), -n, w) for w, n in ranked if edit_distance(word, w) <= 1)
+            assert hownet_dict.fuzzy_search(word, language, max_distance=1, K=5) == [w for _, _, w in expected][:5]
@@ -0,0 +1,80 @@
+import random
+
+import numpy as np
+import pytest
+
+from OpenHowNet import Similarity
+from OpenHowNet.NearestIndex import nearest_senses
+from reference import old_nearest_words, old_sense_similarity
+
+
+@pytest.fixture(params=['numba', 'python'])
+def sense_trees(request, hownet_dict, monkeypatch):
+    trees = hownet_dict.sense_trees
+    if request.param == 'python':
+        monkeypatch.setattr(Similarity, '_kernel_similarity', None)
+    elif Similarity._kernel_similarity is None:
+        pytest.skip('numba is not installed')
+    return Similarity.FlatSenseTrees(trees.sections, trees.matrix)
+
+
+def test_flat_trees_match_anytree(hownet_dict, resources, sense_trees):
+    sense_tree, table = resources['sense_tree'], resources['sememe_sim_table']
+    senses = hownet_dict.sense_list
+    rng = random.Random(0)
+    for _ in range(2000):
+        i, j = rng.randrange(len(senses)), rng.randrange(len(senses))
+        expected = old_sense_similarity(sense_tree[senses[i].No], sense_tree[senses[j].No], table)
+        assert sense_trees.sense_similarity(i, j) == expected
+    candidates = hownet_dict.nearest_candidates
+    expected = [old_sense_similarity(sense_tree[senses[0].No], sense_tree[senses[j].No], table)
+                for j in candidates.tolist()]
+    assert sense_trees.scores(0, candidates).tolist() == expected
+
+
+def test_word_similarity(hownet_dict, resources):
+    sense_tree, table = resources['sense_tree'], resources['sememe_sim_table']
+    words = random.Random(0).sample(list(hownet_dict.zh_map), 30) + ['not a word']
+    pairs = [(a, b) for a in words for b in words[:5]]
+    for a, b in pairs:
+        expected = max([old_sense_similarity(sense_tree[x.No], sense_tree[y.No], table)
+                        for x in hownet_dict.get_sense(a) for y in hownet_dict.get_sense(b)], default=-1)
+        assert hownet_dict.calculate_word_similarity(a, b) == expected
+    assert hownet_dict.calculate_word_similarity_batch(pairs).tolist() == [
+        hownet_dict.calculate_word_similarity(a, b) for a, b in pairs]
+
+
+def test_pruned_search_matches_full_search(hownet_dict):
+    trees, candidates = hownet_dict.sense_trees, hownet_dict.nearest_candidates
+    for i in random.Random(1).sample(range(len(hownet_dict.sense_list)), 100):
+        ids, scores, total = nearest_senses(trees, candidates, i, None)
+        for K in [1, 5, 10, 40]:
+            pruned_ids, pruned_scores, pruned_total = nearest_senses(trees, candidates, i, K)
+            assert pruned_ids.tolist() == ids[:K].tolist()
+            assert pruned_scores.tolist() == scores[:K].tolist()
+            assert pruned_total == total
+
+
+def test_nearest_words_unchanged(hownet_dict, resources):
+    sense_tree, table = resources['sense_tree'], resources['sememe_sim_table']
+    words = random.Random(2).sample(list(hownet_dict.zh_map), 10)
+
+    def check():
+        for word in words:
+            for K in [3, 10]:
+                for merge in (False, True):
+                    assert hownet_dict.get_nearest_words(word, language='zh', score=True, merge=merge, K=K) == \
+                        old_nearest_words(hownet_dict, sense_tree, table, word, 'zh', K=K, merge=merge)
+
+    check()
+    # From the precomputed index, and then from the full search where the index is too short.
+    hownet_dict.build_nearest_index(K=8, processes=1)
+    check()
+
+
+def test_approximate_nearest_words(hownet_dict):
+    word = next(iter(hownet_dict.zh_map))
+    exact = hownet_dict.get_nearest_words(word, language='zh', score=True, merge=True, K=5)
+    approximate = hownet_dict.get_nearest_words(word, language='zh', score=True, merge=True, K=5,
+                                                approximate=True, candidate_num=len(hownet_dict.sense_list))
+    assert approximate == exact
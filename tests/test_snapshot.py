@@ -0,0 +1,83 @@
+import os
+import pickle
+import shutil
+
+import OpenHowNet
+from OpenHowNet import Download, Snapshot
+
+
+def sense_fields(senses):
+    return sorted((s.No, s.en_word, s.en_grammar, s.zh_word, s.zh_grammar, s.Def,
+                   tuple(m.en_zh for m in s.sememes)) for s in senses)
+
+
+def word_map(word_map):
+    return {word: sorted(s.No for s in senses) for word, senses in word_map.items()}
+
+
+def test_snapshot_round_trip(hownet_dict):
+    snapshot_dict = OpenHowNet.HowNetDict(use_snapshot=True)
+    assert sense_fields(snapshot_dict.sense_dic.values()) == sense_fields(hownet_dict.sense_dic.values())
+    assert word_map(snapshot_dict.en_map) == word_map(hownet_dict.en_map)
+    assert word_map(snapshot_dict.zh_map) == word_map(hownet_dict.zh_map)
+    for word in list(hownet_dict.zh_map)[:50] + list(hownet_dict.en_map)[:50] + ['', 'not a word']:
+        for language in (None, 'en', 'zh'):
+            assert sense_fields(snapshot_dict.get_sense(word, language)) == sense_fields(
+                hownet_dict.get_sense(word, language))
+    for sememe, expected in zip(snapshot_dict.get_all_sememes(), hownet_dict.get_all_sememes()):
+        assert sememe.en_zh == expected.en_zh
+        assert sorted(s.No for s in sememe.senses) == sorted(s.No for s in expected.senses)
+        assert {r: sorted(m.en_zh for m in v) for r, v in sememe.related_sememes.items()} == {
+            r: sorted(m.en_zh for m in v) for r, v in expected.related_sememes.items()}
+
+
+def test_snapshot_reused(resource_path):
+    OpenHowNet.HowNetDict(use_snapshot=True)
+    path = Snapshot.get_snapshot_path("hownet.snap")
+    mtime = os.stat(path).st_mtime_ns
+    OpenHowNet.HowNetDict.build_snapshot().close()
+    assert os.stat(path).st_mtime_ns == mtime
+
+
+def test_snapshot_rebuilt_when_stale(resource_path, tmp_path, monkeypatch):
+    home = str(tmp_path / '.openhownet')
+    shutil.copytree(resource_path, os.path.join(home, 'resources'))
+    monkeypatch.setattr(Download, 'OPENHOWNET_RESOURCE_PATH', home)
+    monkeypatch.setattr(Snapshot, 'OPENHOWNET_RESOURCE_PATH', home)
+    No = next(iter(OpenHowNet.HowNetDict(use_snapshot=True).sense_dic))
+
+    # The same size and modification time, only the content tells the change.
+    path = os.path.join(home, 'resources', 'HowNet_dict_complete')
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        sense_dic = pickle.load(f)
+    en_word = sense_dic[No]['en_word']
+    sense_dic[No]['en_word'] = en_word[::-1] if en_word[::-1] != en_word else en_word.upper()
+    with open(path, 'wb') as f:
+        pickle.dump(sense_dic, f)
+    assert os.stat(path).st_size == stat.st_size
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    rebuilt = OpenHowNet.HowNetDict(use_snapshot=True)
+    assert rebuilt.sense_dic[No].en_word == sense_dic[No]['en_word']
+    assert No in [s.No for s in rebuilt.get_sense(sense_dic[No]['en_word'], language='en')]
+
+
+def test_lazy_loading(hownet_dict):
+    lazy_dict = OpenHowNet.HowNetDict(use_snapshot=True, lazy=True)
+    assert 'sense' not in lazy_dict.load_times
+    word = next(iter(hownet_dict.zh_map))
+    assert sense_fields(lazy_dict.get_sense(word)) == sense_fields(hownet_dict.get_sense(word))
+    assert 'sense' in lazy_dict.load_times and 'similarity' not in lazy_dict.load_times
+    assert lazy_dict.calculate_word_similarity(word, word) == hownet_dict.calculate_word_similarity(word, word)
+
+
+def test_pickled_dicts(hownet_dict):
+    words = list(hownet_dict.zh_map)[:20]
+    shared_dict = OpenHowNet.SharedHowNetDict(init_sim=True)
+    for d in (shared_dict, pickle.loads(pickle.dumps(shared_dict)),
+              pickle.loads(pickle.dumps(OpenHowNet.HowNetDict(init_sim=True, use_snapshot=True)))):
+        for word in words:
+            assert sense_fields(d.get_sense(word)) == sense_fields(hownet_dict.get_sense(word))
+            assert d.calculate_word_similarity(word, words[0]) == hownet_dict.calculate_word_similarity(
+                word, words[0])
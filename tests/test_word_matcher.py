@@ -0,0 +1,68 @@
+import random
+
+from OpenHowNet.WordMatcher import WordMatcher
+
+
+def is_alnum(c):
+    return c < '\x80' and c.isalnum()
+
+
+def naive_matches(words, text):
+    """Match every word at every position, the ASCII letters and digits only as whole words.
+    """
+    index = {w: i for i, w in enumerate(dict.fromkeys(w for w in words if w))}
+    res = []
+    for end in range(1, len(text) + 1):
+        for start in range(end):
+            if text[start:end] in index and not (
+                    (start > 0 and is_alnum(text[start]) and is_alnum(text[start - 1])) or
+                    (end < len(text) and is_alnum(text[end - 1]) and is_alnum(text[end]))):
+                res.append((start, end, index[text[start:end]]))
+    return res
+
+
+def naive_segment(matches, n, mode):
+    spans = []
+    if mode == 'forward':
+        i = 0
+        while i < n:
+            end, w = max([(e, w) for s, e, w in matches if s == i], default=(i + 1, -1))
+            spans.append((i, end, w))
+            i = end
+    else:
+        j = n
+        while j > 0:
+            start, w = min([(s, w) for s, e, w in matches if e == j], default=(j - 1, -1))
+            spans.append((start, j, w))
+            j = start
+        spans.reverse()
+    return spans
+
+
+def test_matches_naive_matching():
+    rng = random.Random(0)
+    alphabet = '中国人民大学生ab1 '
+    for _ in range(300):
+        words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 30))]
+        matcher = WordMatcher(words)
+        text = ''.join(rng.choice(alphabet + 'xyz') for _ in range(rng.randint(0, 40)))
+        matches = naive_matches(words, text)
+        assert matcher.find_all(text) == matches
+        forward, backward = naive_segment(matches, len(text), 'forward'), naive_segment(matches, len(text), 'backward')
+        assert matcher.segment(text, 'forward') == forward
+        assert matcher.segment(text, 'backward') == backward
+
+        def cost(spans):
+            return len(spans), sum(1 for s, e, w in spans if e - s == 1)
+        assert matcher.segment(text) == (forward if cost(forward) < cost(backward) else backward)
+
+
+def test_find_words(hownet_dict):
+    rng = random.Random(1)
+    words = [w for w in hownet_dict.zh_map if w]
+    text = ''.join(rng.choice(words) for _ in range(50))
+    assert hownet_dict.find_words(text) == [(text[s:e], s, e) for s, e, _ in naive_matches(words, text)]
+    segments = hownet_dict.segment_text(text)
+    assert ''.join(w for w, _, _, _ in segments) == text
+    for word, start, end, senses in segments:
+        assert sorted(s.No for s in senses) == sorted(s.No for s in hownet_dict.zh_map.get(word, []))